@@ -0,0 +1,678 @@
+# bench/fake_github.py
+"""
+In-process stand-in for the GitHub REST API, for benchmarking main.py without the network.
+
+It implements the subset of the contents, git data (refs, commits, trees, blobs), branches,
+compare, repos and rate_limit endpoints the service calls, over an in-memory object store with real git
+blob shas. PyGithub is pointed at it by injecting connection classes, so every request still
+goes through the service's instrumentation and tracing. Latency and a rate-limit budget can be
+injected per request.
+
+    fake = FakeGitHub(latency_ms=80, jitter_ms=40, rate_limit=5000)
+    fake.create_repo("stewmckendry/demo", {"project/task.yaml": b"tasks: {}"})
+    fake.install()   # before the first Github client is created
+"""
+
+import base64
+import difflib
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+from github.Requester import Requester
+
+from utils.instrumentation import TimedHTTPConnection, TimedHTTPSConnection, github_operation
+
+API = "https://api.github.com"
+FILE_MODE, TREE_MODE = "100644", "040000"
+
+
+class GitHubError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def blob_sha(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _object_sha(kind: str, payload) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha1(kind.encode() + b" %d\0" % len(body) + body).hexdigest()
+
+
+class FakeRepo:
+    """Objects and refs of one repository."""
+
+    def __init__(self, full_name: str, default_branch: str = "main"):
+        self.full_name = full_name
+        self.default_branch = default_branch
+        self.blobs: Dict[str, bytes] = {}
+        self.trees: Dict[str, List[dict]] = {}
+        self.commits: Dict[str, dict] = {}
+        self.refs: Dict[str, str] = {}
+
+    @property
+    def url(self) -> str:
+        return f"{API}/repos/{self.full_name}"
+
+    # ---- Object store ----
+
+    def put_blob(self, data: bytes) -> str:
+        sha = blob_sha(data)
+        self.blobs[sha] = data
+        return sha
+
+    def write_tree(self, files: Dict[str, Tuple[str, str]]) -> str:
+        """Store nested trees for a flat `{path: (mode, blob_sha)}` map; returns the root tree sha."""
+        children: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        entries = []
+        for path, (mode, sha) in files.items():
+            head, _, rest = path.partition("/")
+            if rest:
+                children.setdefault(head, {})[rest] = (mode, sha)
+            else:
+                entries.append({"path": head, "mode": mode, "type": "blob", "sha": sha})
+        for name, sub in children.items():
+            entries.append({"path": name, "mode": TREE_MODE, "type": "tree", "sha": self.write_tree(sub)})
+        entries.sort(key=lambda e: e["path"])
+        sha = _object_sha("tree", entries)
+        self.trees[sha] = entries
+        return sha
+
+    def flatten(self, tree_sha: str, prefix: str = "") -> Dict[str, Tuple[str, str]]:
+        files = {}
+        for entry in self.trees[tree_sha]:
+            path = prefix + entry["path"]
+            if entry["type"] == "tree":
+                files.update(self.flatten(entry["sha"], path + "/"))
+            else:
+                files[path] = (entry["mode"], entry["sha"])
+        return files
+
+    def write_commit(self, tree: str, parents: List[str], message: str) -> str:
+        commit = {"tree": tree, "parents": list(parents), "message": message, "time": time.time()}
+        sha = _object_sha("commit", {**commit, "nonce": random.random()})
+        self.commits[sha] = commit
+        return sha
+
+    def commit_files(self, branch: str, changes: Dict[str, Optional[bytes]], message: str) -> str:
+        head = self.refs.get(f"heads/{branch}")
+        files = self.flatten(self.commits[head]["tree"]) if head else {}
+        for path, data in changes.items():
+            if data is None:
+                files.pop(path, None)
+            else:
+                files[path] = (FILE_MODE, self.put_blob(data))
+        sha = self.write_commit(self.write_tree(files), [head] if head else [], message)
+        self.refs[f"heads/{branch}"] = sha
+        return sha
+
+    # ---- Lookups ----
+
+    def resolve(self, ref: Optional[str]) -> str:
+        """Commit sha for a branch name, `heads/...` ref or commit sha."""
+        ref = ref or self.default_branch
+        for candidate in (f"heads/{ref}", ref.replace("refs/", "", 1)):
+            if candidate in self.refs:
+                return self.refs[candidate]
+        if ref in self.commits:
+            return ref
+        raise GitHubError(404, f"No commit found for the ref {ref}")
+
+    def tree_of(self, sha: str) -> str:
+        if sha in self.trees:
+            return sha
+        if sha in self.commits:
+            return self.commits[sha]["tree"]
+        return self.commits[self.resolve(sha)]["tree"]
+
+    def lookup(self, tree_sha: str, path: str) -> Optional[dict]:
+        """Tree entry for `path` (a synthetic root entry for "")."""
+        entry = {"path": "", "mode": TREE_MODE, "type": "tree", "sha": tree_sha}
+        for part in [p for p in path.split("/") if p]:
+            if entry["type"] != "tree":
+                return None
+            entry = next((e for e in self.trees[entry["sha"]] if e["path"] == part), None)
+            if entry is None:
+                return None
+        return entry
+
+    def ancestry(self, sha: str) -> List[str]:
+        """`sha` and every commit reachable from it, nearest first."""
+        order, seen, queue = [], set(), [sha]
+        while queue:
+            current = queue.pop(0)
+            if current in seen or current not in self.commits:
+                continue
+            seen.add(current)
+            order.append(current)
+            queue.extend(self.commits[current]["parents"])
+        return order
+
+    def is_ancestor(self, ancestor: str, sha: str) -> bool:
+        seen, stack = set(), [sha]
+        while stack:
+            current = stack.pop()
+            if current == ancestor:
+                return True
+            if current in seen or current not in self.commits:
+                continue
+            seen.add(current)
+            stack.extend(self.commits[current]["parents"])
+        return False
+
+
+class FakeGitHub:
+    """Routes REST calls to FakeRepos, with injected latency and a rate-limit budget."""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, rate_limit: int = 5000, rate_window: float = 3600):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.repos: Dict[str, FakeRepo] = {}
+        self.calls = 0
+        self.calls_by_operation: Dict[str, int] = {}
+        self._used = 0
+        self._window_start = time.time()
+        self._lock = threading.RLock()
+        self._routes = [
+            ("GET", r"/rate_limit", self._rate_limit),
+            ("GET", r"/user", lambda m, q, b: (200, {"login": "bench", "type": "User"})),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)", self._get_repo),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/contents/?(?P<path>.*)", self._get_contents),
+            ("PUT", r"/repos/(?P<repo>[^/]+/[^/]+)/contents/(?P<path>.+)", self._put_contents),
+            ("DELETE", r"/repos/(?P<repo>[^/]+/[^/]+)/contents/(?P<path>.+)", self._delete_contents),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/git/refs?/(?P<ref>.+)", self._get_ref),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/git/matching-refs/(?P<ref>.*)", self._matching_refs),
+            ("POST", r"/repos/(?P<repo>[^/]+/[^/]+)/git/refs", self._create_ref),
+            ("PATCH", r"/repos/(?P<repo>[^/]+/[^/]+)/git/refs/(?P<ref>.+)", self._update_ref),
+            ("DELETE", r"/repos/(?P<repo>[^/]+/[^/]+)/git/refs/(?P<ref>.+)", self._delete_ref),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/git/commits/(?P<sha>[^/]+)", self._get_commit),
+            ("POST", r"/repos/(?P<repo>[^/]+/[^/]+)/git/commits", self._create_commit),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/git/trees/(?P<sha>[^/]+)", self._get_tree),
+            ("POST", r"/repos/(?P<repo>[^/]+/[^/]+)/git/trees", self._create_tree),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/git/blobs/(?P<sha>[^/]+)", self._get_blob),
+            ("POST", r"/repos/(?P<repo>[^/]+/[^/]+)/git/blobs", self._create_blob),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/commits/(?P<sha>[^/]+)", self._get_repo_commit),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/compare/(?P<base>.+?)\.\.\.(?P<head>.+)", self._compare),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/branches", self._list_branches),
+            ("GET", r"/repos/(?P<repo>[^/]+/[^/]+)/branches/(?P<branch>.+)", self._get_branch),
+        ]
+
+    # ---- Setup ----
+
+    def create_repo(self, full_name: str, files: Optional[Dict[str, bytes]] = None, default_branch: str = "main") -> FakeRepo:
+        repo = FakeRepo(full_name, default_branch)
+        repo.commit_files(default_branch, dict(files or {}), "Initial commit")
+        self.repos[full_name] = repo
+        return repo
+
+    def install(self):
+        """Route every PyGithub request to this fake. Must run before main.py creates its clients."""
+        fake = self
+
+        class FakeSession:
+            def close(self):
+                pass
+
+            def __getattr__(self, verb):
+                def send(url, headers=None, data=None, **kwargs):
+                    return fake.handle(verb.upper(), url, data)
+                return send
+
+        def attach(cls):
+            class Fake(cls):
+                def __init__(self, *args, **kwargs):
+                    super().__init__(*args, **kwargs)
+                    self.session = FakeSession()
+            Fake.__name__ = "Fake" + cls.__name__
+            return Fake
+
+        Requester.injectConnectionClasses(attach(TimedHTTPConnection), attach(TimedHTTPSConnection))
+
+    # ---- Dispatch ----
+
+    def handle(self, verb: str, url: str, data) -> "FakeResponse":
+        parsed = urllib.parse.urlsplit(url)
+        path = urllib.parse.unquote(parsed.path)
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        body = json.loads(data) if data else {}
+
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= self.rate_window:
+                self._window_start, self._used = now, 0
+            counted = path != "/rate_limit"
+            if counted:
+                self.calls += 1
+                if self._used >= self.rate_limit:
+                    return self._response(403, {"message": "API rate limit exceeded"})
+                self._used += 1
+            for route_verb, pattern, handler in self._routes:
+                match = re.fullmatch(pattern, path)
+                if route_verb == verb and match:
+                    if counted:
+                        operation = github_operation(verb, path)
+                        self.calls_by_operation[operation] = self.calls_by_operation.get(operation, 0) + 1
+                    try:
+                        status, payload = handler(match.groupdict(), query, body)
+                    except GitHubError as e:
+                        status, payload = e.status, {"message": e.message}
+                    return self._response(status, payload)
+        return self._response(404, {"message": "Not Found"})
+
+    def rate_headers(self) -> Dict[str, str]:
+        return {
+            "x-ratelimit-limit": str(self.rate_limit),
+            "x-ratelimit-remaining": str(max(self.rate_limit - self._used, 0)),
+            "x-ratelimit-used": str(self._used),
+            "x-ratelimit-reset": str(int(self._window_start + self.rate_window)),
+            "x-ratelimit-resource": "core",
+        }
+
+    def _response(self, status: int, payload) -> "FakeResponse":
+        text = "" if payload is None else json.dumps(payload)
+        headers = {"content-type": "application/json; charset=utf-8", "content-length": str(len(text)), **self.rate_headers()}
+        return FakeResponse(status, headers, text)
+
+    def _repo(self, match: dict) -> FakeRepo:
+        repo = self.repos.get(match["repo"])
+        if repo is None:
+            raise GitHubError(404, "Not Found")
+        return repo
+
+    # ---- JSON shapes ----
+
+    @staticmethod
+    def _commit_json(repo: FakeRepo, sha: str) -> dict:
+        commit = repo.commits[sha]
+        signature = {
+            "name": "bench", "email": "bench@example.com",
+            "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(commit["time"])),
+        }
+        return {
+            "sha": sha,
+            "url": f"{repo.url}/git/commits/{sha}",
+            "html_url": f"https://github.com/{repo.full_name}/commit/{sha}",
+            "author": signature,
+            "committer": signature,
+            "message": commit["message"],
+            "tree": {"sha": commit["tree"], "url": f"{repo.url}/git/trees/{commit['tree']}"},
+            "parents": [{"sha": p, "url": f"{repo.url}/git/commits/{p}"} for p in commit["parents"]],
+        }
+
+    @staticmethod
+    def _content_json(repo: FakeRepo, path: str, entry: dict, ref: str, with_content: bool) -> dict:
+        is_file = entry["type"] == "blob"
+        body = {
+            "type": "file" if is_file else "dir",
+            "name": path.rsplit("/", 1)[-1],
+            "path": path,
+            "sha": entry["sha"],
+            "size": len(repo.blobs[entry["sha"]]) if is_file else 0,
+            "url": f"{repo.url}/contents/{urllib.parse.quote(path)}?ref={urllib.parse.quote(ref)}",
+            "git_url": f"{repo.url}/git/{'blobs' if is_file else 'trees'}/{entry['sha']}",
+            "html_url": f"https://github.com/{repo.full_name}/blob/{ref}/{path}",
+            "download_url": f"https://raw.githubusercontent.com/{repo.full_name}/{ref}/{path}" if is_file else None,
+        }
+        if is_file and with_content:
+            body["encoding"] = "base64"
+            body["content"] = base64.b64encode(repo.blobs[entry["sha"]]).decode()
+        return body
+
+    def _ref_json(self, repo: FakeRepo, ref: str) -> dict:
+        sha = repo.refs[ref]
+        return {
+            "ref": f"refs/{ref}",
+            "url": f"{repo.url}/git/refs/{ref}",
+            "object": {"sha": sha, "type": "commit", "url": f"{repo.url}/git/commits/{sha}"},
+        }
+
+    def _tree_json(self, repo: FakeRepo, sha: str, recursive: bool) -> dict:
+        if recursive:
+            entries, stack = [], [("", sha)]
+            while stack:
+                prefix, tree = stack.pop()
+                for entry in repo.trees[tree]:
+                    path = prefix + entry["path"]
+                    entries.append({**entry, "path": path})
+                    if entry["type"] == "tree":
+                        stack.append((path + "/", entry["sha"]))
+            entries.sort(key=lambda e: e["path"])
+        else:
+            entries = [dict(e) for e in repo.trees[sha]]
+        for entry in entries:
+            kind = "blobs" if entry["type"] == "blob" else "trees"
+            entry["url"] = f"{repo.url}/git/{kind}/{entry['sha']}"
+            if entry["type"] == "blob":
+                entry["size"] = len(repo.blobs[entry["sha"]])
+        return {"sha": sha, "url": f"{repo.url}/git/trees/{sha}", "tree": entries, "truncated": False}
+
+    # ---- Handlers ----
+
+    def _rate_limit(self, match, query, body):
+        core = {"limit": self.rate_limit, "remaining": max(self.rate_limit - self._used, 0),
+                "reset": int(self._window_start + self.rate_window), "used": self._used}
+        return 200, {"resources": {"core": core}, "rate": core}
+
+    def _get_repo(self, match, query, body):
+        repo = self._repo(match)
+        owner, name = repo.full_name.split("/")
+        return 200, {
+            "id": abs(hash(repo.full_name)) % 10 ** 9, "name": name, "full_name": repo.full_name,
+            "owner": {"login": owner, "type": "User"}, "private": False,
+            "url": repo.url, "html_url": f"https://github.com/{repo.full_name}",
+            "default_branch": repo.default_branch,
+        }
+
+    def _get_contents(self, match, query, body):
+        repo = self._repo(match)
+        ref = query.get("ref") or repo.default_branch
+        path = match["path"].strip("/")
+        entry = repo.lookup(repo.commits[repo.resolve(ref)]["tree"], path)
+        if entry is None:
+            raise GitHubError(404, "Not Found")
+        if entry["type"] == "blob":
+            return 200, self._content_json(repo, path, entry, ref, with_content=True)
+        return 200, [
+            self._content_json(repo, f"{path}/{child['path']}".lstrip("/"), child, ref, with_content=False)
+            for child in repo.trees[entry["sha"]]
+        ]
+
+    def _put_contents(self, match, query, body):
+        repo = self._repo(match)
+        branch = body.get("branch") or repo.default_branch
+        path = match["path"].strip("/")
+        head = repo.resolve(branch)
+        existing = repo.lookup(repo.commits[head]["tree"], path)
+        if existing is not None and existing["type"] == "blob":
+            if not body.get("sha"):
+                raise GitHubError(422, "Invalid request.\n\n\"sha\" wasn't supplied.")
+            if body["sha"] != existing["sha"]:
+                raise GitHubError(409, f"{path} does not match {body['sha']}")
+        elif body.get("sha"):
+            raise GitHubError(404, "Not Found")
+        sha = repo.commit_files(branch, {path: base64.b64decode(body.get("content", ""))}, body.get("message", ""))
+        entry = repo.lookup(repo.commits[sha]["tree"], path)
+        return (200 if existing else 201), {
+            "content": self._content_json(repo, path, entry, branch, with_content=False),
+            "commit": self._commit_json(repo, sha),
+        }
+
+    def _delete_contents(self, match, query, body):
+        repo = self._repo(match)
+        branch = body.get("branch") or repo.default_branch
+        path = match["path"].strip("/")
+        existing = repo.lookup(repo.commits[repo.resolve(branch)]["tree"], path)
+        if existing is None:
+            raise GitHubError(404, "Not Found")
+        if body.get("sha") != existing["sha"]:
+            raise GitHubError(409, f"{path} does not match {body.get('sha')}")
+        sha = repo.commit_files(branch, {path: None}, body.get("message", ""))
+        return 200, {"content": None, "commit": self._commit_json(repo, sha)}
+
+    def _get_ref(self, match, query, body):
+        repo = self._repo(match)
+        ref = match["ref"].replace("refs/", "", 1)
+        if ref not in repo.refs:
+            raise GitHubError(404, "Not Found")
+        return 200, self._ref_json(repo, ref)
+
+    def _create_ref(self, match, query, body):
+        repo = self._repo(match)
+        ref = body.get("ref", "").replace("refs/", "", 1)
+        if not ref.startswith("heads/"):
+            raise GitHubError(422, "Reference name must start with refs/heads/")
+        if ref in repo.refs:
+            raise GitHubError(422, "Reference already exists")
+        if body.get("sha") not in repo.commits:
+            raise GitHubError(422, "Object does not exist")
+        repo.refs[ref] = body["sha"]
+        return 201, self._ref_json(repo, ref)
+
+    def _update_ref(self, match, query, body):
+        repo = self._repo(match)
+        ref = match["ref"].replace("refs/", "", 1)
+        if ref not in repo.refs:
+            raise GitHubError(422, "Reference does not exist")
+        sha = body.get("sha")
+        if sha not in repo.commits:
+            raise GitHubError(422, "Object does not exist")
+        if not body.get("force") and not repo.is_ancestor(repo.refs[ref], sha):
+            raise GitHubError(422, "Update is not a fast forward")
+        repo.refs[ref] = sha
+        return 200, self._ref_json(repo, ref)
+
+    def _matching_refs(self, match, query, body):
+        repo = self._repo(match)
+        prefix = match["ref"].replace("refs/", "", 1)
+        return 200, [self._ref_json(repo, ref) for ref in sorted(repo.refs) if ref.startswith(prefix)]
+
+    def _delete_ref(self, match, query, body):
+        repo = self._repo(match)
+        ref = match["ref"].replace("refs/", "", 1)
+        if repo.refs.pop(ref, None) is None:
+            raise GitHubError(422, "Reference does not exist")
+        return 204, None
+
+    def _get_commit(self, match, query, body):
+        repo = self._repo(match)
+        if match["sha"] not in repo.commits:
+            raise GitHubError(404, "Not Found")
+        return 200, self._commit_json(repo, match["sha"])
+
+    def _create_commit(self, match, query, body):
+        repo = self._repo(match)
+        if body.get("tree") not in repo.trees:
+            raise GitHubError(422, "Tree SHA does not exist")
+        parents = body.get("parents", [])
+        if any(p not in repo.commits for p in parents):
+            raise GitHubError(422, "Parent SHA does not exist or is not a commit object")
+        sha = repo.write_commit(body["tree"], parents, body.get("message", ""))
+        return 201, self._commit_json(repo, sha)
+
+    def _get_tree(self, match, query, body):
+        repo = self._repo(match)
+        try:
+            sha = repo.tree_of(match["sha"])
+        except GitHubError:
+            raise GitHubError(404, "Not Found")
+        return 200, self._tree_json(repo, sha, recursive=query.get("recursive") not in (None, "", "0", "false"))
+
+    def _create_tree(self, match, query, body):
+        repo = self._repo(match)
+        base = body.get("base_tree")
+        if base and base not in repo.trees:
+            raise GitHubError(422, "base_tree is not a valid tree oid")
+        files = repo.flatten(base) if base else {}
+        for element in body.get("tree", []):
+            path = element["path"].strip("/")
+            if "content" in element and element["content"] is not None:
+                files[path] = (element.get("mode", FILE_MODE), repo.put_blob(element["content"].encode("utf-8")))
+            elif element.get("sha") is None:
+                for existing in [p for p in files if p == path or p.startswith(path + "/")]:
+                    files.pop(existing)
+            elif element.get("type") == "tree":
+                if element["sha"] not in repo.trees:
+                    raise GitHubError(422, f"Tree {element['sha']} does not exist")
+                for existing in [p for p in files if p == path or p.startswith(path + "/")]:
+                    files.pop(existing)
+                files.update({f"{path}/{p}": v for p, v in repo.flatten(element["sha"]).items()})
+            else:
+                if element["sha"] not in repo.blobs:
+                    raise GitHubError(422, f"Blob {element['sha']} does not exist")
+                files[path] = (element.get("mode", FILE_MODE), element["sha"])
+        sha = repo.write_tree(files)
+        return 201, self._tree_json(repo, sha, recursive=False)
+
+    def _get_blob(self, match, query, body):
+        repo = self._repo(match)
+        data = repo.blobs.get(match["sha"])
+        if data is None:
+            raise GitHubError(404, "Not Found")
+        return 200, {"sha": match["sha"], "size": len(data), "encoding": "base64",
+                     "content": base64.b64encode(data).decode(), "url": f"{repo.url}/git/blobs/{match['sha']}"}
+
+    def _create_blob(self, match, query, body):
+        repo = self._repo(match)
+        content = body.get("content", "")
+        data = base64.b64decode(content) if body.get("encoding") == "base64" else content.encode("utf-8")
+        sha = repo.put_blob(data)
+        return 201, {"sha": sha, "url": f"{repo.url}/git/blobs/{sha}"}
+
+    def _file_diff(self, repo: FakeRepo, path: str, before: Optional[Tuple[str, str]], after: Optional[Tuple[str, str]]) -> dict:
+        status = "added" if before is None else "removed" if after is None else "modified"
+        old = repo.blobs[before[1]] if before else b""
+        new = repo.blobs[after[1]] if after else b""
+        entry = {"sha": (after or before)[1], "filename": path, "status": status,
+                 "additions": 0, "deletions": 0, "changes": 0}
+        try:
+            old_lines, new_lines = old.decode("utf-8").splitlines(), new.decode("utf-8").splitlines()
+        except UnicodeDecodeError:
+            return entry  # binary: no patch, like GitHub
+        patch = list(difflib.unified_diff(old_lines, new_lines, lineterm="", n=3))[2:]
+        entry["additions"] = sum(1 for line in patch if line.startswith("+"))
+        entry["deletions"] = sum(1 for line in patch if line.startswith("-"))
+        entry["changes"] = entry["additions"] + entry["deletions"]
+        entry["patch"] = "\n".join(patch)
+        return entry
+
+    def _compare(self, match, query, body):
+        """`base...head`: commits on head since the merge base, and the files changed between the two."""
+        repo = self._repo(match)
+        base, head = repo.resolve(match["base"]), repo.resolve(match["head"])
+        base_history = repo.ancestry(base)
+        head_history = repo.ancestry(head)
+        reachable = set(base_history)
+        merge_base = next((sha for sha in head_history if sha in reachable), None)
+        ahead = [sha for sha in head_history if sha not in reachable]
+        behind = [sha for sha in base_history if sha not in set(head_history)]
+        ahead.sort(key=lambda sha: repo.commits[sha]["time"])
+        status = ("identical" if not ahead and not behind else "ahead" if not behind
+                  else "behind" if not ahead else "diverged")
+        before = repo.flatten(repo.tree_of(merge_base)) if merge_base else {}
+        after = repo.flatten(repo.tree_of(head))
+        files = [
+            self._file_diff(repo, path, before.get(path), after.get(path))
+            for path in sorted(set(before) | set(after)) if before.get(path) != after.get(path)
+        ]
+
+        def commit_entry(sha):
+            git_commit = self._commit_json(repo, sha)
+            return {"sha": sha, "url": f"{repo.url}/commits/{sha}", "commit": git_commit,
+                    "parents": git_commit["parents"]}
+
+        return 200, {
+            "url": f"{repo.url}/compare/{match['base']}...{match['head']}",
+            "status": status,
+            "ahead_by": len(ahead),
+            "behind_by": len(behind),
+            "total_commits": len(ahead),
+            "base_commit": commit_entry(base),
+            "merge_base_commit": commit_entry(merge_base) if merge_base else None,
+            "commits": [commit_entry(sha) for sha in ahead[:250]],
+            "files": files[:300],
+        }
+
+    def _get_repo_commit(self, match, query, body):
+        """A commit with its changed files against its first parent, like `GET /repos/{repo}/commits/{ref}`."""
+        repo = self._repo(match)
+        sha = repo.resolve(match["sha"])
+        git_commit = self._commit_json(repo, sha)
+        parents = repo.commits[sha]["parents"]
+        before = repo.flatten(repo.tree_of(parents[0])) if parents else {}
+        after = repo.flatten(repo.tree_of(sha))
+        files = [
+            self._file_diff(repo, path, before.get(path), after.get(path))
+            for path in sorted(set(before) | set(after)) if before.get(path) != after.get(path)
+        ]
+        return 200, {"sha": sha, "url": f"{repo.url}/commits/{sha}", "commit": git_commit,
+                     "parents": git_commit["parents"], "files": files}
+
+    def _branch_json(self, repo: FakeRepo, name: str) -> dict:
+        sha = repo.refs[f"heads/{name}"]
+        return {"name": name, "protected": False,
+                "commit": {**self._commit_json(repo, sha), "commit": self._commit_json(repo, sha)}}
+
+    def _list_branches(self, match, query, body):
+        repo = self._repo(match)
+        return 200, [self._branch_json(repo, ref[len("heads/"):]) for ref in sorted(repo.refs) if ref.startswith("heads/")]
+
+    def _get_branch(self, match, query, body):
+        repo = self._repo(match)
+        if f"heads/{match['branch']}" not in repo.refs:
+            raise GitHubError(404, "Branch not found")
+        return 200, self._branch_json(repo, match["branch"])
+
+
+class FakeResponse:
+    """The slice of requests.Response that PyGithub's RequestsResponse reads."""
+
+    def __init__(self, status: int, headers: Dict[str, str], text: str):
+        self.status_code = status
+        self.headers = headers
+        self.text = text
+        self.content = text.encode()
+
+    def iter_content(self, chunk_size=1):
+        yield self.content
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+# ---- OpenAI ----
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str):
+        self.message = _Message(content)
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = prompt_tokens + completion_tokens
+
+
+class _Completions:
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+
+    def create(self, model: str = "", messages=None, **kwargs):
+        time.sleep(self.latency_ms / 1000)
+        prompt = " ".join(str(m.get("content", "")) for m in messages or [])
+        if "Respond ONLY with a YAML object" in prompt:
+            content = "description: Benchmark file\ntags: [bench]\npod_owner: DevPod"
+        else:
+            content = "Benchmark summary."
+        response = type("ChatCompletion", (), {})()
+        response.choices = [_Choice(content)]
+        response.usage = _Usage(len(prompt) // 4, len(content) // 4)
+        return response
+
+
+class FakeOpenAI:
+    """Stands in for `OpenAI()`: chat completions answer after `latency_ms` with canned text."""
+
+    def __init__(self, latency_ms: float = 0):
+        self.chat = type("Chat", (), {})()
+        self.chat.completions = _Completions(latency_ms)
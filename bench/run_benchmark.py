@@ -0,0 +1,216 @@
+# bench/run_benchmark.py
+"""
+Drive main.py through pod workloads against the offline GitHub stand-in and report latency and
+GitHub calls per operation.
+
+    python -m bench.run_benchmark --pods 4 --cot-appends 5 --latency-ms 50
+    python -m bench.run_benchmark --json > bench_output.json
+
+Each pod runs start → N chain-of-thought appends → complete (with reasoning trace and handoff)
+→ handoff fetch on its own task; pods run concurrently. Operations are timed end to end through
+the ASGI app (including PyGithub's own spacing between requests), and GitHub calls per request
+come from the `X-Request-Cost` header. Failed requests are counted and listed, not retried, so
+write conflicts between concurrent pods show up in the report.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.fake_github import FakeGitHub, FakeOpenAI  # noqa: E402
+
+OWNER = "stewmckendry"
+PROJECT = "bench-project"
+BRANCH = "main"
+
+
+def seed_files(tasks: int) -> Dict[str, bytes]:
+    """A project with `tasks` planned, independent tasks spread across four pods."""
+    import yaml
+
+    pods = ["DevPod", "QAPod", "ResearchPod", "DeliveryPod"]
+    task_data = {"tasks": {
+        f"1.{i}_bench_task": {
+            "description": f"Benchmark task {i}",
+            "phase": "Phase 1",
+            "category": "bench",
+            "pod_owner": pods[i % len(pods)],
+            "status": "planned",
+            "done": False,
+            "depends_on": [],
+            "inputs": [],
+            "outputs": [],
+            "ready": True,
+            "created_at": "2025-01-01T00:00:00",
+            "updated_at": "2025-01-01T00:00:00",
+        }
+        for i in range(tasks)
+    }}
+    return {
+        "project/task.yaml": yaml.dump(task_data, sort_keys=False).encode(),
+        "project/memory.yaml": b"[]\n",
+        "project/outputs/changelog.yaml": b"[]\n",
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = int(rank), min(int(rank) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[dict]] = {}
+        self.failures: List[str] = []
+        self._lock = threading.Lock()
+
+    def call(self, client, operation: str, path: str, payload: dict) -> dict:
+        started = time.perf_counter()
+        response = client.post(path, json=payload)
+        elapsed = time.perf_counter() - started
+        cost = dict(
+            part.strip().split("=", 1) for part in response.headers.get("x-request-cost", "").split(",") if "=" in part
+        )
+        with self._lock:
+            self.samples.setdefault(operation, []).append({
+                "seconds": elapsed,
+                "github_calls": int(cost.get("github.calls", 0)),
+                "status": response.status_code,
+            })
+            if response.status_code >= 400:
+                self.failures.append(f"{operation} {payload.get('task_id')}: {response.status_code} {response.text[:300]}")
+        return response.json()
+
+    def report(self) -> dict:
+        rows = {}
+        for operation, samples in self.samples.items():
+            latencies = [s["seconds"] * 1000 for s in samples]
+            calls = [s["github_calls"] for s in samples]
+            rows[operation] = {
+                "count": len(samples),
+                "p50_ms": round(percentile(latencies, 50), 1),
+                "p95_ms": round(percentile(latencies, 95), 1),
+                "mean_github_calls": round(statistics.mean(calls), 1),
+                "max_github_calls": max(calls),
+                "errors": sum(1 for s in samples if s["status"] >= 400),
+            }
+        return rows
+
+
+def pod_workload(client, recorder: Recorder, task_id: str, pod: str, cot_appends: int):
+    base = {"repo_name": PROJECT, "branch": BRANCH}
+    recorder.call(client, "start", "/tasks/lifecycle",
+                  {**base, "action": "start", "task_id": task_id, "pod_owner": pod, "prompt_used": "Benchmark prompt"})
+    for i in range(cot_appends):
+        recorder.call(client, "cot_append", "/tasks/chain_of_thought",
+                      {**base, "action": "append", "task_id": task_id, "message": f"Thought {i} about {task_id}"})
+    recorder.call(client, "complete", "/tasks/lifecycle", {
+        **base,
+        "action": "complete",
+        "task_id": task_id,
+        "outputs": [],
+        "reasoning_trace": {
+            "summary": f"Completed {task_id}",
+            "scoring": {"thought_quality": 4, "recall_used": True, "novel_insight": False},
+            "improvement_opportunities": ["Cache more"],
+        },
+        "handoff_note": {"reason": "Benchmark handoff", "notes": "Done", "next_prompt": "Continue"},
+    })
+    recorder.call(client, "handoff_fetch", "/tasks/handoff", {**base, "action": "fetch", "task_id": task_id})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pods", type=int, default=4, help="concurrent pods, one task each")
+    parser.add_argument("--rounds", type=int, default=2, help="tasks each pod works through")
+    parser.add_argument("--tasks", type=int, default=200, help="tasks seeded into task.yaml")
+    parser.add_argument("--cot-appends", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0, help="added to every GitHub call")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--openai-latency-ms", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="ai-delivery-bench-")
+    os.environ.update({
+        "GITHUB_TOKEN": "bench-token",
+        "OPENAI_API_KEY": "sk-bench",
+        "TRACE_WAREHOUSE_PATH": os.path.join(workdir, "traces.sqlite"),
+        "METRICS_HISTORY_PATH": os.path.join(workdir, "history.sqlite"),
+        "TRACE_EXPORT_PATH": os.path.join(workdir, "spans.jsonl"),
+    })
+
+    fake = FakeGitHub(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit=args.rate_limit)
+    fake.create_repo(f"{OWNER}/ai-delivery-framework", {"README.md": b"framework\n"})
+    files = seed_files(max(args.tasks, args.pods * args.rounds))
+    fake.create_repo(f"{OWNER}/{PROJECT}", files)
+    fake.install()
+
+    import main as service
+    from fastapi.testclient import TestClient
+    from utils.instrumentation import instrument_openai
+
+    service.openai = instrument_openai(FakeOpenAI(args.openai_latency_ms))
+    client = TestClient(service.app)
+    recorder = Recorder()
+
+    task_ids = list(service.yaml_load(files["project/task.yaml"])["tasks"])
+    pods = ["DevPod", "QAPod", "ResearchPod", "DeliveryPod"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.pods) as pool:
+        futures = [
+            pool.submit(
+                lambda p: [
+                    pod_workload(client, recorder, task_ids[r * args.pods + p], pods[p % len(pods)], args.cot_appends)
+                    for r in range(args.rounds)
+                ],
+                p,
+            )
+            for p in range(args.pods)
+        ]
+        errors = [str(f.exception()) for f in futures if f.exception()]
+    wall = time.perf_counter() - started
+
+    report = {
+        "config": vars(args),
+        "wall_seconds": round(wall, 2),
+        "github_calls": fake.calls,
+        "github_calls_by_operation": dict(sorted(fake.calls_by_operation.items(), key=lambda kv: -kv[1])),
+        "rate_limit_remaining": int(fake.rate_headers()["x-ratelimit-remaining"]),
+        "operations": recorder.report(),
+        "errors": recorder.failures + errors,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'operation':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'gh calls':>10}{'max':>6}{'errors':>8}")
+        for operation, row in report["operations"].items():
+            print(f"{operation:<16}{row['count']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+                  f"{row['mean_github_calls']:>10}{row['max_github_calls']:>6}{row['errors']:>8}")
+        print(f"\nwall {report['wall_seconds']}s, {report['github_calls']} GitHub calls, "
+              f"{report['rate_limit_remaining']} rate limit remaining")
+        for operation, count in list(report["github_calls_by_operation"].items())[:10]:
+            print(f"  {operation:<24}{count:>6}")
+        for error in report["errors"]:
+            print(f"error: {error}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
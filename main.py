@@ -5,11 +5,10 @@ from fastapi import FastAPI, HTTPException, Request, Body, Query, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.openapi.utils import get_openapi
-from fastapi import BackgroundTasks
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Union
+from typing import Any, Callable, Iterator, List, Dict, Optional, Union
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 from copy import deepcopy
 import httpx
 import os
@@ -28,15 +27,48 @@ import io
 import uuid
 import csv
 import base64
-import random
 import string
-from github import Github, GithubException
+import hashlib
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from github import Github, GithubException, InputGitTreeElement
 from openai import OpenAI
 from dotenv import load_dotenv
 from utils.github_retry import with_retries
+from utils.task_index import EDGE_TYPES, TaskIndex, get_task_index
+from utils.segmented_log import (
+    SEGMENT_SIZE, segment_number, encode_entries, decode_entries, plan_writes,
+    cached_segment, remember_segment, get_tail, set_tail, forget_tail
+)
+from utils.trace_warehouse import EXPORT_FIELDS, SUMMARY_FIELDS, export_record, get_trace_warehouse, trace_task_id
+from utils.task_snapshot import dump_snapshot, load_snapshot, cached_task_data, remember_snapshot
+from utils.yaml_io import yaml_load, yaml_dump, yaml_load_untagged
+from utils.reasoning_summary import fingerprint, summarize_project
+from utils.metrics_history import burndown, get_metrics_history, velocity
+from utils.jobs import FINAL_STATES, Job, JobCancelled, JobManager
+from utils.branch_pool import SANDBOX_PREFIX, get_branch_pool, sandbox_branch_name
+from utils.sandbox_usage import branch_usage, extend_usage, get_sandbox_usage_cache, plan_gc, usage_record
+from utils.commit_diff import (
+    COMMIT_FILES_LIMIT, COMPARE_FILES_LIMIT, cached_diff, diff_entry, is_full_sha, remember_diff, rollback_targets, summarize_diff
+)
+from utils.issue_dedup import issue_signature
+from utils.issue_index import IssueIndex, fold_rows, get_issue_index, index_row, issue_index_dir, issue_record_path, legacy_entries, legacy_issues_path
+from utils.framework_snapshot import FrameworkSnapshot, get_framework_snapshot, set_framework_snapshot
+from utils.metrics_aggregates import TaskAggregates, get_task_aggregates, set_task_aggregates
+from utils.instrumentation import (
+    CACHE_LOOKUPS, CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware,
+    install_github_instrumentation, instrument_openai, render_metrics
+)
+from utils.tracing import JsonlSpanExporter, TracingMiddleware, bind_trace, traced
+from utils.task_scheduler import ReadyQueue, get_ready_queue, set_ready_queue, invalidate_ready_queue
 import logging
 from time import sleep
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
 logger = logging.getLogger(__name__)
 
 # ---- (2) Global Variables ----
@@ -50,13 +82,51 @@ GITHUB_BRANCH = "main"
 PROMPT_DIR = "prompts/used"
 MEMORY_FILE_PATH = "project/memory.yaml"
 TASK_FILE_PATH = "project/task.yaml"
+TASK_SNAPSHOT_PATH = "project/task.snapshot.json"
+# Append-only task logs: JSONL segments under project/outputs/{task_id}/{name}/,
+# read after the entries of the legacy YAML file they replaced.
+TASK_LOGS = {
+    "chain_of_thought": {"legacy_file": "chain_of_thought.yaml", "legacy_key": None},
+    "handoff_notes": {"legacy_file": "handoff_notes.yaml", "legacy_key": "handoffs"},
+}
 REASONING_FOLDER_PATH = "project/outputs/"
-
+SCHEDULER_MAX_AGE_SECONDS = int(os.getenv("SCHEDULER_MAX_AGE_SECONDS", "300"))
+METRICS_MAX_AGE_SECONDS = int(os.getenv("METRICS_MAX_AGE_SECONDS", "60"))
+TASK_CLAIM_TTL_SECONDS = int(os.getenv("TASK_CLAIM_TTL_SECONDS", "900"))
+TASK_CLAIM_MAX_TTL_SECONDS = int(os.getenv("TASK_CLAIM_MAX_TTL_SECONDS", "86400"))
+CHANGELOG_PATH = "project/outputs/changelog.yaml"
+MAX_BATCH_OPERATIONS = 100
+BATCH_ACTIONS = ("activate", "start", "complete", "reopen", "create", "clone")
+COMMIT_RETRIES = 5
+MAX_LIST_LIMIT = 500
+TRACE_WAREHOUSE_PATH = os.getenv("TRACE_WAREHOUSE_PATH", os.path.join(tempfile.gettempdir(), "ai_delivery_trace_warehouse.sqlite"))
+TRACE_SYNC_MAX_AGE_SECONDS = int(os.getenv("TRACE_SYNC_MAX_AGE_SECONDS", "60"))
+METRICS_HISTORY_PATH = os.getenv("METRICS_HISTORY_PATH", os.path.join(tempfile.gettempdir(), "ai_delivery_metrics_history.sqlite"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", os.path.join(tempfile.gettempdir(), "ai_delivery_spans.jsonl"))
+HISTORY_STEPS = {"hour": 3600, "day": 24 * 3600, "week": 7 * 24 * 3600}
+GITHUB_FETCH_WORKERS = 8
+FRAMEWORK_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("FRAMEWORK_SNAPSHOT_MAX_AGE_SECONDS", "300"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+SANDBOX_BASE_BRANCH = "main"
+SANDBOX_POOL_SIZE = int(os.getenv("SANDBOX_POOL_SIZE", "10"))
+SANDBOX_GC_IDLE_DAYS = float(os.getenv("SANDBOX_GC_IDLE_DAYS", "30"))
+SANDBOX_GC_MAX_SANDBOXES = int(os.getenv("SANDBOX_GC_MAX_SANDBOXES")) if os.getenv("SANDBOX_GC_MAX_SANDBOXES") else None
+SANDBOX_GC_MIN_IDLE_HOURS = float(os.getenv("SANDBOX_GC_MIN_IDLE_HOURS", "24"))
+SANDBOX_POOL_MAX_AGE_HOURS = float(os.getenv("SANDBOX_POOL_MAX_AGE_HOURS", "12"))  # older pooled branches get a fresh claim commit, well inside GC's idle limits
+SANDBOX_ARCHIVE_DIR = "project/outputs/sandbox_archive"
+ISSUE_DUPLICATE_THRESHOLD = float(os.getenv("ISSUE_DUPLICATE_THRESHOLD", "0.8"))
+ISSUE_POSSIBLE_DUPLICATE_THRESHOLD = float(os.getenv("ISSUE_POSSIBLE_DUPLICATE_THRESHOLD", "0.5"))
+ISSUE_DEDUPE_MODES = ("attach", "flag", "off")
+SANDBOX_POOL_REPOS = [name.strip() for name in os.getenv("SANDBOX_POOL_REPOS", "").split(",") if name.strip()]  # pre-warmed at startup
+JOB_STREAM_POLL_SECONDS = 0.5
+JOB_STREAM_KEEPALIVE_SECONDS = 15
+
+install_github_instrumentation()
 g = Github(GITHUB_TOKEN)
 repo = g.get_repo(GITHUB_OWNER + "/" + GITHUB_REPO)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai = OpenAI(api_key=OPENAI_API_KEY)
+openai = instrument_openai(OpenAI(api_key=OPENAI_API_KEY))
 
 app = FastAPI()
 
@@ -66,7 +136,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-Cost", "X-Trace-Id"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware, exporter=JsonlSpanExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None)
+
+JOBS = JobManager(max_workers=JOB_WORKERS)  # project bootstrap and memory indexing, off the request workers
 
 # ---- (3) Classes ----
 class TaskUpdateRequest(BaseModel):
@@ -123,7 +198,7 @@ def fetch_task_yaml_from_github(repo_name: str, branch: str):
         repo = get_repo(repo_name)
         file = repo.get_contents("task.yaml", ref=branch)
         decoded = base64.b64decode(file.content).decode("utf-8")
-        return yaml.safe_load(decoded)
+        return yaml_load(decoded)
     except GithubException as e:
         raise HTTPException(status_code=404, detail=f"Failed to fetch task.yaml: {str(e)}")
 
@@ -131,8 +206,10 @@ def fetch_yaml_from_github(repo_name: str, path: str, branch: str):
     """Fetch a YAML file from the GitHub repo."""
     try:
         repo = get_repo(repo_name)
+        if path == TASK_FILE_PATH:
+            return load_task_data(repo, branch)
         file = repo.get_contents(path, ref=branch)
-        return yaml.safe_load(file.decoded_content)
+        return yaml_load(file.decoded_content)
     except Exception as e:
         print(f"Error fetching YAML from {path}: {e}")
         return {}
@@ -192,15 +269,186 @@ def get_next_base_id(tasks, phase):
 
     return f"{next_num:.1f}"
 
+@traced()
 def get_pod_owner(repo, task_id: str, fallback: str = "unknown", branch: str = "unknown") -> str:
     """Fetch pod_owner from task.yaml in the GitHub repo."""
     try:
-        task_file = repo.get_contents("project/task.yaml", ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
-        return task_data.get("tasks", {}).get(task_id, {}).get("pod_owner", fallback)
+        return load_task_index(repo, branch).tasks.get(task_id, {}).get("pod_owner", fallback)
     except Exception:
         return fallback
 
+def task_file_shas(repo, branch: str) -> Dict[str, str]:
+    """Blob shas of task.yaml and its snapshot from one listing of project/, without downloading either file."""
+    listing = repo.get_contents("project", ref=branch)
+    return {entry.path: entry.sha for entry in listing if entry.path in (TASK_FILE_PATH, TASK_SNAPSHOT_PATH)}
+
+@traced()
+def load_task_data(repo, branch: str, task_file=None, shas: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Parsed task.yaml for `branch`, cheapest source first: the in-process snapshot for the
+    current blob sha, then the committed JSON snapshot if its source_sha still matches,
+    then task.yaml itself through the C YAML loader. Returns a fresh dict callers may mutate.
+    """
+    key = task_cache_key(repo, branch)
+    if task_file is None and shas is None:
+        shas = task_file_shas(repo, branch)
+    sha = task_file.sha if task_file is not None else shas.get(TASK_FILE_PATH)
+
+    data = cached_task_data(key, sha)
+    if data is not None:
+        CACHE_LOOKUPS.inc(cache="task_data", result="hit")
+        return data
+
+    if task_file is None and sha and shas.get(TASK_SNAPSHOT_PATH):
+        try:
+            raw = repo.get_contents(TASK_SNAPSHOT_PATH, ref=branch).decoded_content.decode("utf-8")
+            data = load_snapshot(raw, sha)
+            if data is not None:
+                remember_snapshot(key, sha, raw)
+                CACHE_LOOKUPS.inc(cache="task_data", result="snapshot")
+                return data
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable task snapshot on {branch}: {e}")
+
+    if task_file is None:
+        task_file = repo.get_contents(TASK_FILE_PATH, ref=branch)
+    data = yaml_load(task_file.decoded_content) or {}
+    remember_snapshot(key, task_file.sha, dump_snapshot(data, task_file.sha))
+    CACHE_LOOKUPS.inc(cache="task_data", result="miss")
+    return data
+
+def store_task_snapshot(repo, branch: str, task_yaml: str, source_sha: str) -> str:
+    """Cache the snapshot for a freshly written task.yaml, fold it into warm metrics, and return its serialized form."""
+    data = yaml_load(task_yaml) or {}
+    raw = dump_snapshot(data, source_sha)
+    remember_snapshot(task_cache_key(repo, branch), source_sha, raw)
+    aggregates = get_task_aggregates(task_cache_key(repo, branch))
+    if aggregates is not None:
+        aggregates.apply_tasks(data.get("tasks", {}), source_sha)
+    return raw
+
+@traced()
+def load_task_index(repo, branch: str, task_file=None) -> TaskIndex:
+    """Return the dependency index for the task.yaml version on `branch`, rebuilt only when its blob sha changes."""
+    shas = None
+    if task_file is None:
+        shas = task_file_shas(repo, branch)
+        if TASK_FILE_PATH not in shas:
+            task_file = repo.get_contents(TASK_FILE_PATH, ref=branch)
+    version = task_file.sha if task_file is not None else shas[TASK_FILE_PATH]
+    return get_task_index(
+        task_cache_key(repo, branch),
+        version,
+        lambda: load_task_data(repo, branch, task_file=task_file, shas=shas).get("tasks", {})
+    )
+
+def task_cache_key(repo, branch: str) -> str:
+    return f"{repo.full_name}@{branch}"
+
+def load_ready_queue(repo, branch: str, refresh: bool = False) -> ReadyQueue:
+    """
+    Return the ready-task scheduler for `branch`. A warm queue is served without touching
+    task.yaml; after SCHEDULER_MAX_AGE_SECONDS (or on `refresh`) its version is re-checked
+    against the task.yaml blob sha and the queue is rebuilt only if the file changed.
+    """
+    key = task_cache_key(repo, branch)
+    queue = get_ready_queue(key)
+    if queue and not refresh and time.time() - queue.checked_at < SCHEDULER_MAX_AGE_SECONDS:
+        CACHE_LOOKUPS.inc(cache="ready_queue", result="hit")
+        return queue
+
+    index = load_task_index(repo, branch)
+    if queue and queue.version == index.version:
+        queue.checked_at = time.time()
+        CACHE_LOOKUPS.inc(cache="ready_queue", result="revalidated")
+        return queue
+    CACHE_LOOKUPS.inc(cache="ready_queue", result="miss")
+    return set_ready_queue(key, ReadyQueue(index))
+
+def sync_ready_queue(repo, branch: str, base_sha: str, new_sha: Optional[str], apply):
+    """Apply an incremental update to a warm queue that reflected `base_sha`; otherwise force a rebuild."""
+    key = task_cache_key(repo, branch)
+    queue = get_ready_queue(key)
+    if not queue:
+        return
+    with queue.lock:
+        if queue.version != base_sha or not new_sha:
+            invalidate_ready_queue(key)
+            return
+        apply(queue)
+        queue.version = new_sha
+
+def parse_edge_types(edge_types: Optional[Union[str, List[str]]]) -> tuple:
+    """Validate the optional `edge_types` filter used by graph queries."""
+    if not edge_types:
+        return EDGE_TYPES
+    if isinstance(edge_types, str):
+        edge_types = [edge_types]
+    unknown = [e for e in edge_types if e not in EDGE_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported edge_types {unknown}. Use any of {list(EDGE_TYPES)}")
+    return tuple(edge_types)
+
+def as_value_list(value: Optional[Union[str, List[str]]]) -> List[str]:
+    """Accept a single value, a comma-separated string or a list for list-style filters."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return [str(v) for v in value]
+
+def encode_cursor(offset: int, version: str) -> str:
+    raw = json.dumps({"offset": offset, "version": version}).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: Optional[str]) -> dict:
+    if not cursor:
+        return {"offset": 0, "version": None}
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return {"offset": max(int(data["offset"]), 0), "version": data.get("version")}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate_ids(task_ids: List[str], limit: Optional[int], cursor: Optional[str], version: str) -> dict:
+    """
+    Slice an ordered list of task IDs. Cursors carry the task.yaml version they were issued for;
+    a cursor from an older version still pages by position but is reported as `cursor_stale`.
+    """
+    position = decode_cursor(cursor)
+    offset = position["offset"]
+    if limit is None:
+        page = task_ids[offset:]
+    else:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="'limit' must be an integer")
+        if limit < 1 or limit > MAX_LIST_LIMIT:
+            raise HTTPException(status_code=400, detail=f"'limit' must be between 1 and {MAX_LIST_LIMIT}")
+        page = task_ids[offset:offset + limit]
+    end = offset + len(page)
+    return {
+        "page": page,
+        "total": len(task_ids),
+        "next_cursor": encode_cursor(end, version) if end < len(task_ids) else None,
+        "cursor_stale": bool(position["version"] and position["version"] != version)
+    }
+
+def clamped_int(payload: dict, name: str, default: int, maximum: int) -> int:
+    """`payload[name]` (or `default`) clamped to 1..`maximum`; 400 if it is not an integer."""
+    try:
+        value = int(payload.get(name, default) or default)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"'{name}' must be an integer")
+    return min(max(value, 1), maximum)
+
+def project_task(task: dict, fields: List[str]) -> dict:
+    if not fields:
+        return task
+    return {f: task.get(f) for f in fields if f in task}
+
+@traced()
 def describe_file_for_memory(path, content):
     try:
         prompt = f"""
@@ -230,7 +478,7 @@ File content:
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3
         )
-        parsed = yaml.safe_load(response.choices[0].message.content)
+        parsed = yaml_load(response.choices[0].message.content)
         return {
             "description": parsed.get("description", f"Generated summary for {path}"),
             "tags": parsed.get("tags", ["auto"]),
@@ -243,97 +491,60 @@ File content:
             "pod_owner": ""
         }
 
-def generate_metrics_summary(repo_name: str = "nhl-predictor", branch: str = "unknown"):
-    task_data = fetch_yaml_from_github(repo_name, TASK_FILE_PATH, branch)
-    tasks = task_data.get("tasks", {})
-    total_tasks = len(tasks)
-    completed_tasks = sum(1 for t in tasks.values() if t.get("done", False))
-
-    # Cycle time
-    cycle_times = []
-    for t in tasks.values():
-        if t.get("done") and t.get("created_at") and t.get("updated_at"):
-            created = datetime.fromisoformat(t["created_at"])
-            updated = datetime.fromisoformat(t["updated_at"])
-            cycle_times.append((updated - created).total_seconds() / (3600 * 24))
-
-    avg_cycle_time = sum(cycle_times) / len(cycle_times) if cycle_times else None
-
-    # Reasoning traces from YAML
-    scores = []
-    recalls = 0
-    novelties = 0
-    total_logs = 0
-
-    trace_paths = list_files_from_github(repo_name, REASONING_FOLDER_PATH, recursive=True, branch=branch)
-    for path in trace_paths:
-        if path.endswith("reasoning_trace.yaml"):
-            try:
-                trace = fetch_yaml_from_github(repo_name, path, branch)
-                
-                score = trace.get("scoring", {}).get("thought_quality")
-                if score is not None:
-                    scores.append(score)
-                if trace.get("scoring", {}).get("recall_used"):
-                    recalls += 1
-                if trace.get("scoring", {}).get("novel_insight"):
-                    novelties += 1
-                total_logs += 1
-            except Exception:
-                continue
+def load_task_aggregates(repo, branch: str, repair: bool = False) -> TaskAggregates:
+    """
+    Return the running delivery counters for `branch`. Task writes through this service keep them
+    current; after METRICS_MAX_AGE_SECONDS the task.yaml sha is re-checked and, if the file changed
+    elsewhere, only the differing tasks are re-applied. `repair` recomputes them from scratch.
+    """
+    key = task_cache_key(repo, branch)
+    aggregates = get_task_aggregates(key)
+    if aggregates is not None and not repair and time.time() - aggregates.checked_at < METRICS_MAX_AGE_SECONDS:
+        CACHE_LOOKUPS.inc(cache="metrics_aggregates", result="hit")
+        return aggregates
+
+    shas = task_file_shas(repo, branch)
+    if aggregates is not None and not repair and aggregates.version == shas.get(TASK_FILE_PATH):
+        aggregates.checked_at = time.time()
+        CACHE_LOOKUPS.inc(cache="metrics_aggregates", result="revalidated")
+        return aggregates
+
+    CACHE_LOOKUPS.inc(cache="metrics_aggregates", result="miss")
+    if aggregates is None or repair:
+        aggregates = set_task_aggregates(key, TaskAggregates())
+    aggregates.apply_tasks(load_task_data(repo, branch, shas=shas).get("tasks", {}), shas.get(TASK_FILE_PATH))
+    return aggregates
+
+def generate_metrics_summary(repo_name: str = "nhl-predictor", branch: str = "unknown", repair: bool = False):
+    """
+    Delivery and reasoning metrics assembled from running aggregates: task counters kept per
+    branch and trace totals kept by the warehouse. `repair` rebuilds both from the source files.
+    """
+    repo = get_repo(repo_name)
+    delivery = load_task_aggregates(repo, branch, repair=repair).summary()
+
+    warehouse = sync_trace_warehouse(repo, branch, force=repair)
+    if repair:
+        warehouse.rebuild_totals(repo.full_name, branch)
+    totals = warehouse.scoring_totals(repo.full_name, branch)
+    recalls = totals["recalls"]
+    novelties = totals["novelties"]
+    total_logs = totals["traces"]
 
     return {
         "timestamp": datetime.utcnow().isoformat(),
         "quantitative": {
-            "total_tasks": total_tasks,
-            "completed_tasks": completed_tasks,
-            "completion_rate_percent": (completed_tasks / total_tasks * 100) if total_tasks else 0,
-            "average_cycle_time_days": avg_cycle_time,
+            **delivery,
             "patch_success_rate_percent": None
         },
         "qualitative": {
-            "average_thought_quality_score": (sum(scores) / len(scores)) if scores else None,
+            "average_thought_quality_score": totals["avg_quality"],
             "recall_usage_percent": (recalls / total_logs * 100) if total_logs else 0,
             "novelty_rate_percent": (novelties / total_logs * 100) if total_logs else 0
         }
     }
 
-def generate_project_reasoning_summary(repo_name: str = "nhl-predictor", branch: str = "unknown"):
-    trace_paths = list_files_from_github(repo_name, REASONING_FOLDER_PATH, recursive=True, branch=branch)
-    all_thoughts = []  # Includes thoughts, alternatives, improvements
-
-    for path in trace_paths:
-        if path.endswith("reasoning_trace.yaml"):
-            try:
-                trace = fetch_yaml_from_github(repo_name, path, branch)
-                for t in trace.get("thoughts", []):
-                    all_thoughts.append(t.get("thought", ""))
-                all_thoughts.extend(trace.get("alternatives", []))
-                all_thoughts.extend(trace.get("improvement_opportunities", []))
-            except Exception:
-                continue
-
-    merged_thoughts = "\n".join(all_thoughts[:100])
-
-    if not merged_thoughts:
-        return "No reasoning available as no thoughts found."
-
-    prompt = f"""
-You are summarizing the collective reasoning across multiple AI tasks.
-
-Here are the collected reasoning thoughts:
-
-{merged_thoughts}
-
-Please summarize:
-- Main reasoning themes across tasks
-- Key insights discovered
-- Common patterns of memory reuse (recall)
-- Novel ideas that emerged
-- General quality of the AI reasoning
-
-Keep your summary under 250 words.
-"""
+def complete_reasoning_prompt(prompt: str) -> str:
     response = openai.chat.completions.create(
         model="gpt-3.5-turbo",
         messages=[{"role": "user", "content": prompt}],
@@ -341,10 +552,27 @@ Keep your summary under 250 words.
     )
     return response.choices[0].message.content.strip()
 
+@traced()
+def generate_project_reasoning_summary(repo_name: str = "nhl-predictor", branch: str = "unknown"):
+    """
+    LLM summary of all reasoning traces on `branch`, cached against a fingerprint of the traces'
+    blob shas: it is regenerated only when a trace is added, changed or removed.
+    """
+    repo = get_repo(repo_name)
+    warehouse = sync_trace_warehouse(repo, branch)
+    key = f"{repo.full_name}@{branch}:{fingerprint(warehouse.blob_shas(repo.full_name, branch).items())}"
+
+    summary = warehouse.cached_summary("project", key)
+    CACHE_LOOKUPS.inc(cache="reasoning_summary", result="miss" if summary is None else "hit")
+    if summary is None:
+        summary = summarize_project(warehouse.iter_trace_records(repo.full_name, branch), complete_reasoning_prompt, warehouse)
+        warehouse.remember_summary("project", key, summary)
+    return summary
+
 
 # --- Utility Functions for Project Initialization ---
 
-def run_project_initialization(project_name: str, repo_name: str, project_description: str, branch: str = "unknown"):
+def run_project_initialization(project_name: str, repo_name: str, project_description: str, branch: str = "unknown", job: Optional[Job] = None) -> dict:
     try:
         github_client = Github(GITHUB_TOKEN)
 
@@ -355,45 +583,124 @@ def run_project_initialization(project_name: str, repo_name: str, project_descri
         framework_dest_path = ""  # ⬅️ will stay clean
         project_base_path = "project"
 
-        # Validate framework exists
-        framework_repo.get_contents(framework_path)
-
-        # Copy framework files
-        copy_framework_baseline(framework_repo, project_repo, framework_path, framework_dest_path, destination_branch=branch)
+        # Framework files and starter project files land in a single commit
+        snapshot = load_framework_snapshot(framework_repo, framework_path, job=job)
+        starter_files = initial_project_files(project_base_path, project_name, project_description)
+        written = bootstrap_project(project_repo, branch, snapshot, framework_dest_path, starter_files, f"Initialize project {project_name}", job=job)
 
-        # Create initial project files
-        create_initial_files(project_repo, project_base_path, project_name, project_description, destination_branch=branch)
-
-        print(f"✅ Finished initializing project {project_name} into {repo_name}")
+        print(f"✅ Finished initializing project {project_name} into {repo_name} ({written} files, framework {snapshot.version[:7]})")
+        return {"files_written": written, "framework_version": snapshot.version}
 
     except Exception as e:
         print(f"❌ Exception inside run_project_initialization: {type(e).__name__}: {e}")
-
-
-def copy_framework_baseline(source_repo, destination_repo, source_path, dest_path, destination_branch):
-    """Recursively copy files and folders from the source repo to the destination repo."""
-    contents = source_repo.get_contents(source_path)
-    for item in contents:
-        if item.type == "dir":
-            # Recursively copy subfolders
-            new_dest_path = f"{dest_path}/{item.name}" if dest_path else item.name
-            copy_framework_baseline(source_repo, destination_repo, item.path, new_dest_path, destination_branch)
-        else:
-            file_content_bytes = source_repo.get_contents(item.path).decoded_content
-            try:
-                file_content = file_content_bytes.decode('utf-8')
-                destination_path = f"framework/{dest_path}/{item.name}" if dest_path else f"framework/{item.name}"
-                try:
-                    existing_file = destination_repo.get_contents(destination_path, ref=destination_branch)
-                    destination_repo.update_file(destination_path, f"Updated {item.name} from framework", file_content, existing_file.sha, branch=destination_branch)
-                except Exception:
-                    destination_repo.create_file(destination_path, f"Copied {item.name} from framework", file_content, branch=destination_branch)
-
-            except UnicodeDecodeError:
-                print(f"⚠️ Skipping binary file during copy: {item.path}")
-
-
-def create_initial_files(project_repo, project_base_path, project_name, project_description, destination_branch):
+        raise
+
+
+@traced()
+def load_framework_snapshot(source_repo, source_path: str, job: Optional[Job] = None) -> FrameworkSnapshot:
+    """
+    Current snapshot of `source_path` in the framework repo. Within FRAMEWORK_SNAPSHOT_MAX_AGE_SECONDS
+    nothing is fetched; otherwise one ref lookup, and if the head moved, one recursive tree listing
+    plus a blob read (in parallel) for each file whose content is not already held.
+    """
+    key = f"{source_repo.full_name}:{source_path}"
+    snapshot = get_framework_snapshot(key)
+    if snapshot and time.time() - snapshot.checked_at < FRAMEWORK_SNAPSHOT_MAX_AGE_SECONDS:
+        CACHE_LOOKUPS.inc(cache="framework_snapshot", result="hit")
+        return snapshot
+
+    head_sha = source_repo.get_git_ref(f"heads/{source_repo.default_branch}").object.sha
+    if snapshot and snapshot.head_sha == head_sha:
+        snapshot.checked_at = time.time()
+        CACHE_LOOKUPS.inc(cache="framework_snapshot", result="revalidated")
+        return snapshot
+
+    CACHE_LOOKUPS.inc(cache="framework_snapshot", result="miss")
+    tree = source_repo.get_git_tree(head_sha, recursive=True)
+    if tree.raw_data.get("truncated"):
+        logger.warning(f"Recursive tree for {source_repo.full_name} is truncated; some framework files will not be copied")
+    folder = source_path.strip("/")
+    tree_sha = next((e.sha for e in tree.tree if e.type == "tree" and e.path == folder), None)
+    files = {
+        e.path[len(folder) + 1:]: (e.sha, e.mode)
+        for e in tree.tree if e.type == "blob" and e.path.startswith(folder + "/")
+    }
+    if not files:
+        raise ValueError(f"No framework files found under {source_path} in {source_repo.full_name}")
+
+    snapshot = snapshot.successor(head_sha, tree_sha, files) if snapshot else FrameworkSnapshot(head_sha, tree_sha, files, {})
+    missing = snapshot.missing_blobs()
+    if job:
+        job.update(stage="framework_snapshot", blobs_total=len(missing), blobs_fetched=0)
+
+    def fetch(sha):
+        if job:
+            job.check_cancelled()
+        content = base64.b64decode(source_repo.get_git_blob(sha).content)
+        if job:
+            job.advance("blobs_fetched")
+        return sha, content
+
+    with ThreadPoolExecutor(max_workers=GITHUB_FETCH_WORKERS) as pool:
+        snapshot.contents.update(pool.map(bind_trace(fetch), missing))
+    return set_framework_snapshot(key, snapshot)
+
+
+@traced()
+def bootstrap_project(destination_repo, branch: str, snapshot: FrameworkSnapshot, dest_path: str, starter_files: Dict[str, str], commit_message: str, job: Optional[Job] = None) -> int:
+    """
+    Write the framework snapshot under `framework/<dest_path>` plus `starter_files` to `branch`
+    as one commit. Files already identical on the branch are left out, blobs the repo already
+    holds are referenced by sha, text goes inline in the tree and only new binary files are
+    uploaded as blobs. Starter files never overwrite existing project files. Returns the number
+    of files written (0 means no commit was needed).
+    """
+    ref = destination_repo.get_git_ref(f"heads/{branch}")
+    parent = destination_repo.get_git_commit(ref.object.sha)
+    existing = {e.path: e.sha for e in destination_repo.get_git_tree(parent.tree.sha, recursive=True).tree if e.type == "blob"}
+    present = set(existing.values())
+
+    dest_root = f"framework/{dest_path.strip('/')}/" if dest_path.strip("/") else "framework/"
+    elements, binaries = [], {}
+    for path, (sha, mode) in snapshot.files.items():
+        full_path = dest_root + path
+        if existing.get(full_path) == sha:
+            continue
+        if sha in present:
+            elements.append(InputGitTreeElement(full_path, mode, "blob", sha=sha))
+            continue
+        try:
+            elements.append(InputGitTreeElement(full_path, mode, "blob", content=snapshot.content(sha).decode("utf-8")))
+        except UnicodeDecodeError:
+            binaries[sha] = snapshot.content(sha)
+            elements.append(InputGitTreeElement(full_path, mode, "blob", sha=sha))
+    for path, content in starter_files.items():
+        if path not in existing:
+            elements.append(InputGitTreeElement(path, "100644", "blob", content=content))
+    if job:
+        job.update(stage="commit", files_total=len(elements), files_copied=0)
+    if not elements:
+        return 0
+
+    def upload(data):
+        if job:
+            job.check_cancelled()
+        destination_repo.create_git_blob(base64.b64encode(data).decode("ascii"), "base64")
+
+    with ThreadPoolExecutor(max_workers=GITHUB_FETCH_WORKERS) as pool:
+        list(pool.map(bind_trace(upload), binaries.values()))
+
+    if job:
+        job.check_cancelled()  # last point before the branch moves
+    tree = destination_repo.create_git_tree(elements, parent.tree)
+    commit = destination_repo.create_git_commit(f"{commit_message} (framework {snapshot.version[:7]})", tree, [parent])
+    ref.edit(commit.sha)
+    if job:
+        job.update(files_copied=len(elements))
+    return len(elements)
+
+
+def initial_project_files(project_base_path, project_name, project_description) -> Dict[str, str]:
     starter_task_yaml = f"""tasks:
   1.1_capture_project_goals:
     description: Help capture and summarize the goals, purpose, and intended impact of the project.
@@ -419,13 +726,14 @@ def create_initial_files(project_repo, project_base_path, project_name, project_
     created_at: {datetime.utcnow().isoformat()}
 """
 
-    # Create under the project base path
-    project_repo.create_file(f"{project_base_path}/task.yaml", "Initialize task.yaml", starter_task_yaml, branch=destination_branch)
-    project_repo.create_file(f"{project_base_path}/memory.yaml", "Initialize memory.yaml", starter_memory_yaml, branch=destination_branch)
-
-    # Outputs folder
-    project_repo.create_file(f"{project_base_path}/outputs/project_init/prompt_used.txt", "Capture initial project prompt", f"Project: {project_name}\nDescription: {project_description}", branch=destination_branch)
-    project_repo.create_file(f"{project_base_path}/outputs/project_init/reasoning_trace.md", "Initial project reasoning trace", f"# Reasoning Trace for {project_name}\n\n- Project initialized with AI Native Delivery Framework.\n- Project Description: {project_description}\n- Initialization Date: {datetime.utcnow().isoformat()}", branch=destination_branch)
+    # Created under the project base path
+    return {
+        f"{project_base_path}/task.yaml": starter_task_yaml,
+        f"{project_base_path}/memory.yaml": starter_memory_yaml,
+        # Outputs folder
+        f"{project_base_path}/outputs/project_init/prompt_used.txt": f"Project: {project_name}\nDescription: {project_description}",
+        f"{project_base_path}/outputs/project_init/reasoning_trace.md": f"# Reasoning Trace for {project_name}\n\n- Project initialized with AI Native Delivery Framework.\n- Project Description: {project_description}\n- Initialization Date: {datetime.utcnow().isoformat()}",
+    }
 
 
 def get_repo(repo_name: str):
@@ -461,13 +769,13 @@ async def commit_and_log_output(
         # Append path to task.yaml[outputs]
         """
         task_file = repo.get_contents("project/task.yaml", ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        task_data = load_task_data(repo, branch, task_file=task_file)
         task = task_data["tasks"].get(task_id, {})
         outputs = task.get("outputs", [])
         if file_path not in outputs:
             outputs.append(file_path)
             task["outputs"] = outputs
-            updated_yaml = yaml.dump(task_data, sort_keys=False)
+            updated_yaml = yaml_dump(task_data, sort_keys=False)
             commit_and_log(
                 repo,
                 file_path="project/task.yaml",
@@ -484,14 +792,17 @@ async def commit_and_log_output(
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Commit failed: {str(e)}"})
 
+@traced()
 def commit_and_log(repo, file_path, content, commit_message, task_id: Optional[str] = None, committed_by: Optional[str] = None, branch: str = "main"):
+    """Commit a file, record it in the changelog and memory index, and return the new blob sha of `file_path`."""
     try:
         # 💡 access github client from the repo object
         github = getattr(repo, "_github_client", None)
         if github:
-            rate = github.get_rate_limit().core
+            limits = github.get_rate_limit()
+            rate = getattr(limits, "core", None) or limits.resources.core  # PyGithub 2.x nests core under resources
             if rate.remaining < 10:
-                wait_time = int((rate.reset - datetime.utcnow()).total_seconds()) + 1
+                wait_time = max(int(rate.reset.timestamp() - time.time()) + 1, 1)
                 logger.warning(f"⚠️ GitHub rate limit low ({rate.remaining}). Sleeping {wait_time}s until reset at {rate.reset.isoformat()}")
                 sleep(wait_time)
         else:
@@ -504,7 +815,7 @@ def commit_and_log(repo, file_path, content, commit_message, task_id: Optional[s
         # Fetch changelog
         try:
             changelog_file = repo.get_contents(changelog_path, ref=branch)
-            changelog = yaml.safe_load(changelog_file.decoded_content) or []
+            changelog = yaml_load(changelog_file.decoded_content) or []
             changelog_sha = changelog_file.sha
         except Exception:
             changelog = []
@@ -519,26 +830,33 @@ def commit_and_log(repo, file_path, content, commit_message, task_id: Optional[s
         }
 
         # Write or update file
-        try:
-            existing_file = repo.get_contents(file_path, ref=branch)
-            repo.update_file(file_path, commit_message, content, existing_file.sha, branch=branch)
-        except Exception:
-            repo.create_file(file_path, commit_message, content, branch=branch)
+        if file_path == TASK_FILE_PATH:
+            # One Git Data commit for task.yaml and its snapshot, so the snapshot never lags behind
+            commit_files(repo, {file_path: content}, commit_message, task_id=task_id, committed_by=committed_by, branch=branch, log_changelog=False)
+            written_sha = git_blob_sha(content)
+        else:
+            try:
+                existing_file = repo.get_contents(file_path, ref=branch)
+                written = repo.update_file(file_path, commit_message, content, existing_file.sha, branch=branch)
+            except Exception:
+                written = repo.create_file(file_path, commit_message, content, branch=branch)
+            written_sha = written["content"].sha
+            record_trace_write(repo, branch, file_path, written_sha, content)
 
         changelog.append(output_log_entry)
 
         if file_path == memory_path:
-            changelog_content = yaml.dump(changelog, sort_keys=False)
+            changelog_content = yaml_dump(changelog, sort_keys=False)
             if changelog_sha:
                 repo.update_file(changelog_path, f"Update changelog at {timestamp}", changelog_content, changelog_sha, branch=branch)
             else:
                 repo.create_file(changelog_path, f"Create changelog at {timestamp}", changelog_content, branch=branch)
-            return
+            return written_sha
 
         # Fetch memory
         try:
             memory_file = repo.get_contents(memory_path, ref=branch)
-            memory = yaml.safe_load(memory_file.decoded_content) or []
+            memory = yaml_load(memory_file.decoded_content) or []
             memory_sha = memory_file.sha
         except Exception:
             memory = []
@@ -581,7 +899,7 @@ def commit_and_log(repo, file_path, content, commit_message, task_id: Optional[s
                 pass
 
         if memory_updated:
-            updated_memory = yaml.dump(memory, sort_keys=False)
+            updated_memory = yaml_dump(memory, sort_keys=False)
             if memory_sha:
                 repo.update_file(memory_path, f"Update memory.yaml for {file_path}", updated_memory, memory_sha, branch=branch)
             else:
@@ -596,33 +914,413 @@ def commit_and_log(repo, file_path, content, commit_message, task_id: Optional[s
             }
             changelog.append(memory_log_entry)
 
-        changelog_content = yaml.dump(changelog, sort_keys=False)
+        changelog_content = yaml_dump(changelog, sort_keys=False)
         if changelog_sha:
             repo.update_file(changelog_path, f"Update changelog at {timestamp}", changelog_content, changelog_sha, branch=branch)
         else:
             repo.create_file(changelog_path, f"Create changelog at {timestamp}", changelog_content, branch=branch)
 
+        return written_sha
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Commit and changelog failed: {str(e)}")
 
 
 
+def git_blob_sha(content: Union[str, bytes]) -> str:
+    """Compute the git blob sha GitHub will assign to `content`, without an API call."""
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+_BRANCH_WRITE_LOCKS: Dict[str, threading.RLock] = {}
+_BRANCH_WRITE_LOCKS_LOCK = threading.Lock()
+
+def branch_write_lock(repo, branch: str) -> threading.RLock:
+    """
+    Serializes this process's commits to one branch, so they queue instead of racing each other's
+    ref updates. Reentrant, so a caller can hold it across its reads and the commit_files call.
+    """
+    with _BRANCH_WRITE_LOCKS_LOCK:
+        return _BRANCH_WRITE_LOCKS.setdefault(f"{repo.full_name}@{branch}", threading.RLock())
+
+def branch_head_sha(repo, branch: str) -> str:
+    """The commit a branch points at; pass it to commit_files as `base_sha` when reading before writing."""
+    return repo.get_git_ref(f"heads/{branch}").object.sha
+
+def ensure_paths_untouched(repo, base_sha: str, head_sha: str, paths: set):
+    """409 unless `base_sha`..`head_sha` only adds commits that leave every one of `paths` alone."""
+    comparison = repo.compare(base_sha, head_sha).raw_data
+    changed = {f["filename"] for f in comparison.get("files") or []}
+    changed |= {f["previous_filename"] for f in comparison.get("files") or [] if f.get("previous_filename")}
+    clashes = sorted(paths & changed)
+    if comparison.get("status") != "ahead" or clashes:
+        detail = f"changed {clashes}" if clashes else "was rewritten"
+        raise HTTPException(status_code=409, detail=f"Branch moved from {base_sha[:7]} to {head_sha[:7]} and {detail}; re-read and retry")
+
+@traced()
+def commit_files(repo, files: Dict[str, Optional[Union[str, bytes]]], commit_message: str, task_id: Optional[str] = None, committed_by: Optional[str] = None, branch: str = "main", log_changelog: bool = True, blobs: Optional[Dict[str, tuple]] = None, base_sha: Optional[str] = None, changelog_entries: Optional[List[dict]] = None) -> str:
+    """
+    Write several files (None deletes a path) as a single commit through the Git Data API,
+    appending one changelog entry per path (or `changelog_entries`) into the same commit. Returns
+    the new commit sha. `blobs` points further paths at blobs already in the repo, as (blob sha,
+    mode), without uploading anything. Unlike commit_and_log this does not enrich memory.yaml;
+    use /memory/manage index for that.
+
+    The commit is built on `base_sha`, the commit the caller read its inputs at (default: the
+    current head), and the changelog is read at that same commit. If the branch has moved on,
+    the commit is rebuilt on the new head, up to COMMIT_RETRIES times, provided the commits in
+    between touched none of these paths; otherwise it fails with 409 rather than overwrite them.
+    """
+    overlap = set(files) & set(blobs or {})
+    if overlap:
+        raise HTTPException(status_code=500, detail=f"Commit of {len(files)} files failed: paths given both as content and as blobs: {sorted(overlap)}")
+    paths = set(files) | set(blobs or {})
+
+    try:
+        elements = []
+        for path, content in files.items():
+            if isinstance(content, bytes):
+                blob = repo.create_git_blob(base64.b64encode(content).decode("ascii"), "base64")
+                elements.append(InputGitTreeElement(path, "100644", "blob", sha=blob.sha))
+            elif content is None:
+                elements.append(InputGitTreeElement(path, "100644", "blob", sha=None))
+            else:
+                elements.append(InputGitTreeElement(path, "100644", "blob", content=content))
+        for path, (sha, mode) in (blobs or {}).items():
+            elements.append(InputGitTreeElement(path, mode, "blob", sha=sha))
+
+        staged = dict(files)
+        task_yaml = files.get(TASK_FILE_PATH)
+        if isinstance(task_yaml, str):
+            staged[TASK_SNAPSHOT_PATH] = store_task_snapshot(repo, branch, task_yaml, git_blob_sha(task_yaml))
+            elements.append(InputGitTreeElement(TASK_SNAPSHOT_PATH, "100644", "blob", content=staged[TASK_SNAPSHOT_PATH]))
+
+        with branch_write_lock(repo, branch):
+            ref = repo.get_git_ref(f"heads/{branch}")
+            parent_sha = base_sha or ref.object.sha
+            timestamp = datetime.utcnow().isoformat()
+            for attempt in range(COMMIT_RETRIES + 1):
+                if ref.object.sha != parent_sha:
+                    ensure_paths_untouched(repo, parent_sha, ref.object.sha, paths)
+                    parent_sha = ref.object.sha
+
+                changelog_elements = []
+                if log_changelog and CHANGELOG_PATH not in paths:
+                    try:
+                        changelog = yaml_load(repo.get_contents(CHANGELOG_PATH, ref=parent_sha).decoded_content) or []
+                    except Exception:
+                        changelog = []
+                    changelog.extend(changelog_entries if changelog_entries is not None else [
+                        {
+                            "timestamp": timestamp,
+                            "path": path,
+                            "task_id": task_id,
+                            "committed_by": committed_by,
+                            "message": commit_message
+                        }
+                        for path in files
+                    ])
+                    staged[CHANGELOG_PATH] = yaml_dump(changelog, sort_keys=False)
+                    changelog_elements.append(InputGitTreeElement(CHANGELOG_PATH, "100644", "blob", content=staged[CHANGELOG_PATH]))
+
+                parent = repo.get_git_commit(parent_sha)
+                tree = repo.create_git_tree(elements + changelog_elements, parent.tree)
+                commit = repo.create_git_commit(commit_message, tree, [parent])
+                try:
+                    ref.edit(commit.sha)
+                except GithubException as e:
+                    if e.status != 422:
+                        raise
+                    if attempt == COMMIT_RETRIES:
+                        raise HTTPException(status_code=409, detail=f"Branch {branch} kept moving during {COMMIT_RETRIES + 1} commit attempts; retry")
+                    time.sleep(0.1 * 2 ** attempt)  # not a fast-forward: another process committed first
+                    ref = repo.get_git_ref(f"heads/{branch}")
+                    continue
+
+                for path, content in staged.items():
+                    if not isinstance(content, bytes):
+                        record_trace_write(repo, branch, path, content and git_blob_sha(content), content)
+                return commit.sha
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Commit of {len(files)} files failed: {str(e)}")
+
+def task_log_dir(task_id: str, log_name: str) -> str:
+    return f"project/outputs/{task_id}/{log_name}"
+
+def list_directory(repo, path: str, branch: str) -> list:
+    """Directory listing that treats a missing directory as empty."""
+    try:
+        listing = repo.get_contents(path, ref=branch)
+    except GithubException as e:
+        if e.status == 404:
+            return []
+        raise
+    return listing if isinstance(listing, list) else []
+
+def list_log_segments(repo, branch: str, directory: str) -> list:
+    segments = [(segment_number(f.name), f) for f in list_directory(repo, directory, branch)]
+    return sorted(((n, f) for n, f in segments if n), key=lambda s: s[0])
+
+def read_log_segment(repo, branch: str, segment_file) -> List[dict]:
+    """Entries of one segment; segments are cached by blob sha so a full segment is fetched at most once."""
+    entries = cached_segment(segment_file.sha)
+    CACHE_LOOKUPS.inc(cache="log_segment", result="miss" if entries is None else "hit")
+    if entries is None:
+        fetched = repo.get_contents(segment_file.path, ref=branch)
+        entries = decode_entries(fetched.decoded_content.decode("utf-8"))
+        remember_segment(fetched.sha, entries)
+    return entries
+
+def read_legacy_log(repo, branch: str, legacy_file, legacy_key: Optional[str]) -> List[dict]:
+    entries = cached_segment(legacy_file.sha)
+    CACHE_LOOKUPS.inc(cache="log_segment", result="miss" if entries is None else "hit")
+    if entries is None:
+        data = yaml_load(repo.get_contents(legacy_file.path, ref=branch).decoded_content)
+        if legacy_key:
+            data = (data or {}).get(legacy_key)
+        entries = data if isinstance(data, list) else []
+        remember_segment(legacy_file.sha, entries)
+    return entries
+
+@traced()
+def read_task_log(
+    repo,
+    branch: str,
+    task_id: str,
+    log_name: str,
+    tail: Optional[int] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    since: Optional[str] = None
+) -> dict:
+    """
+    Read a task log without downloading more than it returns: `tail` takes the last N entries,
+    otherwise `offset`/`limit` select a range (the whole log by default). `since` drops entries
+    timestamped before it and is found by walking back from the newest segment.
+    Every segment but the last holds exactly SEGMENT_SIZE entries, so a range maps straight
+    onto the segments it spans.
+    """
+    spec = TASK_LOGS[log_name]
+    outputs = {f.name: f for f in list_directory(repo, f"project/outputs/{task_id}", branch)}
+    legacy_file = outputs.get(spec["legacy_file"])
+    legacy = read_legacy_log(repo, branch, legacy_file, spec["legacy_key"]) if legacy_file else []
+    segments = list_log_segments(repo, branch, task_log_dir(task_id, log_name)) if log_name in outputs else []
+    last = read_log_segment(repo, branch, segments[-1][1]) if segments else []
+
+    def chunk(i: int) -> List[dict]:
+        if i < 0:
+            return legacy
+        return last if i == len(segments) - 1 else read_log_segment(repo, branch, segments[i][1])
+
+    def chunk_start(i: int) -> int:
+        return 0 if i < 0 else len(legacy) + i * SEGMENT_SIZE
+
+    total = len(legacy) + (len(segments) - 1) * SEGMENT_SIZE + len(last) if segments else len(legacy)
+
+    floor = 0
+    if since:
+        floor = total
+        for i in range(len(segments) - 1, -2, -1):
+            entries = chunk(i)
+            newer = [n for n, e in enumerate(entries) if str(e.get("timestamp") or "") >= since]
+            if newer:
+                floor = chunk_start(i) + newer[0]
+            if len(newer) < len(entries):
+                break
+
+    if tail is not None:
+        start, end = max(total - max(int(tail), 0), floor), total
+    else:
+        start = min(max(int(offset or 0), floor), total)
+        end = total if limit is None else min(start + max(int(limit), 0), total)
+
+    entries = []
+    for i in range(-1, len(segments)):
+        seg_start = chunk_start(i)
+        seg_end = total if i == len(segments) - 1 else chunk_start(i + 1)
+        if seg_end <= start or seg_start >= end:
+            continue
+        entries.extend(chunk(i)[max(start - seg_start, 0):end - seg_start])
+
+    return {"entries": entries, "total": total, "offset": start}
+
+def load_log_tail(repo, branch: str, directory: str) -> dict:
+    segments = list_log_segments(repo, branch, directory)
+    if not segments:
+        return {"number": 0, "sha": None, "entries": []}
+    number, segment_file = segments[-1]
+    return {"number": number, "sha": segment_file.sha, "entries": read_log_segment(repo, branch, segment_file)}
+
+@traced()
+def append_task_log(repo, branch: str, task_id: str, log_name: str, entries: List[dict], commit_message: str, committed_by: Optional[str] = None) -> dict:
+    """
+    Append entries to a task log. Topping up the last segment is a single update_file of at most
+    SEGMENT_SIZE entries, using a remembered segment sha so no listing is needed. A new segment
+    is committed (with its changelog entry) on the commit its directory was listed at, so one
+    another writer created first makes the append re-list and retry instead of overwriting it.
+    """
+    directory = task_log_dir(task_id, log_name)
+    tail_key = f"{task_cache_key(repo, branch)}:{directory}"
+    pending = list(entries)  # not yet written, so a retry after a partial append does not repeat entries
+
+    for attempt in range(COMMIT_RETRIES + 1):
+        tail = get_tail(tail_key) if attempt == 0 else None
+        if tail is not None:
+            tail["entries"] = cached_segment(tail["sha"]) if tail["sha"] else []
+        if tail is None or tail["entries"] is None:
+            tail = load_log_tail(repo, branch, directory)
+        try:
+            writes = plan_writes(directory, tail["number"], tail["entries"], pending)
+            base_sha = None
+            if not all(write["exists"] for write in writes):
+                base_sha = branch_head_sha(repo, branch)
+                tail = load_log_tail(repo, base_sha, directory)
+                writes = plan_writes(directory, tail["number"], tail["entries"], pending)
+            for write in writes:
+                content = encode_entries(write["entries"])
+                if write["exists"]:
+                    written = repo.update_file(write["path"], commit_message, content, tail["sha"], branch=branch)
+                    sha = written["content"].sha
+                else:
+                    commit_files(repo, {write["path"]: content}, commit_message, task_id=task_id, committed_by=committed_by, branch=branch, base_sha=base_sha)
+                    sha = git_blob_sha(content)
+                pending = pending[len(write["entries"]) - (len(tail["entries"]) if write["exists"] else 0):]
+                remember_segment(sha, write["entries"])
+                set_tail(tail_key, write["number"], sha)
+                tail = {"number": write["number"], "sha": sha, "entries": write["entries"]}
+            return {"segment": tail["number"], "segment_entries": len(tail["entries"])}
+        except (GithubException, HTTPException) as e:
+            # Stale segment sha, or a segment created since the listing (another writer appended first): re-list and retry
+            forget_tail(tail_key)
+            status = e.status if isinstance(e, GithubException) else e.status_code
+            if attempt == COMMIT_RETRIES or status not in (404, 409, 422):
+                raise
+
+def stage_task_log_append(repo, branch: str, task_id: str, log_name: str, entries: List[dict], files: Dict[str, str], staged: dict):
+    """Add a task-log append to a pending commit_files() batch; `staged` carries the log tail between calls."""
+    directory = task_log_dir(task_id, log_name)
+    tail = staged.get(directory) or load_log_tail(repo, branch, directory)
+    for write in plan_writes(directory, tail["number"], tail["entries"], entries):
+        files[write["path"]] = encode_entries(write["entries"])
+        tail = {"number": write["number"], "sha": None, "entries": write["entries"]}
+    staged[directory] = tail
+    forget_tail(f"{task_cache_key(repo, branch)}:{directory}")
+
+def record_trace_write(repo, branch: str, path: str, blob_sha: Optional[str], content: Optional[str]):
+    """Write-through for the trace warehouse when this service commits (or deletes) a reasoning trace."""
+    if not trace_task_id(path):
+        return
+    try:
+        warehouse = get_trace_warehouse(TRACE_WAREHOUSE_PATH)
+        if content is None:
+            warehouse.apply(repo.full_name, branch, {}, [path])
+        else:
+            warehouse.upsert(repo.full_name, branch, path, blob_sha, yaml_load(content) or {})
+    except Exception as e:
+        logger.warning(f"Trace warehouse not updated for {path}: {e}")
+
+@traced()
+def sync_trace_warehouse(repo, branch: str, force: bool = False):
+    """
+    Bring the trace warehouse up to date with `branch`. Within TRACE_SYNC_MAX_AGE_SECONDS of the
+    last check nothing is fetched; otherwise one ref lookup, and if the head moved, one recursive
+    tree listing plus a blob read for each reasoning trace whose sha changed. A trace that cannot
+    be read is left as it was, not blanked, and retried on the next sync.
+    """
+    warehouse = get_trace_warehouse(TRACE_WAREHOUSE_PATH)
+    state = warehouse.sync_state(repo.full_name, branch)
+    if state and not force and time.time() - state["checked_at"] < TRACE_SYNC_MAX_AGE_SECONDS:
+        CACHE_LOOKUPS.inc(cache="trace_warehouse", result="hit")
+        return warehouse
+
+    head_sha = repo.get_git_ref(f"heads/{branch}").object.sha
+    if state and not force and state["head_sha"] == head_sha:
+        warehouse.mark_checked(repo.full_name, branch, head_sha)
+        CACHE_LOOKUPS.inc(cache="trace_warehouse", result="revalidated")
+        return warehouse
+
+    CACHE_LOOKUPS.inc(cache="trace_warehouse", result="miss")
+    tree = repo.get_git_tree(head_sha, recursive=True)
+    if tree.raw_data.get("truncated"):
+        logger.warning(f"Recursive tree for {repo.full_name}@{branch} is truncated; some reasoning traces may be missing")
+    current = {e.path: e.sha for e in tree.tree if e.type == "blob" and trace_task_id(e.path)}
+    known = warehouse.blob_shas(repo.full_name, branch)
+    changed = [path for path, sha in current.items() if known.get(path) != sha]
+
+    def fetch(path):
+        try:
+            blob = repo.get_git_blob(current[path])
+            return path, (current[path], yaml_load(base64.b64decode(blob.content)) or {})
+        except Exception as e:
+            logger.warning(f"Skipping unreadable reasoning trace {path}: {e}")
+            return path, None
+
+    with ThreadPoolExecutor(max_workers=GITHUB_FETCH_WORKERS) as pool:
+        fetched = dict(pool.map(bind_trace(fetch), changed))
+    upserts = {path: row for path, row in fetched.items() if row is not None}
+    warehouse.apply(repo.full_name, branch, upserts, [path for path in known if path not in current])
+    # With reads outstanding the head is not recorded, so the next sync retries them (and keeps their old rows meanwhile)
+    warehouse.mark_checked(repo.full_name, branch, head_sha if len(upserts) == len(fetched) else None)
+    return warehouse
+
+def stream_csv(fields, records) -> Iterator[str]:
+    """Yield a CSV header for `fields` straight away, then one line per record; lists and dicts are JSON-encoded."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(fields), extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue()
+    for record in records:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow({
+            key: json.dumps(value, default=str) if isinstance(value, (list, dict)) else value
+            for key, value in record.items()
+        })
+        yield buffer.getvalue()
+
+def stream_ndjson(records) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, default=str) + "\n"
+
+def exported_traces(warehouse, repo, branch: str) -> Iterator[dict]:
+    """
+    Reasoning traces in the export schema, from a warehouse the caller has already synced. An error
+    part-way through is re-raised, which aborts the response instead of ending it as if complete.
+    """
+    try:
+        for trace in warehouse.iter_traces(repo.full_name, branch):
+            yield export_record(trace)
+    except Exception as e:
+        logger.error(f"Reasoning trace export for {repo.full_name}@{branch} stopped early: {type(e).__name__}: {e}")
+        raise
+
+def export_response(fields, records, format: str, filename: str):
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_ndjson(records),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename={filename}.ndjson"}
+        )
+    return StreamingResponse(
+        stream_csv(fields, records),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}.csv"}
+    )
+
+@traced()
 def generate_handoff_note(task_id: str, repo, branch: str) -> dict:
-        task_path = "project/task.yaml"
-        cot_path = f"project/outputs/{task_id}/chain_of_thought.yaml"
         try:
-            task_file = repo.get_contents(task_path, ref=branch)
-            tasks = yaml.safe_load(task_file.decoded_content)
-            task = tasks.get("tasks", {}).get(task_id, {})
+            task = load_task_index(repo, branch).tasks.get(task_id, {})
             pod_owner = task.get("pod_owner", "Unknown")
             description = task.get("description", "")
 
-            # Load all chain of thought messages
+            # Load only the last 5 chain of thought messages
             try:
-                cot_file = repo.get_contents(cot_path, ref=branch)
-                cot_data = yaml.safe_load(cot_file.decoded_content)
-                all_thoughts = [entry.get("message", "") for entry in cot_data.get("thoughts", []) if "message" in entry]
-                notes = "\n".join(all_thoughts[-5:])  # capture last 5 thoughts
+                recent = read_task_log(repo, branch, task_id, "chain_of_thought", tail=5)["entries"]
+                notes = "\n".join(entry.get("message", "") for entry in recent if "message" in entry)
             except:
                 notes = ""
 
@@ -761,6 +1459,7 @@ async def manage_task_lifecycle(payload: dict = Body(...)):
             repo_name=repo_name,
             task_id=payload.get("task_id"),
             prompt_used=payload.get("prompt_used"),
+            pod_owner=payload.get("pod_owner"),
             branch=branch
         )
 
@@ -788,6 +1487,25 @@ async def manage_task_lifecycle(payload: dict = Body(...)):
         return await handle_next_task(
             repo_name=repo_name,
             pod_owner=payload.get("pod_owner"),
+            limit=clamped_int(payload, "limit", 10, MAX_LIST_LIMIT),
+            refresh=payload.get("refresh", False),
+            branch=branch
+        )
+
+    elif action == "claim":
+        return await handle_claim_task(
+            repo_name=repo_name,
+            pod_owner=payload.get("pod_owner"),
+            task_id=payload.get("task_id"),
+            ttl_seconds=clamped_int(payload, "ttl_seconds", TASK_CLAIM_TTL_SECONDS, TASK_CLAIM_MAX_TTL_SECONDS),
+            branch=branch
+        )
+
+    elif action == "release":
+        return await handle_release_task(
+            repo_name=repo_name,
+            task_id=payload.get("task_id"),
+            pod_owner=payload.get("pod_owner"),
             branch=branch
         )
 
@@ -818,6 +1536,15 @@ async def manage_task_lifecycle(payload: dict = Body(...)):
             branch=branch
         )
 
+    elif action == "batch":
+        return await handle_batch_lifecycle(
+            repo_name=repo_name,
+            operations=payload.get("operations"),
+            committed_by=payload.get("committed_by"),
+            dry_run=payload.get("dry_run", False),
+            branch=branch
+        )
+
     raise HTTPException(status_code=400, detail=f"Unsupported action: {action}")
 
 @app.post("/tasks/handoff")
@@ -848,7 +1575,11 @@ async def manage_task_handoff(payload: dict = Body(...)):
         return await handle_fetch_handoff_note(
             repo_name=repo_name,
             task_id=payload.get("task_id"),
-            branch=branch
+            branch=branch,
+            tail=payload.get("tail"),
+            since=payload.get("since"),
+            offset=payload.get("offset", 0),
+            limit=payload.get("limit")
         )
 
     elif action == "generate_auto":
@@ -895,7 +1626,11 @@ async def manage_chain_of_thought(payload: dict = Body(...)):
         return await handle_fetch_chain_of_thought(
             repo_name=repo_name,
             task_id=task_id,
-            branch=branch
+            branch=branch,
+            tail=payload.get("tail"),
+            offset=payload.get("offset", 0),
+            limit=payload.get("limit"),
+            since=payload.get("since")
         )
 
     raise HTTPException(status_code=400, detail=f"Unsupported action: {action}")
@@ -942,11 +1677,27 @@ async def query_tasks(payload: dict = Body(...)):
             status=payload.get("status"),
             pod_owner=payload.get("pod_owner"),
             category=payload.get("category"),
-            branch=branch
+            branch=branch,
+            phase=payload.get("phase"),
+            updated_since=payload.get("updated_since"),
+            fields=payload.get("fields"),
+            sort_by=payload.get("sort_by"),
+            descending=payload.get("descending", False),
+            limit=payload.get("limit"),
+            cursor=payload.get("cursor")
         )
 
     elif mode == "list_phases":
-        return await handle_list_phases(repo_name=repo_name, branch=branch)
+        return await handle_list_phases(
+            repo_name=repo_name,
+            branch=branch,
+            status=payload.get("status"),
+            pod_owner=payload.get("pod_owner"),
+            phase=payload.get("phase"),
+            fields=payload.get("fields"),
+            limit=payload.get("limit"),
+            cursor=payload.get("cursor")
+        )
 
     elif mode == "graph":
         return await handle_task_graph(repo_name=repo_name, branch=branch)
@@ -965,6 +1716,38 @@ async def query_tasks(payload: dict = Body(...)):
             branch=branch
         )
 
+    elif mode in ("upstream", "downstream"):
+        return await handle_transitive_dependencies(
+            repo_name=repo_name,
+            task_id=payload.get("task_id"),
+            direction=mode,
+            edge_types=payload.get("edge_types"),
+            branch=branch
+        )
+
+    elif mode == "topological_order":
+        return await handle_topological_order(
+            repo_name=repo_name,
+            edge_types=payload.get("edge_types"),
+            branch=branch
+        )
+
+    elif mode == "critical_path":
+        return await handle_critical_path(
+            repo_name=repo_name,
+            edge_types=payload.get("edge_types"),
+            weight_field=payload.get("weight_field"),
+            remaining_only=payload.get("remaining_only", False),
+            branch=branch
+        )
+
+    elif mode == "cycles":
+        return await handle_task_cycles(
+            repo_name=repo_name,
+            edge_types=payload.get("edge_types"),
+            branch=branch
+        )
+
     raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
 
 @app.get("/tasks/artifacts/{task_id}")
@@ -974,8 +1757,7 @@ async def get_task_artifacts(task_id: str, repo_name: str = Query(...), branch:
         task_path = "project/task.yaml"
         output_dir = f"project/outputs/{task_id}"
 
-        task_file = repo.get_contents(task_path, ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        task_data = load_task_data(repo, branch)
         task = task_data.get("tasks", {}).get(task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
@@ -997,9 +1779,7 @@ async def get_task_artifacts(task_id: str, repo_name: str = Query(...), branch:
 
         # Load chain of thought
         try:
-            cot_path = f"{output_dir}/chain_of_thought.yaml"
-            cot_data = repo.get_contents(cot_path, ref=branch)
-            chain_of_thought = yaml.safe_load(cot_data.decoded_content)
+            chain_of_thought = read_task_log(repo, branch, task_id, "chain_of_thought")["entries"]
         except:
             chain_of_thought = []
 
@@ -1007,15 +1787,13 @@ async def get_task_artifacts(task_id: str, repo_name: str = Query(...), branch:
         try:
             rt_path = f"{output_dir}/reasoning_trace.yaml"
             rt_data = repo.get_contents(rt_path, ref=branch)
-            reasoning_trace = yaml.safe_load(rt_data.decoded_content)
+            reasoning_trace = yaml_load(rt_data.decoded_content)
         except:
             reasoning_trace = {}
 
         # Load handoff notes
         try:
-            hn_path = f"{output_dir}/handoff_notes.yaml"
-            hn_data = repo.get_contents(hn_path, ref=branch)
-            handoff_notes = yaml.safe_load(hn_data.decoded_content).get("handoffs", [])
+            handoff_notes = read_task_log(repo, branch, task_id, "handoff_notes")["entries"]
         except:
             handoff_notes = []
 
@@ -1048,7 +1826,7 @@ async def handle_update_task_metadata(
         repo = get_repo(repo_name)
         task_path = "project/task.yaml"
         task_yaml_file = repo.get_contents(task_path, ref=branch)
-        tasks = yaml.safe_load(task_yaml_file.decoded_content)
+        tasks = load_task_data(repo, branch, task_file=task_yaml_file)
 
         if task_id not in tasks["tasks"]:
             raise HTTPException(status_code=404, detail="Task not found")
@@ -1063,8 +1841,9 @@ async def handle_update_task_metadata(
         task["updated_at"] = datetime.utcnow().isoformat()
         pod_owner = task.get("pod_owner", "Unknown")
 
-        updated_yaml = yaml.dump(tasks)
+        updated_yaml = yaml_dump(tasks)
         commit_and_log(repo, task_path, updated_yaml, f"Update metadata for {task_id}", task_id=task_id, committed_by=pod_owner, branch=branch)
+        invalidate_ready_queue(task_cache_key(repo, branch))
 
         return {"message": "Task metadata updated", "task_id": task_id, "updated_task_metadata": task}
 
@@ -1083,7 +1862,7 @@ async def handle_clone_task(
         repo = get_repo(repo_name)
         task_path = "project/task.yaml"
         task_yaml_file = repo.get_contents(task_path, ref=branch)
-        tasks = yaml.safe_load(task_yaml_file.decoded_content)
+        tasks = load_task_data(repo, branch, task_file=task_yaml_file)
 
         if original_task_id not in tasks["tasks"]:
             raise HTTPException(status_code=404, detail="Original task not found")
@@ -1095,22 +1874,28 @@ async def handle_clone_task(
         original["updated_at"] = original["created_at"]
         tasks["tasks"][new_task_id] = original
 
-        updated_yaml = yaml.dump(tasks)
+        updated_yaml = yaml_dump(tasks)
         pod_owner = get_pod_owner(repo, original_task_id)
         commit_and_log(repo, task_path, updated_yaml, f"Clone task {original_task_id} as {new_task_id}", task_id=new_task_id, committed_by=pod_owner, branch=branch)
+        invalidate_ready_queue(task_cache_key(repo, branch))
 
         return {"message": "Task cloned", "new_task_id": new_task_id, "cloned_task_metadata": original}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clone task: {str(e)}")
 
-async def handle_start_task(repo_name: str, task_id: str, prompt_used: str, branch: str = "unknown") -> dict:
+async def handle_start_task(repo_name: str, task_id: str, prompt_used: str, pod_owner: Optional[str] = None, branch: str = "unknown") -> dict:
     """Start a task and log the prompt used."""
     try:
         repo = get_repo(repo_name)
+        queue = get_ready_queue(task_cache_key(repo, branch))
+        claimed_by = queue.claimed_by_other(task_id, pod_owner) if queue else None
+        if claimed_by:
+            return JSONResponse(status_code=409, content={"detail": f"Task {task_id} is claimed by {claimed_by}. Call action 'next' or 'claim' to pick another task."})
+
         task_path = "project/task.yaml"
         task_file = repo.get_contents(task_path, ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        task_data = load_task_data(repo, branch, task_file=task_file)
 
         if task_id not in task_data.get("tasks", {}):
             from difflib import get_close_matches
@@ -1128,17 +1913,17 @@ async def handle_start_task(repo_name: str, task_id: str, prompt_used: str, bran
             task["prompt_used"] = prompt_path
 
         # Update task.yaml
-        updated_task_yaml = yaml.dump(task_data, sort_keys=False)
-        commit_and_log(repo, task_path, updated_task_yaml, f"Start task {task_id}", task_id=task_id, committed_by=task.get("pod_owner", "unknown"), branch=branch)
+        updated_task_yaml = yaml_dump(task_data, sort_keys=False)
+        new_sha = commit_and_log(repo, task_path, updated_task_yaml, f"Start task {task_id}", task_id=task_id, committed_by=task.get("pod_owner", "unknown"), branch=branch)
+        sync_ready_queue(repo, branch, task_file.sha, new_sha, lambda q: q.mark_started(task_id))
 
         # Optional: fetch handoff
         handoff_note = None
         handoff_from = task.get("handoff_from")
         if handoff_from:
             try:
-                handoff_file = repo.get_contents(f"project/outputs/{handoff_from}/handoff_notes.yaml", ref=branch)
-                data = yaml.safe_load(handoff_file.decoded_content)
-                handoff_note = data.get("handoffs", [])[-1] if data.get("handoffs") else None
+                latest = read_task_log(repo, branch, handoff_from, "handoff_notes", tail=1)["entries"]
+                handoff_note = latest[-1] if latest else None
             except Exception:
                 handoff_note = None
 
@@ -1149,7 +1934,7 @@ async def handle_start_task(repo_name: str, task_id: str, prompt_used: str, bran
         reasoning_summary = None
         try:
             rt_file = repo.get_contents(f"project/outputs/{handoff_from}/reasoning_trace.yaml", ref=branch)
-            rt_data = yaml.safe_load(rt_file.decoded_content)
+            rt_data = yaml_load(rt_file.decoded_content)
             reasoning_summary = rt_data.get("summary")
         except:
             reasoning_summary = None
@@ -1171,7 +1956,8 @@ async def handle_complete_task(repo_name: str, task_id: str, outputs: List[dict]
         repo = get_repo(repo_name)
         task_path = "project/task.yaml"
         task_file = repo.get_contents(task_path, ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        task_data = load_task_data(repo, branch, task_file=task_file)
+        index = load_task_index(repo, branch, task_file=task_file)
 
         if task_id not in task_data.get("tasks", {}):
             raise HTTPException(status_code=404, detail=f"Task ID {task_id} not found.")
@@ -1191,43 +1977,41 @@ async def handle_complete_task(repo_name: str, task_id: str, outputs: List[dict]
 
         # Update outputs in task.yaml
         task_data["outputs"] = list(set(task_data.get("outputs", []) + output_paths))
-        commit_and_log(repo, task_path, yaml.dump(task_data), f"Mark task {task_id} as completed and update outputs", task_id=task_id, committed_by=pod_owner, branch=branch)
+        new_sha = commit_and_log(repo, task_path, yaml_dump(task_data), f"Mark task {task_id} as completed and update outputs", task_id=task_id, committed_by=pod_owner, branch=branch)
 
         if reasoning_trace:
             trace_path = f"{output_dir}/reasoning_trace.yaml"
-            commit_and_log(repo, trace_path, yaml.dump(reasoning_trace), f"Log reasoning trace for {task_id}", task_id=task_id, committed_by=pod_owner, branch=branch)
+            commit_and_log(repo, trace_path, yaml_dump(reasoning_trace), f"Log reasoning trace for {task_id}", task_id=task_id, committed_by=pod_owner, branch=branch)
 
         # Auto-generate handoff if not provided
         if not handoff_note:
             handoff_note = generate_handoff_note(task_id, repo, branch)
 
         if handoff_note:
-            handoff_path = f"{output_dir}/handoff_notes.yaml"
-            try:
-                file = repo.get_contents(handoff_path, ref=branch)
-                handoff_data = yaml.safe_load(file.decoded_content) or {}
-            except:
-                handoff_data = {}
-            
             # Add scale flag if applicable
             if handoff_to_same_pod:
                 handoff_note["handoff_type"] = "scale"
                 if token_count:
                     handoff_note["token_count"] = token_count
 
-            handoff_data.setdefault("handoffs", []).append(handoff_note)
-            commit_and_log(repo, handoff_path, yaml.dump(handoff_data, sort_keys=False), f"Log handoff note for {task_id}", task_id=task_id, committed_by=pod_owner, branch=branch)
+            append_task_log(repo, branch, task_id, "handoff_notes", [handoff_note], f"Log handoff note for {task_id}", committed_by=pod_owner)
 
         # Auto-activate any downstream tasks that depend on this one
         activated = []
-        for tid, t in task_data.get("tasks", {}).items():
-            if t.get("status") == "unassigned" and t.get("depends_on") and task_id in t["depends_on"]:
+        for tid in index.direct_downstream(task_id, ("depends_on",)):
+            t = task_data.get("tasks", {}).get(tid)
+            if t and t.get("status") == "unassigned":
                 t["status"] = "planned"
                 t["updated_at"] = datetime.utcnow().isoformat()
                 activated.append(tid)
 
         if activated:
-            commit_and_log(repo, task_path, yaml.dump(task_data), f"Auto-activated downstream tasks: {', '.join(activated)}", task_id=task_id, committed_by="chaining_bot", branch=branch)
+            new_sha = commit_and_log(repo, task_path, yaml_dump(task_data), f"Auto-activated downstream tasks: {', '.join(activated)}", task_id=task_id, committed_by="chaining_bot", branch=branch)
+
+        def apply_completion(queue):
+            queue.mark_completed(task_id)
+            queue.mark_planned(activated)
+        sync_ready_queue(repo, branch, task_file.sha, new_sha, apply_completion)
 
         return {"message": f"Task {task_id} completed and outputs committed. Activated downstream: {activated}"}
 
@@ -1240,7 +2024,7 @@ async def handle_reopen_task(repo_name: str, task_id: str, reason: str, branch:
         repo = get_repo(repo_name)
         task_path = "project/task.yaml"
         task_file = repo.get_contents(task_path, ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        task_data = load_task_data(repo, branch, task_file=task_file)
 
         if task_id not in task_data.get("tasks", {}):
             raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
@@ -1252,54 +2036,285 @@ async def handle_reopen_task(repo_name: str, task_id: str, reason: str, branch:
         pod_owner = task_data["tasks"][task_id].get("pod_owner") or "GPTPod"
         task_data["tasks"][task_id]["pod_owner"] = pod_owner  # ensure it's written back
 
-        updated_content = yaml.dump(task_data)
-        commit_and_log(repo, task_path, updated_content, f"Reopen task {task_id}", task_id=task_id, committed_by=task_data["tasks"][task_id]["pod_owner"], branch=branch)
+        updated_content = yaml_dump(task_data)
+        new_sha = commit_and_log(repo, task_path, updated_content, f"Reopen task {task_id}", task_id=task_id, committed_by=task_data["tasks"][task_id]["pod_owner"], branch=branch)
+        sync_ready_queue(repo, branch, task_file.sha, new_sha, lambda q: q.mark_reopened(task_id))
 
         # Append to chain of thought
-        cot_path = f"project/outputs/{task_id}/chain_of_thought.yaml"
         cot_message = {
             "timestamp": datetime.utcnow().isoformat(),
             "message": reason
         }
-        try:
-            cot_file = repo.get_contents(cot_path, ref=branch)
-            cot_data = yaml.safe_load(cot_file.decoded_content) or []
-            cot_data.append(cot_message)
-            commit_and_log(repo, cot_path, yaml.dump(cot_data), f"Append COT reopen note for {task_id}", task_id=task_id, committed_by=task_data["tasks"][task_id]["pod_owner"], branch=branch)
-        except:
-            commit_and_log(repo, cot_path, yaml.dump([cot_message]), f"Initialize COT for {task_id}", task_id=task_id, committed_by=task_data["tasks"][task_id]["pod_owner"], branch=branch)
+        append_task_log(repo, branch, task_id, "chain_of_thought", [cot_message], f"Append COT reopen note for {task_id}", committed_by=task_data["tasks"][task_id]["pod_owner"])
 
         return {"message": f"Task {task_id} reopened and note added to chain of thought."}
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
-async def handle_next_task(repo_name: str, pod_owner: Optional[str], branch: str = "unknown") -> dict:
-    """Retrieve next available task(s) for a Pod."""    
+async def handle_next_task(repo_name: str, pod_owner: Optional[str], limit: int = 10, refresh: bool = False, branch: str = "unknown") -> dict:
+    """Retrieve the next ready task(s) for a Pod: planned or backlog tasks whose dependencies are all done."""
     try:
         repo = get_repo(repo_name)
-        task_path = "project/task.yaml"
-        task_file = repo.get_contents(task_path, ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
-
-        # Filter tasks marked as planned or backlog and matching pod_owner (if provided)
-        candidates = [
-            {"task_id": tid, "description": t.get("description", ""), "status": t.get("status")}
-            for tid, t in task_data.get("tasks", {}).items()
-            if t.get("status") in ["planned", "backlog"] and (not pod_owner or t.get("pod_owner") == pod_owner)
-        ]
+        queue = load_ready_queue(repo, branch, refresh=bool(refresh))
+        candidates = queue.peek(pod_owner, limit=limit)
 
         if not candidates:
             return {"message": "No ready tasks found for this Pod."}
 
         return {
-            "message": f"Found {len(candidates)} task(s) for pod {pod_owner or 'any'}.",
+            "message": f"Found {queue.ready_count(pod_owner)} ready task(s) for pod {pod_owner or 'any'}; showing {len(candidates)}.",
             "tasks": candidates,
-            "next_step": "Choose a task_id and call /tasks/start to begin."
+            "next_step": "Call action 'claim' to reserve a task, then /tasks/start to begin."
+        }
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": str(e)})
+
+async def handle_claim_task(repo_name: str, pod_owner: str, task_id: Optional[str], ttl_seconds: int, branch: str) -> dict:
+    """Atomically reserve the best ready task (or a named one) for a Pod so no other Pod starts it."""
+    if not pod_owner:
+        raise HTTPException(status_code=400, detail="'pod_owner' is required for action 'claim'")
+    try:
+        repo = get_repo(repo_name)
+        queue = load_ready_queue(repo, branch)
+        lease = queue.claim(pod_owner, ttl_seconds, task_id=task_id)
+
+        if not lease:
+            if task_id:
+                return JSONResponse(status_code=409, content={"detail": f"Task {task_id} is not ready or is claimed by another pod."})
+            return {"message": f"No ready tasks to claim for pod {pod_owner}."}
+
+        return {
+            "message": f"Task {lease['task_id']} claimed by {pod_owner}.",
+            "task_id": lease["task_id"],
+            "claim_expires_at": datetime.utcfromtimestamp(lease["expires_at"]).isoformat(),
+            "next_step": f"Call /tasks/start with task_id: {lease['task_id']} and pod_owner: {pod_owner} before the claim expires."
         }
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
+async def handle_release_task(repo_name: str, task_id: str, pod_owner: Optional[str], branch: str) -> dict:
+    """Give up a claim so the task returns to the ready queue."""
+    repo = get_repo(repo_name)
+    queue = get_ready_queue(task_cache_key(repo, branch))
+    if not queue or not queue.release(task_id, pod_owner):
+        return JSONResponse(status_code=404, content={"detail": f"No active claim on task {task_id} for pod {pod_owner or 'any'}."})
+    return {"message": f"Claim on task {task_id} released."}
+
+class BatchOperationError(Exception):
+    pass
+
+def apply_lifecycle_operation(repo, task_data: dict, index: TaskIndex, op: dict, files: Dict[str, str], loaded: dict, branch: str) -> dict:
+    """
+    Apply one batch operation to the in-memory task_data. Side files (prompts, outputs,
+    traces, handoff notes) are staged in `files`; `loaded` caches files already read from
+    GitHub during this batch. `index` is the dependency index of task.yaml as read, used to find
+    downstream tasks (ones created in the batch start in backlog, so never need activating).
+    Raises BatchOperationError when the operation is invalid.
+    """
+    tasks = task_data.setdefault("tasks", {})
+    action = op.get("action")
+    task_id = op.get("task_id")
+    now = datetime.utcnow().isoformat()
+
+    def require_task(tid):
+        if not tid:
+            raise BatchOperationError("'task_id' is required")
+        if tid not in tasks:
+            raise BatchOperationError(f"Task {tid} not found")
+        return tasks[tid]
+
+    def read_yaml(path, default):
+        if path in files:
+            return yaml_load(files[path]) or default
+        if path not in loaded:
+            try:
+                loaded[path] = yaml_load(repo.get_contents(path, ref=branch).decoded_content)
+            except Exception:
+                loaded[path] = None
+        return deepcopy(loaded[path]) or default
+
+    if action == "activate":
+        task_ids = [task_id] if isinstance(task_id, str) else (task_id or [])
+        if not task_ids:
+            raise BatchOperationError("'task_id' is required")
+        for tid in task_ids:
+            require_task(tid)["status"] = "planned"
+        return {"action": action, "task_ids": task_ids}
+
+    if action == "start":
+        task = require_task(task_id)
+        task["status"] = "in_progress"
+        task["updated_at"] = now
+        if op.get("prompt_used"):
+            prompt_path = f"project/outputs/{task_id}/prompt_used.txt"
+            files[prompt_path] = op["prompt_used"]
+            task["prompt_used"] = prompt_path
+        return {"action": action, "task_id": task_id}
+
+    if action == "complete":
+        task = require_task(task_id)
+        task["status"] = "completed"
+        task["done"] = True
+        task["updated_at"] = now
+        for item in op.get("outputs") or []:
+            if not item.get("path") or "content" not in item:
+                raise BatchOperationError("each output needs 'path' and 'content'")
+            files[item["path"]] = item["content"]
+        if op.get("reasoning_trace"):
+            files[f"project/outputs/{task_id}/reasoning_trace.yaml"] = yaml_dump(op["reasoning_trace"])
+        if op.get("handoff_note"):
+            stage_task_log_append(repo, branch, task_id, "handoff_notes", [op["handoff_note"]], files, loaded.setdefault("task_logs", {}))
+        activated = []
+        for tid in index.direct_downstream(task_id, ("depends_on",)):
+            t = tasks.get(tid)
+            if t and t.get("status") == "unassigned":
+                t["status"] = "planned"
+                t["updated_at"] = now
+                activated.append(tid)
+        return {"action": action, "task_id": task_id, "activated_downstream": activated}
+
+    if action == "reopen":
+        task = require_task(task_id)
+        task["status"] = "in_progress"
+        task["done"] = False
+        task["updated_at"] = now
+        task["pod_owner"] = task.get("pod_owner") or "GPTPod"
+        stage_task_log_append(
+            repo, branch, task_id, "chain_of_thought",
+            [{"timestamp": now, "message": op.get("reason")}],
+            files, loaded.setdefault("task_logs", {})
+        )
+        return {"action": action, "task_id": task_id}
+
+    if action == "create":
+        phase, task_key = op.get("phase"), op.get("task_key")
+        if not phase or not task_key or not op.get("assigned_pod"):
+            raise BatchOperationError("'phase', 'task_key' and 'assigned_pod' are required")
+        new_task_id = task_id or f"{task_key}-{uuid.uuid4().hex[:6]}"
+        if new_task_id in tasks:
+            raise BatchOperationError(f"Task ID {new_task_id} already exists")
+        template_path = f"framework/task_templates/{phase}/{task_key}/task.yaml"
+        template = read_yaml(template_path, None)
+        if template is None:
+            raise BatchOperationError(f"Template {template_path} not found")
+        new_task = dict(template.get("task", {}))
+        new_task.update({
+            "assigned_pod": op["assigned_pod"],
+            "pod_owner": op["assigned_pod"],
+            "created_at": now,
+            "updated_at": None,
+            "done": False,
+            "status": "backlog",
+            "instance_of": template_path,
+            "prompt": f"framework/task_templates/{phase}/{task_key}/prompt_template.md"
+        })
+        tasks[new_task_id] = new_task
+        return {"action": action, "task_id": new_task_id}
+
+    if action == "clone":
+        original_task_id = op.get("original_task_id")
+        original = dict(require_task(original_task_id))
+        if not op.get("descriptor"):
+            raise BatchOperationError("'descriptor' is required")
+        new_task_id = f"{original_task_id}_clone_{op['descriptor']}"
+        if new_task_id in tasks:
+            raise BatchOperationError(f"Task ID {new_task_id} already exists")
+        original["status"] = "backlog"
+        original["created_at"] = now
+        original["updated_at"] = now
+        tasks[new_task_id] = original
+        return {"action": action, "task_id": new_task_id}
+
+    raise BatchOperationError(f"Unsupported batch action: {action}. Use one of {', '.join(BATCH_ACTIONS)}")
+
+async def handle_batch_lifecycle(repo_name: str, operations: List[dict], committed_by: Optional[str], dry_run: bool, branch: str) -> dict:
+    """Validate a list of lifecycle operations together and apply them as one task.yaml change and one commit."""
+    if not operations or not isinstance(operations, list):
+        raise HTTPException(status_code=400, detail="'operations' must be a non-empty list")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    malformed = [
+        {"index": position, "action": op.get("action") if isinstance(op, dict) else None,
+         "error": f"each operation must be an object with 'action' one of {', '.join(BATCH_ACTIONS)}"}
+        for position, op in enumerate(operations)
+        if not isinstance(op, dict) or op.get("action") not in BATCH_ACTIONS
+    ]
+    if malformed:
+        return JSONResponse(status_code=400, content={"detail": "Batch rejected; nothing was committed.", "errors": malformed})
+
+    try:
+        repo = get_repo(repo_name)
+        queue = get_ready_queue(task_cache_key(repo, branch))
+        claimed = [
+            {"index": position, "action": "start", "error": f"Task {op.get('task_id')} is claimed by {holder}"}
+            for position, op in enumerate(operations)
+            if queue and op["action"] == "start"
+            for holder in [queue.claimed_by_other(op.get("task_id"), op.get("pod_owner") or committed_by)] if holder
+        ]
+        if claimed:
+            return JSONResponse(status_code=409, content={"detail": "Batch rejected; nothing was committed.", "errors": claimed})
+
+        base_sha = branch_head_sha(repo, branch)
+        task_file = repo.get_contents(TASK_FILE_PATH, ref=base_sha)
+        task_data = load_task_data(repo, branch, task_file=task_file) or {}
+        index = load_task_index(repo, branch, task_file=task_file)
+
+        files: Dict[str, str] = {}
+        loaded: dict = {}
+        results, errors = [], []
+        for position, op in enumerate(operations):
+            try:
+                results.append(apply_lifecycle_operation(repo, task_data, index, op, files, loaded, branch))
+            except BatchOperationError as e:
+                errors.append({"index": position, "action": op["action"], "error": str(e)})
+
+        if errors:
+            return JSONResponse(status_code=400, content={"detail": "Batch rejected; nothing was committed.", "errors": errors})
+
+        if dry_run:
+            return {"message": f"Batch of {len(results)} operations is valid (dry run).", "results": results, "files": sorted(files) + [TASK_FILE_PATH]}
+
+        task_yaml = yaml_dump(task_data, sort_keys=False)
+        files[TASK_FILE_PATH] = task_yaml
+        commit_sha = commit_files(
+            repo,
+            files,
+            f"Batch lifecycle update: {len(results)} operations",
+            task_id="batch_lifecycle",
+            committed_by=committed_by or "GPTPod",
+            branch=branch,
+            base_sha=base_sha
+        )
+
+        def apply_batch(queue):
+            for result in results:
+                if result["action"] == "activate":
+                    queue.mark_planned(result["task_ids"])
+                elif result["action"] == "start":
+                    queue.mark_started(result["task_id"])
+                elif result["action"] == "complete":
+                    queue.mark_completed(result["task_id"])
+                    queue.mark_planned(result["activated_downstream"])
+                elif result["action"] == "reopen":
+                    queue.mark_reopened(result["task_id"])
+        if any(result["action"] in ("create", "clone") for result in results):
+            invalidate_ready_queue(task_cache_key(repo, branch))
+        else:
+            sync_ready_queue(repo, branch, task_file.sha, git_blob_sha(task_yaml), apply_batch)
+
+        return {
+            "message": f"Applied {len(results)} operations in one commit.",
+            "commit_sha": commit_sha,
+            "results": results,
+            "files_committed": sorted(files)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"Batch lifecycle failed: {type(e).__name__}: {e}"})
+
 async def handle_scale_out_task(repo_name: str, task_id: str, reason: Optional[str], handoff_note: Optional[dict], branch: str) -> dict:
     """Create a scaled-out instance of a task with optional handoff."""
     try:
@@ -1329,7 +2344,7 @@ async def handle_scale_out_task(repo_name: str, task_id: str, reason: Optional[s
         new_task["notes"] = reason
 
         task_data["tasks"][new_task_id] = new_task
-        updated_yaml = yaml.dump(task_data, sort_keys=False)
+        updated_yaml = yaml_dump(task_data, sort_keys=False)
 
         commit_and_log(
             repo,
@@ -1340,6 +2355,7 @@ async def handle_scale_out_task(repo_name: str, task_id: str, reason: Optional[s
             committed_by=pod_owner,
             branch=branch
         )
+        invalidate_ready_queue(task_cache_key(repo, branch))
 
         # Use provided handoff_note or generate default
         if not handoff_note:
@@ -1355,22 +2371,14 @@ async def handle_scale_out_task(repo_name: str, task_id: str, reason: Optional[s
             }
 
         # Store handoff note
-        handoff_path = f"project/outputs/{task_id}/handoff_notes.yaml"
-        try:
-            handoff_file = repo.get_contents(handoff_path)
-            handoff_data = yaml.safe_load(handoff_file.decoded_content) or {}
-        except:
-            handoff_data = {}
-
-        handoff_data.setdefault("handoffs", []).append(handoff_note)
-        commit_and_log(
+        append_task_log(
             repo,
-            file_path=handoff_path,
-            content=yaml.dump(handoff_data, sort_keys=False),
-            commit_message=f"Log scale handoff from {task_id} to {new_task_id}",
-            task_id=task_id,
-            committed_by=pod_owner,
-            branch=branch
+            branch,
+            task_id,
+            "handoff_notes",
+            [handoff_note],
+            f"Log scale handoff from {task_id} to {new_task_id}",
+            committed_by=pod_owner
         )
 
         return {
@@ -1418,7 +2426,7 @@ async def handle_create_task(repo_name: str, phase: str, task_key: str, task_id:
 
         # Add to task list
         task_data.setdefault("tasks", {})[task_id] = new_task
-        updated_yaml = yaml.dump(task_data, sort_keys=False)
+        updated_yaml = yaml_dump(task_data, sort_keys=False)
 
         # Commit task.yaml
         commit_and_log(
@@ -1430,6 +2438,7 @@ async def handle_create_task(repo_name: str, phase: str, task_key: str, task_id:
             committed_by=assigned_pod,
             branch=branch
         )
+        invalidate_ready_queue(task_cache_key(repo, branch))
 
         return {
             "message": f"Created new task {task_id} for pod {assigned_pod}.",
@@ -1455,13 +2464,6 @@ async def handle_append_handoff_note(
         ) -> dict:
     """Append a manual handoff note to a task."""
     repo = get_repo(repo_name)
-    file_path = f"project/outputs/{task_id}/handoff_notes.yaml"
-
-    try:
-        file = repo.get_contents(file_path, ref=branch)
-        handoff_data = yaml.safe_load(file.decoded_content) or {}
-    except Exception:
-        handoff_data = {}
 
     new_entry = {
         "timestamp": datetime.utcnow().isoformat(),
@@ -1475,30 +2477,43 @@ async def handle_append_handoff_note(
         "ways_of_working": ways_of_working
     }
 
-    handoff_data.setdefault("handoffs", []).append(new_entry)
-    updated_yaml = yaml.dump(handoff_data, sort_keys=False)
-
-    commit_and_log(repo, file_path, updated_yaml, f"Append handoff note to task {task_id}", task_id=task_id, committed_by=from_pod, branch=branch)
+    append_task_log(repo, branch, task_id, "handoff_notes", [new_entry], f"Append handoff note to task {task_id}", committed_by=from_pod)
 
     return {"message": "Handoff note appended", "note": new_entry}
 
-async def handle_fetch_handoff_note(repo_name: str, task_id: str, branch: str) -> dict:
-    """Fetch latest upstream handoff note."""
+async def handle_fetch_handoff_note(
+        repo_name: str,
+        task_id: str,
+        branch: str,
+        tail: Optional[int] = None,
+        since: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None) -> dict:
+    """
+    Fetch the latest upstream handoff note. With `tail`, `since` or `offset`/`limit`,
+    also return that slice of the upstream handoff history.
+    """
     repo = get_repo(repo_name)
-    task_path = "project/task.yaml"
     try:
-        task_file = repo.get_contents(task_path, ref=branch)
-        tasks = yaml.safe_load(task_file.decoded_content)
-        task = tasks.get("tasks", {}).get(task_id, {})
+        task = load_task_index(repo, branch).tasks.get(task_id, {})
         handoff_from = task.get("handoff_from")
         if not handoff_from:
             return {"message": "No handoff_from reference in task metadata."}
 
-        handoff_path = f"project/outputs/{handoff_from}/handoff_notes.yaml"
-        file = repo.get_contents(handoff_path, ref=branch)
-        notes_data = yaml.safe_load(file.decoded_content)
-        latest_note = notes_data.get("handoffs", [])[-1] if notes_data.get("handoffs") else None
-        return {"handoff_from": handoff_from, "handoff_note": latest_note}
+        if tail is None and since is None and not offset and limit is None:
+            latest = read_task_log(repo, branch, handoff_from, "handoff_notes", tail=1)
+            if not latest["total"]:
+                raise FileNotFoundError(f"No handoff notes logged for {handoff_from}")
+            return {"handoff_from": handoff_from, "handoff_note": latest["entries"][-1]}
+
+        history = read_task_log(repo, branch, handoff_from, "handoff_notes", tail=tail, offset=offset, limit=limit, since=since)
+        return {
+            "handoff_from": handoff_from,
+            "handoff_note": history["entries"][-1] if history["entries"] else None,
+            "handoff_notes": history["entries"],
+            "total": history["total"],
+            "offset": history["offset"]
+        }
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -1521,8 +2536,7 @@ async def handle_auto_handoff(
     """Execute full handoff between tasks with logging and guidance."""
     try:
         repo = get_repo(repo_name)
-        task_file = repo.get_contents("project/task.yaml", ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        task_data = load_task_data(repo, branch)
 
         if task_id not in task_data["tasks"] or next_task_id not in task_data["tasks"]:
             raise HTTPException(status_code=404, detail="One or both task IDs not found")
@@ -1539,7 +2553,7 @@ async def handle_auto_handoff(
         task_data["tasks"][next_task_id] = to_task
 
         # Commit task.yaml updates
-        updated_content = yaml.dump(task_data, sort_keys=False)
+        updated_content = yaml_dump(task_data, sort_keys=False)
         commit_and_log(
             repo,
             "project/task.yaml",
@@ -1549,6 +2563,7 @@ async def handle_auto_handoff(
             committed_by="auto_handoff",
             branch=branch
         )
+        invalidate_ready_queue(task_cache_key(repo, branch))
 
         # Create enriched handoff note
         handoff_note = {
@@ -1559,22 +2574,14 @@ async def handle_auto_handoff(
             "mode": handoff_mode
         }
 
-        output_path = f"project/outputs/{task_id}/handoff_notes.yaml"
-        try:
-            handoff_file = repo.get_contents(output_path, ref=branch)
-            handoff_data = yaml.safe_load(handoff_file.decoded_content) or {}
-        except:
-            handoff_data = {}
-
-        handoff_data.setdefault("handoffs", []).append(handoff_note)
-        commit_and_log(
+        append_task_log(
             repo,
-            output_path,
-            yaml.dump(handoff_data, sort_keys=False),
+            branch,
+            task_id,
+            "handoff_notes",
+            [handoff_note],
             f"Log handoff note from {task_id} to {next_task_id}",
-            task_id=task_id,
-            committed_by="auto_handoff",
-            branch=branch
+            committed_by="auto_handoff"
         )
 
         # Suggest next step to human or GPT
@@ -1597,18 +2604,9 @@ async def handle_append_chain_of_thought(
         issues: Optional[List[str]], 
         lessons: Optional[List[str]],
         branch: str) -> dict:
-    """Append a message, issue, or lesson to the task's chain_of_thought.yaml."""
+    """Append a message, issue, or lesson to the task's chain-of-thought log."""
     try:
         repo = get_repo(repo_name)
-        path = f"project/outputs/{task_id}/chain_of_thought.yaml"
-
-        try:
-            file = repo.get_contents(path, ref=branch)
-            data = yaml.safe_load(file.decoded_content) or []
-            sha = file.sha
-        except:
-            data = []
-            sha = None
 
         entry = {
             "message": message,
@@ -1621,18 +2619,15 @@ async def handle_append_chain_of_thought(
         if lessons:
             entry["lessons"] = lessons
 
-        data.append(entry)
-        content = yaml.dump(data, sort_keys=False)
-
-        pod_owner = get_pod_owner(repo, task_id)
-        commit_and_log(
+        pod_owner = get_pod_owner(repo, task_id, branch=branch)
+        append_task_log(
             repo,
-            path,
-            content,
+            branch,
+            task_id,
+            "chain_of_thought",
+            [entry],
             f"Append chain of thought to task {task_id}",
-            task_id=task_id,
-            committed_by=pod_owner,
-            branch=branch,
+            committed_by=pod_owner
         )
 
         return {"message": "Chain of thought appended.", "appended_thought": entry}
@@ -1640,17 +2635,24 @@ async def handle_append_chain_of_thought(
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Internal Server Error: {type(e).__name__}: {e}"})
 
-async def handle_fetch_chain_of_thought(repo_name: str, task_id: str, branch: str) -> dict:
-    """Fetch the full chain_of_thought.yaml for a task."""
+async def handle_fetch_chain_of_thought(
+        repo_name: str,
+        task_id: str,
+        branch: str,
+        tail: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        since: Optional[str] = None) -> dict:
+    """
+    Fetch a task's chain of thought: the whole log, the last `tail` thoughts, or an `offset`/`limit`
+    range, optionally only thoughts logged at or after `since`.
+    """
     try:
         repo = get_repo(repo_name)
-        path = f"project/outputs/{task_id}/chain_of_thought.yaml"
-
-        file = repo.get_contents(path, ref=branch)
-
-        
-        content = yaml.safe_load(file.decoded_content)
-        return {"task_id": task_id, "chain_of_thought": content or []}
+        log = read_task_log(repo, branch, task_id, "chain_of_thought", tail=tail, offset=offset, limit=limit, since=since)
+        if not log["total"]:
+            raise FileNotFoundError(f"No chain of thought logged for {task_id}")
+        return {"task_id": task_id, "chain_of_thought": log["entries"], "total": log["total"], "offset": log["offset"]}
 
     except Exception as e:
         return JSONResponse(status_code=404, content={"detail": f"Could not fetch chain of thought: {type(e).__name__}: {e}"})
@@ -1663,14 +2665,13 @@ async def handle_fetch_reasoning_trace(repo_name: str, task_id: str, full: Optio
 
         # Always return summary reasoning trace
         rt_file = repo.get_contents(f"{base_path}/reasoning_trace.yaml", ref=branch)
-        reasoning_trace = yaml.safe_load(rt_file.decoded_content) or {}
+        reasoning_trace = yaml_load(rt_file.decoded_content) or {}
 
         if not full:
             return {"task_id": task_id, "reasoning_trace": reasoning_trace}
 
         # If full = true, include prompt and chain of thought
         prompt_path = f"{base_path}/prompt_used.txt"
-        cot_path = f"{base_path}/chain_of_thought.yaml"
 
         try:
             prompt_file = repo.get_contents(prompt_path, ref=branch)
@@ -1679,8 +2680,7 @@ async def handle_fetch_reasoning_trace(repo_name: str, task_id: str, full: Optio
             prompt_text = None
 
         try:
-            cot_file = repo.get_contents(cot_path, ref=branch)
-            chain_of_thought = yaml.safe_load(cot_file.decoded_content) or []
+            chain_of_thought = read_task_log(repo, branch, task_id, "chain_of_thought")["entries"]
         except:
             chain_of_thought = []
 
@@ -1697,89 +2697,119 @@ async def handle_fetch_reasoning_trace(repo_name: str, task_id: str, full: Optio
         return JSONResponse(status_code=404, content={"detail": f"Could not fetch reasoning trace: {type(e).__name__}: {e}"})
 
 async def handle_reasoning_summary(repo_name: str, format: Optional[str], branch: str) -> dict:
-    """Return reasoning quality summary across all tasks. Supports 'csv' or JSON format."""
+    """Return reasoning quality summary across all tasks. Supports 'csv', 'ndjson' or JSON format."""
     try:
         repo = get_repo(repo_name)
-        task_path = "project/task.yaml"
-        task_file = repo.get_contents(task_path, ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content).get("tasks", {})
+        index = load_task_index(repo, branch)
+        rows = sync_trace_warehouse(repo, branch).summary_rows(repo.full_name, branch)
 
-        summary = []
-        for task_id in task_data:
-            trace_path = f"project/outputs/{task_id}/reasoning_trace.yaml"
-            try:
-                trace_file = repo.get_contents(trace_path, ref=branch)
-                trace = yaml.safe_load(trace_file.decoded_content) or {}
-                scoring = trace.get("scoring", {})
-                thoughts = trace.get("thoughts", [])
-                entry = {
-                    "task_id": task_id,
-                    "thought_quality": scoring.get("thought_quality"),
-                    "recall_used": scoring.get("recall_used"),
-                    "novel_insight": scoring.get("novel_insight"),
-                    "total_thoughts": len(thoughts),
-                    "improvement_opportunities": "; ".join(trace.get("improvement_opportunities", []))
-                }
-                summary.append(entry)
-            except:
-                continue
+        summary = (
+            rows[f"project/outputs/{task_id}/reasoning_trace.yaml"]
+            for task_id in index.tasks
+            if f"project/outputs/{task_id}/reasoning_trace.yaml" in rows
+        )
 
-        if format == "csv":
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=list(summary[0].keys()))
-            writer.writeheader()
-            writer.writerows(summary)
-            return Response(content=output.getvalue(), media_type="text/csv")
+        if format in ("csv", "ndjson"):
+            return export_response(SUMMARY_FIELDS, summary, format, "reasoning_summary")
 
+        summary = list(summary)
         return {"reasoning_summary": summary, "total_tasks_with_trace": len(summary)}
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Failed to summarize reasoning traces: {type(e).__name__}: {e}"})
 
-async def handle_list_tasks(repo_name: str, status: Optional[str], pod_owner: Optional[str], category: Optional[str], branch: str) -> dict:
-    """Return filtered list of tasks from task.yaml."""
+async def handle_list_tasks(
+    repo_name: str,
+    status: Optional[Union[str, List[str]]],
+    pod_owner: Optional[Union[str, List[str]]],
+    category: Optional[Union[str, List[str]]],
+    branch: str,
+    phase: Optional[Union[str, List[str]]] = None,
+    updated_since: Optional[str] = None,
+    fields: Optional[Union[str, List[str]]] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> dict:
+    """
+    Return filtered list of tasks from task.yaml.
+    Filters accept one value or a list; `fields` projects each task down to the named keys,
+    and `limit`/`cursor` page through the (optionally sorted) result.
+    """
     try:
-        task_path = "project/task.yaml"
-        task_data = fetch_yaml_from_github(repo_name, task_path, branch)
+        repo = get_repo(repo_name)
+        index = load_task_index(repo, branch)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching task.yaml: {e}")
 
-    tasks = task_data.get("tasks", {})
-    filtered_tasks = {}
-
-    for task_id, task in tasks.items():
-        if status and task.get("status") != status:
-            continue
-        if pod_owner and task.get("pod_owner") != pod_owner:
-            continue
-        if category and task.get("category") != category:
-            continue
-        filtered_tasks[task_id] = task
+    filters = {
+        field: values for field, values in (
+            ("status", as_value_list(status)),
+            ("pod_owner", as_value_list(pod_owner)),
+            ("category", as_value_list(category)),
+            ("phase", as_value_list(phase))
+        ) if values
+    }
+    task_ids = index.select(filters, updated_since=updated_since, sort_by=sort_by, descending=bool(descending))
+    paged = paginate_ids(task_ids, limit, cursor, index.version)
+    fields = as_value_list(fields)
 
-    return {"tasks": filtered_tasks}
+    return {
+        "tasks": {tid: project_task(index.tasks[tid], fields) for tid in paged["page"]},
+        "total": paged["total"],
+        "next_cursor": paged["next_cursor"],
+        "cursor_stale": paged["cursor_stale"]
+    }
 
-async def handle_list_phases(repo_name: str, branch: str) -> dict:
-    """Return all tasks grouped by SDLC phase."""
+async def handle_list_phases(
+    repo_name: str,
+    branch: str,
+    status: Optional[Union[str, List[str]]] = None,
+    pod_owner: Optional[Union[str, List[str]]] = None,
+    phase: Optional[Union[str, List[str]]] = None,
+    fields: Optional[Union[str, List[str]]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> dict:
+    """
+    Return tasks grouped by SDLC phase. Each entry carries status, pod_owner and description
+    unless `fields` narrows it; `limit`/`cursor` page over tasks, not phases. `total_phases`
+    and `total_tasks` count every match, not just the page.
+    """
     try:
         repo = get_repo(repo_name)
-        task_file = repo.get_contents("project/task.yaml", ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content).get("tasks", {})
+        index = load_task_index(repo, branch)
+
+        filters = {
+            field: values for field, values in (
+                ("status", as_value_list(status)),
+                ("pod_owner", as_value_list(pod_owner)),
+                ("phase", as_value_list(phase))
+            ) if values
+        }
+        task_ids = [tid for tid in index.select(filters) if not tid.startswith("0.")]
+        paged = paginate_ids(task_ids, limit, cursor, index.version)
+        fields = as_value_list(fields) or ["status", "pod_owner", "description"]
 
         phases = {}
-        for task_id, task in task_data.items():
-            if task_id.startswith("0."):
-                continue
-            phase = task.get("phase", "Unspecified Phase")
-            if phase not in phases:
-                phases[phase] = []
-            phases[phase].append({
-                "task_id": task_id,
-                "status": task.get("status"),
-                "pod_owner": task.get("pod_owner"),
-                "description": task.get("description")
-            })
+        for task_id in paged["page"]:
+            task = index.tasks[task_id]
+            phase_name = task.get("phase", "Unspecified Phase")
+            entry = {"task_id": task_id}
+            entry.update({f: task.get(f) for f in fields if f != "task_id"})
+            phases.setdefault(phase_name, []).append(entry)
+
+        return {
+            "phases": phases,
+            "total_phases": len({index.tasks[tid].get("phase", "Unspecified Phase") for tid in task_ids}),
+            "total_tasks": paged["total"],
+            "next_cursor": paged["next_cursor"],
+            "cursor_stale": paged["cursor_stale"]
+        }
 
-        return {"phases": phases, "total_phases": len(phases)}
+    except HTTPException:
+        raise
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Failed to list task phases: {type(e).__name__}: {e}"})
@@ -1788,28 +2818,22 @@ async def handle_task_graph(repo_name: str, branch: str) -> dict:
     """Return structured task dependency graph."""
     try:
         repo = get_repo(repo_name)
-        task_file = repo.get_contents("project/task.yaml", ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content).get("tasks", {})
-
-        nodes = []
-        edges = []
+        index = load_task_index(repo, branch)
 
-        for task_id, task in task_data.items():
-            nodes.append({
+        nodes = [
+            {
                 "id": task_id,
                 "label": f"{task_id} ({task.get('status')})",
                 "pod_owner": task.get("pod_owner"),
                 "description": task.get("description")
-            })
-            for dep in task.get("depends_on", []):
-                edges.append({"source": dep, "target": task_id, "type": "depends_on"})
-            if task.get("handoff_from"):
-                edges.append({"source": task["handoff_from"], "target": task_id, "type": "handoff"})
+            }
+            for task_id, task in index.tasks.items()
+        ]
 
         return {
             "graph": {
                 "nodes": nodes,
-                "edges": edges
+                "edges": index.edges
             },
             "total_tasks": len(nodes),
             "note": "This graph is structured for GPT or client rendering — edges show 'depends_on' and 'handoff' relations."
@@ -1822,34 +2846,106 @@ async def handle_task_dependencies(repo_name: str, task_id: str, branch: str) ->
     """Return upstream and downstream dependencies for a task."""
     try:
         repo = get_repo(repo_name)
-        task_path = "project/task.yaml"
-        task_file = repo.get_contents(task_path, ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content).get("tasks", {})
+        index = load_task_index(repo, branch)
 
-        if task_id not in task_data:
+        if task_id not in index.tasks:
             raise HTTPException(status_code=404, detail="Task not found")
 
-        # Direct upstream
-        upstream = task_data[task_id].get("depends_on", [])
+        return {
+            "task_id": task_id,
+            "upstream": index.direct_upstream(task_id, ("depends_on",)),
+            "downstream": index.direct_downstream(task_id, ("depends_on",))
+        }
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"Failed to get task dependencies: {type(e).__name__}: {e}"})
+
+async def handle_transitive_dependencies(repo_name: str, task_id: str, direction: str, edge_types: Optional[List[str]], branch: str) -> dict:
+    """Return every task reachable upstream or downstream of a task, with its distance."""
+    edge_types = parse_edge_types(edge_types)
+    if not task_id:
+        raise HTTPException(status_code=400, detail=f"'task_id' is required for mode '{direction}'")
+    try:
+        repo = get_repo(repo_name)
+        index = load_task_index(repo, branch)
 
-        # Direct downstream: any task that depends on this one
-        downstream = [tid for tid, t in task_data.items() if task_id in t.get("depends_on", [])]
+        if task_id not in index.tasks:
+            raise HTTPException(status_code=404, detail=f"Task ID {task_id} not found.")
+
+        if direction == "upstream":
+            related = index.transitive_upstream(task_id, edge_types)
+        else:
+            related = index.transitive_downstream(task_id, edge_types)
+
+        for entry in related:
+            entry["status"] = index.tasks.get(entry["task_id"], {}).get("status")
 
         return {
             "task_id": task_id,
-            "upstream": upstream,
-            "downstream": downstream
+            "direction": direction,
+            "edge_types": list(edge_types),
+            direction: related,
+            "total": len(related)
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        return JSONResponse(status_code=500, content={"detail": f"Failed to get task dependencies: {type(e).__name__}: {e}"})
+        return JSONResponse(status_code=500, content={"detail": f"Failed to resolve {direction} tasks: {type(e).__name__}: {e}"})
+
+async def handle_topological_order(repo_name: str, edge_types: Optional[List[str]], branch: str) -> dict:
+    """Return tasks in dependency order; tasks stuck behind a cycle are listed separately."""
+    edge_types = parse_edge_types(edge_types)
+    try:
+        repo = get_repo(repo_name)
+        index = load_task_index(repo, branch)
+        result = index.topological_order(edge_types)
+        return {
+            **result,
+            "missing_references": index.missing_references(),
+            "total_tasks": len(index.tasks)
+        }
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"Failed to order tasks: {type(e).__name__}: {e}"})
+
+async def handle_critical_path(repo_name: str, edge_types: Optional[List[str]], weight_field: Optional[str], remaining_only: bool, branch: str) -> dict:
+    """Return the longest dependency chain, weighted by an optional numeric task field."""
+    edge_types = parse_edge_types(edge_types)
+    try:
+        repo = get_repo(repo_name)
+        index = load_task_index(repo, branch)
+        result = index.critical_path(edge_types, weight_field=weight_field, remaining_only=bool(remaining_only))
+        return {
+            "critical_path": [
+                {"task_id": tid, "status": index.tasks[tid].get("status"), "pod_owner": index.tasks[tid].get("pod_owner")}
+                for tid in result["path"]
+            ],
+            "length": result["length"],
+            "weight_field": weight_field or "task_count",
+            "remaining_only": bool(remaining_only)
+        }
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"Failed to compute critical path: {type(e).__name__}: {e}"})
+
+async def handle_task_cycles(repo_name: str, edge_types: Optional[List[str]], branch: str) -> dict:
+    """Detect dependency cycles in task.yaml."""
+    edge_types = parse_edge_types(edge_types)
+    try:
+        repo = get_repo(repo_name)
+        index = load_task_index(repo, branch)
+        cycles = index.cycles(edge_types)
+        return {"cycles": cycles, "has_cycles": bool(cycles), "total_cycles": len(cycles)}
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"Failed to detect cycles: {type(e).__name__}: {e}"})
 
 async def handle_get_task_details(repo_name: str, task_id: str, branch: str) -> dict:
     """Return full metadata for a specific task."""
     try:
         repo = get_repo(repo_name)
-        task_file = repo.get_contents("project/task.yaml", ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        task_data = load_task_data(repo, branch)
         tasks = task_data.get("tasks", {})
         if task_id not in tasks:
             raise HTTPException(status_code=404, detail=f"Task ID {task_id} not found.")
@@ -1863,7 +2959,7 @@ async def handle_activate_task(repo_name: str, task_id: Union[str, List[str]], b
         repo = get_repo(repo_name)
         task_path = "project/task.yaml"
         task_file = repo.get_contents(task_path, ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        task_data = load_task_data(repo, branch, task_file=task_file)
 
         if isinstance(task_id, str):
             task_ids = [task_id]
@@ -1877,8 +2973,9 @@ async def handle_activate_task(repo_name: str, task_id: Union[str, List[str]], b
             task_data["tasks"][t_id]["status"] = "planned"
             planned_tasks[t_id] = task_data["tasks"][t_id]
 
-        pod_owner = get_pod_owner(repo, task_id)
-        commit_and_log(repo, task_path, yaml.dump(task_data), f"Planned tasks {task_ids}", task_id=task_id, committed_by=pod_owner, branch=branch)
+        pod_owner = get_pod_owner(repo, task_ids[0], branch=branch)
+        new_sha = commit_and_log(repo, task_path, yaml_dump(task_data), f"Planned tasks {task_ids}", task_id=task_ids[0], committed_by=pod_owner, branch=branch)
+        sync_ready_queue(repo, branch, task_file.sha, new_sha, lambda q: q.mark_planned(task_ids))
 
         response = {
             "message": f"Tasks {task_ids} successfully planned.",
@@ -1923,12 +3020,11 @@ async def handle_validate_changelog(repo_name: str, dry_run: bool, branch: str):
     """Validate and optionally backfill missing changelog entries."""
     try:
         repo = get_repo(repo_name)
-        task_file = repo.get_contents("project/task.yaml", ref=branch)
-        tasks = yaml.safe_load(task_file.decoded_content).get("tasks", {})
+        tasks = load_task_data(repo, branch).get("tasks", {})
 
         try:
             changelog_file = repo.get_contents("project/outputs/changelog.yaml", ref=branch)
-            changelog = yaml.safe_load(changelog_file.decoded_content) or []
+            changelog = yaml_load(changelog_file.decoded_content) or []
         except Exception:
             changelog = []
 
@@ -2017,13 +3113,13 @@ async def fetch_next_linked_task(
 ):
     try:
         repo = get_repo(repo_name)
-        task_file = repo.get_contents("task.yaml", ref=branch)
-        task_data = yaml.safe_load(task_file.decoded_content)
+        index = load_task_index(repo, branch)
 
-        next_tasks = []
-        for tid, t in task_data.get("tasks", {}).items():
-            if t.get("depends_on") and task_id in t["depends_on"]:
-                next_tasks.append({"task_id": tid, **t})
+        next_tasks = [
+            {"task_id": tid, **index.tasks[tid]}
+            for tid in index.direct_downstream(task_id, ("depends_on",))
+            if tid in index.tasks
+        ]
 
         return {"linked_tasks": next_tasks}
 
@@ -2034,7 +3130,7 @@ async def fetch_next_linked_task(
 
 
 @app.post("/memory/manage")
-async def manage_memory(background_tasks: BackgroundTasks, payload: dict = Body(...)):
+async def manage_memory(payload: dict = Body(...)):
     action = payload.get("action")
     if not action:
         raise HTTPException(status_code=400, detail="Missing 'action' field.")
@@ -2042,8 +3138,17 @@ async def manage_memory(background_tasks: BackgroundTasks, payload: dict = Body(
     if action == "add":
         return await handle_add_to_memory(payload)
     elif action == "index":
-        background_tasks.add_task(handle_index_memory, payload)
-        return {"message": "Indexing started in the background.  Check memory index on GitHub in /project/memory.yaml for updates."}
+        if not payload.get("repo_name") or not payload.get("branch"):
+            raise HTTPException(status_code=400, detail="'repo_name' and 'branch' are required for action 'index'")
+        job = JOBS.submit(
+            "memory_index", handle_index_memory, payload,
+            params={"repo_name": payload["repo_name"], "branch": payload["branch"], "base_paths": payload.get("base_paths") or []}
+        )
+        return {
+            "message": "Indexing started in the background. Follow its progress at status_url.",
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}"
+        }
     elif action == "diff":
         return await handle_diff_memory_files(payload)
     elif action == "validate":
@@ -2115,80 +3220,90 @@ async def manage_memory_entry(payload: dict = Body(...)):
 
     raise HTTPException(status_code=400, detail=f"Unsupported action: {action}")
 
-def handle_index_memory(payload: dict) -> dict:
-    """Index new files in specified base paths into memory.yaml."""
+def handle_index_memory(payload: dict, job: Optional[Job] = None) -> dict:
+    """Index new files in specified base paths into memory.yaml. Runs as a job; errors fail the job."""
     repo_name = payload.get("repo_name")
     base_paths = payload.get("base_paths")
     branch = payload.get("branch")
 
     if not repo_name or not branch:
         raise HTTPException(status_code=400, detail="'repo_name' and 'branch' are required for action 'index'")
-    
+
+    repo = get_repo(repo_name)
+    memory_path = "project/memory.yaml"
     try:
-        repo = get_repo(repo_name)
-        memory_path = "project/memory.yaml"
+        memory_file = repo.get_contents(memory_path, ref=branch)
+        memory = yaml_load(memory_file.decoded_content) or []
+    except Exception:
+        memory = []
+
+    memory_paths = set(entry.get("path") for entry in memory)
+    base_paths = base_paths or []
+    new_entries_count = 0  # Counter for new entries
+    if job:
+        job.update(stage="scan", files_seen=0, files_indexed=0)
+
+    def recurse_files(path):
+        nonlocal new_entries_count
+        entries = repo.get_contents(path)
+        if not isinstance(entries, list):
+            entries = [entries]
+        for entry in entries:
+            if job:
+                job.check_cancelled()
+            if entry.type == "file":
+                file_path = entry.path
+                if job:
+                    job.advance("files_seen")
+                try:
+                    file_content = repo.get_contents(file_path, ref=branch).decoded_content.decode("utf-8")
+                except UnicodeDecodeError:
+                    continue
+
+                if file_path not in memory_paths:
+                    meta = describe_file_for_memory(file_path, file_content)
+                    memory.append({
+                        "path": file_path,
+                        "raw_url": entry.download_url,
+                        "file_type": entry.name.split(".")[-1] if "." in entry.name else "unknown",
+                        "description": meta["description"],
+                        "tags": meta["tags"],
+                        "last_updated": datetime.utcnow().date().isoformat(),
+                        "pod_owner": meta["pod_owner"]
+                    })
+                    new_entries_count += 1
+                    if job:
+                        job.advance("files_indexed")
+                else:
+                    for existing in memory:
+                        if existing.get("path") == file_path:
+                            if not existing.get("description") or not existing.get("tags") or not existing.get("pod_owner"):
+                                meta = describe_file_for_memory(file_path, file_content)
+                                existing["description"] = meta["description"]
+                                existing["tags"] = meta["tags"]
+                                existing["pod_owner"] = meta["pod_owner"]
+                                existing["last_updated"] = datetime.utcnow().date().isoformat()
+                                if job:
+                                    job.advance("files_indexed")
+                            break
+            elif entry.type == "dir":
+                recurse_files(entry.path)
+
+    for base_path in base_paths:
         try:
-            memory_file = repo.get_contents(memory_path, ref=branch)
-            memory = yaml.safe_load(memory_file.decoded_content) or []
+            recurse_files(base_path)
+        except JobCancelled:
+            raise
         except Exception:
-            memory = []
-
-        memory_paths = set(entry.get("path") for entry in memory)
-        base_paths = base_paths or []
-        new_entries_count = 0  # Counter for new entries
-
-        def recurse_files(path):
-            nonlocal new_entries_count
-            entries = repo.get_contents(path)
-            if not isinstance(entries, list):
-                entries = [entries]
-            for entry in entries:
-                if entry.type == "file":
-                    file_path = entry.path
-                    try:
-                        file_content = repo.get_contents(file_path, ref=branch).decoded_content.decode("utf-8")
-                    except UnicodeDecodeError:
-                        continue
-
-                    if file_path not in memory_paths:
-                        meta = describe_file_for_memory(file_path, file_content)
-                        memory.append({
-                            "path": file_path,
-                            "raw_url": entry.download_url,
-                            "file_type": entry.name.split(".")[-1] if "." in entry.name else "unknown",
-                            "description": meta["description"],
-                            "tags": meta["tags"],
-                            "last_updated": datetime.utcnow().date().isoformat(),
-                            "pod_owner": meta["pod_owner"]
-                        })
-                        new_entries_count += 1
-                    else:
-                        for existing in memory:
-                            if existing.get("path") == file_path:
-                                if not existing.get("description") or not existing.get("tags") or not existing.get("pod_owner"):
-                                    meta = describe_file_for_memory(file_path, file_content)
-                                    existing["description"] = meta["description"]
-                                    existing["tags"] = meta["tags"]
-                                    existing["pod_owner"] = meta["pod_owner"]
-                                    existing["last_updated"] = datetime.utcnow().date().isoformat()
-                                break
-                elif entry.type == "dir":
-                    recurse_files(entry.path)
-
-        for base_path in base_paths:
-            try:
-                recurse_files(base_path)
-            except Exception:
-                continue
-
-        memory_content = yaml.dump(memory, sort_keys=False)
-        commit_and_log(repo, memory_path, memory_content, f"Indexed {len(memory)} memory entries", task_id="memory_index", committed_by="memory_indexer", branch=branch)
+            continue
 
-        return {"message": f"Memory indexed with {len(memory)} entries, including {new_entries_count} new entries."}
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"detail": str(e)})
+    if job:
+        job.check_cancelled()
+        job.update(stage="commit")
+    memory_content = yaml_dump(memory, sort_keys=False)
+    commit_and_log(repo, memory_path, memory_content, f"Indexed {len(memory)} memory entries", task_id="memory_index", committed_by="memory_indexer", branch=branch)
 
-        
+    return {"message": f"Memory indexed with {len(memory)} entries, including {new_entries_count} new entries."}
 
 async def handle_diff_memory_files(payload: dict) -> dict:
     """Detect missing memory entries by comparing to GitHub files."""
@@ -2203,7 +3318,7 @@ async def handle_diff_memory_files(payload: dict) -> dict:
         try:
             memory_path = "project/memory.yaml"
             memory_file = repo.get_contents(memory_path, ref=branch)
-            memory = yaml.safe_load(memory_file.decoded_content) or []
+            memory = yaml_load(memory_file.decoded_content) or []
         except Exception:
             memory = []
 
@@ -2240,7 +3355,7 @@ async def handle_add_to_memory(payload: dict) -> dict:
         memory_path = "project/memory.yaml"
         try:
             memory_file = repo.get_contents(memory_path, ref=branch)
-            memory = yaml.safe_load(memory_file.decoded_content) or []
+            memory = yaml_load(memory_file.decoded_content) or []
         except Exception:
             memory = []
 
@@ -2264,7 +3379,7 @@ async def handle_add_to_memory(payload: dict) -> dict:
                 continue
                     
         memory.extend(new_entries)
-        memory_content = yaml.dump(memory, sort_keys=False)
+        memory_content = yaml_dump(memory, sort_keys=False)
 
         commit_and_log(
             repo,
@@ -2294,7 +3409,7 @@ async def handle_validate_memory_files(payload: dict) -> dict:
         try:
             memory_path = "project/memory.yaml"
             memory_file = repo.get_contents(memory_path, ref=branch)
-            memory = yaml.safe_load(memory_file.decoded_content) or []
+            memory = yaml_load(memory_file.decoded_content) or []
         except Exception:
             memory = []
 
@@ -2328,7 +3443,7 @@ def handle_search_memory(repo_name: str, keyword: str, branch: str) -> dict:
         try:
             memory_path = "project/memory.yaml"
             memory_file = repo.get_contents(memory_path, ref=branch)
-            memory = yaml.safe_load(memory_file.decoded_content) or []
+            memory = yaml_load(memory_file.decoded_content) or []
         except Exception:
             memory = []
 
@@ -2362,7 +3477,7 @@ async def handle_update_entry(
         repo = get_repo(repo_name)
         memory_path = "project/memory.yaml"
         memory_file = repo.get_contents(memory_path, ref=branch)
-        memory = yaml.safe_load(memory_file.decoded_content) or []
+        memory = yaml_load(memory_file.decoded_content) or []
         memory_sha = memory_file.sha
 
         found = False
@@ -2381,7 +3496,7 @@ async def handle_update_entry(
         if not found:
             return JSONResponse(status_code=404, content={"detail": f"Path '{path}' not found in memory."})
 
-        updated_content = yaml.dump(memory, sort_keys=False)
+        updated_content = yaml_dump(memory, sort_keys=False)
         commit_and_log(repo, memory_path, updated_content, f"Update memory metadata for {path}", branch=branch)
 
         return {"message": f"Memory entry updated for {path}"}
@@ -2399,14 +3514,14 @@ async def handle_remove_entry(
         repo = get_repo(repo_name)
         memory_path = "project/memory.yaml"
         memory_file = repo.get_contents(memory_path, ref=branch)
-        memory = yaml.safe_load(memory_file.decoded_content) or []
+        memory = yaml_load(memory_file.decoded_content) or []
         memory_sha = memory_file.sha
 
         updated = [entry for entry in memory if entry.get("path") != path]
         if len(updated) == len(memory):
             return JSONResponse(status_code=404, content={"detail": f"Path '{path}' not found in memory."})
 
-        updated_content = yaml.dump(updated, sort_keys=False)
+        updated_content = yaml_dump(updated, sort_keys=False)
         repo.update_file(memory_path, f"Remove memory entry for {path}", updated_content, memory_sha, branch=branch)
 
         return {"message": f"Memory entry for {path} removed"}
@@ -2428,7 +3543,7 @@ def handle_list_memory_entries(
         repo = get_repo(repo_name)
         memory_path = "project/memory.yaml"
         memory_file = repo.get_contents(memory_path, ref=branch)
-        memory = yaml.safe_load(memory_file.decoded_content) or []
+        memory = yaml_load(memory_file.decoded_content) or []
 
         results = [
             entry for entry in memory
@@ -2454,7 +3569,7 @@ def handle_memory_summary(repo_name: str, branch: str) -> dict:
         repo = get_repo(repo_name)
         memory_path = "project/memory.yaml"
         memory_file = repo.get_contents(memory_path, ref=branch)
-        memory = yaml.safe_load(memory_file.decoded_content) or []
+        memory = yaml_load(memory_file.decoded_content) or []
 
         return {
             "count": len(memory),
@@ -2472,7 +3587,7 @@ def handle_get_memory_stats(repo_name: str, branch: str = "unknown") -> dict:
         repo = get_repo(repo_name)
         memory_path = "project/memory.yaml"
         memory_file = repo.get_contents(memory_path, ref=branch)
-        memory = yaml.safe_load(memory_file.decoded_content) or []
+        memory = yaml_load(memory_file.decoded_content) or []
 
         total = len(memory)
         missing_meta = [m for m in memory if not m.get("description") or not m.get("tags") or not m.get("pod_owner")]
@@ -2493,6 +3608,11 @@ def handle_get_memory_stats(repo_name: str, branch: str = "unknown") -> dict:
 
 # ---- Metrics ----
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Runtime instrumentation in Prometheus text exposition format."""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 @app.post("/system/metrics")
 async def fetch_metrics(payload: dict = Body(...)):
     mode = payload.get("mode")
@@ -2507,23 +3627,112 @@ async def fetch_metrics(payload: dict = Body(...)):
         return await handle_metrics_summary(repo_name=repo_name, branch=branch)
     elif mode == "export":
         return await handle_metrics_export(repo_name=repo_name, format=format, branch=branch)
+    elif mode == "repair":
+        return await handle_metrics_repair(repo_name=repo_name, branch=branch)
+    elif mode == "history":
+        return await handle_metrics_history(
+            repo_name=repo_name,
+            branch=branch,
+            start=payload.get("start"),
+            end=payload.get("end"),
+            step=payload.get("step", "day")
+        )
 
     raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
 
 
+async def handle_metrics_repair(repo_name: str, branch: str):
+    """Recompute the running metrics aggregates from task.yaml and every reasoning trace."""
+    try:
+        return {"metrics": generate_metrics_summary(repo_name, branch, repair=True), "repaired": True}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"Metrics repair failed: {type(e).__name__}: {e}"})
+
+def metric_values(summary: dict) -> Dict[str, float]:
+    """The numeric quantitative and qualitative fields of a metrics summary, flattened."""
+    return {
+        key: value
+        for section in ("quantitative", "qualitative")
+        for key, value in (summary.get(section) or {}).items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+def parse_history_time(value, default: float) -> float:
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid timestamp: {value}")
+    return parsed.timestamp() if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc).timestamp()
+
+async def handle_metrics_history(repo_name: str, branch: str, start=None, end=None, step="day"):
+    """
+    Metric snapshots for `branch` between `start` and `end` (ISO timestamps; default the last
+    90 days), reduced to one point per `step` (hour, day, week or seconds), with velocity and
+    burndown series derived from them.
+    """
+    if step in HISTORY_STEPS:
+        step_seconds = HISTORY_STEPS[step]
+    elif isinstance(step, (int, float)) and not isinstance(step, bool) and step > 0:
+        step_seconds = float(step)
+    else:
+        raise HTTPException(status_code=400, detail=f"Invalid step: {step}. Use hour, day, week or a number of seconds.")
+
+    now = time.time()
+    end_ts = parse_history_time(end, now)
+    start_ts = parse_history_time(start, end_ts - 90 * 24 * 3600)
+    if start_ts > end_ts:
+        raise HTTPException(status_code=400, detail="'start' must not be after 'end'")
+
+    try:
+        repo = get_repo(repo_name)
+        points = get_metrics_history(METRICS_HISTORY_PATH).series(repo.full_name, branch, start_ts, end_ts, step_seconds)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"Metrics history failed: {type(e).__name__}: {e}"})
+
+    def iso(ts: float) -> str:
+        return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+    return {
+        "start": iso(start_ts),
+        "end": iso(end_ts),
+        "step_seconds": step_seconds,
+        "points": [{"timestamp": iso(p["ts"]), **p["values"]} for p in points],
+        "velocity": [{"timestamp": iso(v["ts"]), "completed": v["completed"]} for v in velocity(points)],
+        "burndown": [{"timestamp": iso(b["ts"]), "total": b["total"], "remaining": b["remaining"]} for b in burndown(points)]
+    }
+
 async def handle_metrics_summary(repo_name: str, branch: str):
     """Return high-level metrics summary for reasoning and delivery."""
     summary = generate_metrics_summary(repo_name, branch)
     reasoning_summary = generate_project_reasoning_summary(repo_name, branch)
     summary["reasoning_summary"] = reasoning_summary
 
-    # Write to metrics report file
+    repo = get_repo(repo_name)
+    try:
+        get_metrics_history(METRICS_HISTORY_PATH).record(repo.full_name, branch, metric_values(summary))
+    except Exception as e:
+        logger.warning(f"Could not record metrics history for {repo.full_name}@{branch}: {e}")
+
+    # Write to metrics report file, unless the numbers match the last report written
+    warehouse = get_trace_warehouse(TRACE_WAREHOUSE_PATH)
+    digest = hashlib.sha256(
+        json.dumps({k: v for k, v in summary.items() if k != "timestamp"}, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    last_report = warehouse.last_report(repo.full_name, branch)
+    if last_report and last_report["digest"] == digest:
+        summary["report_path"] = last_report["path"]
+        return summary
+
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     metrics_path = f"project/outputs/reports/metrics_report_{timestamp}.yaml"
-    metrics_content = yaml.dump(summary, sort_keys=False)
+    metrics_content = yaml_dump(summary, sort_keys=False)
 
     commit_and_log(
-        get_repo(repo_name),
+        repo,
         metrics_path,
         metrics_content,
         "Log project metrics report",
@@ -2531,49 +3740,115 @@ async def handle_metrics_summary(repo_name: str, branch: str):
         committed_by="MetricsBot",
         branch=branch
     )
+    warehouse.record_report(repo.full_name, branch, digest, metrics_path)
 
+    summary["report_path"] = metrics_path
     return summary
 
 
 async def handle_metrics_export(repo_name: str, format: str, branch: str):
-    """Export full metrics report in requested format (json or csv)."""
+    """
+    Export every reasoning trace in the fixed EXPORT_FIELDS schema. `csv` and `ndjson` stream one
+    record at a time as traces are read; `json` returns them in a single body. The warehouse is
+    synced before any response starts, so a failed sync is a 500 rather than a short export.
+    """
+    repo = get_repo(repo_name)
     try:
-        trace_paths = list_files_from_github(repo_name, REASONING_FOLDER_PATH, recursive=True, branch=branch)
+        warehouse = sync_trace_warehouse(repo, branch)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to list files from branch {branch}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to sync reasoning traces from branch {branch}: {str(e)}")
 
-    exported = []
-
-    for path in trace_paths:
-        if path.endswith("reasoning_trace.yaml"):
-            try:
-                trace = fetch_yaml_from_github(repo_name, path, branch)
-                if isinstance(trace, dict):
-                    exported.append({"task_id": trace.get("task_id", path.split("/")[-2]), **trace})
-            except Exception:
-                continue  # skip problematic trace
-
-    if format == "csv":
-        if not exported:
-            return StreamingResponse(io.StringIO("No entries to export."), media_type="text/csv")
-
-        keys = sorted(set().union(*(d.keys() for d in exported)))
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=keys)
-        writer.writeheader()
-        writer.writerows(exported)
-        output.seek(0)
-        return StreamingResponse(
-            output,
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=metrics_export.csv"}
-        )
+    if format in ("csv", "ndjson"):
+        return export_response(EXPORT_FIELDS, exported_traces(warehouse, repo, branch), format, "metrics_export")
 
-    return {"entries": exported, "count": len(exported)}
+    exported = [export_record(trace) for trace in warehouse.iter_traces(repo.full_name, branch)]
+    return {"entries": exported, "count": len(exported), "fields": list(EXPORT_FIELDS)}
 
 
 # ---- Git Rollback ----
 
+ROLLBACK_LOG_PATH = "project/.logs/reverted_commits.yaml"
+# Files the service rewrites on every commit; a rollback leaves them alone unless asked for by path.
+ROLLBACK_SKIPPED_PATHS = (CHANGELOG_PATH, ROLLBACK_LOG_PATH, TASK_SNAPSHOT_PATH)
+
+def commit_diff(repo, commit_sha: str) -> dict:
+    """
+    A commit's changes against its first parent, from one commit read (more only past 300 files).
+    Full shas are cached under the (`<sha>^`, sha) pair, so a preview and the rollback after it
+    read the commit once between them.
+    """
+    if is_full_sha(commit_sha):
+        entry = cached_diff(repo.full_name, f"{commit_sha}^", commit_sha)
+        CACHE_LOOKUPS.inc(cache="commit_diff", result="miss" if entry is None else "hit")
+        if entry is not None:
+            return entry
+    commit = repo.get_commit(commit_sha)
+    files = [diff_entry(f.raw_data) for f in commit.files]
+    entry = {
+        "base_sha": commit.parents[0].sha if commit.parents else None,
+        "head_sha": commit.sha,
+        "commits": 1,
+        "files": files,
+        "files_truncated": len(files) >= COMMIT_FILES_LIMIT,
+    }
+    remember_diff(repo.full_name, f"{commit.sha}^", commit.sha, entry)
+    return entry
+
+def range_diff(repo, base: str, head: str) -> dict:
+    """`base...head` (any refs) from one compare call; cached when both ends are full shas."""
+    if is_full_sha(base) and is_full_sha(head):
+        entry = cached_diff(repo.full_name, base, head)
+        CACHE_LOOKUPS.inc(cache="commit_diff", result="miss" if entry is None else "hit")
+        if entry is not None:
+            return entry
+    comparison = repo.compare(base, head).raw_data
+    commits = comparison.get("commits") or []
+    status = comparison.get("status")
+    if is_full_sha(head):
+        head_sha = head
+    elif status in ("identical", "behind"):
+        head_sha = (comparison.get("merge_base_commit") or {}).get("sha")
+    else:
+        head_sha = commits[-1]["sha"] if commits and len(commits) == comparison.get("total_commits") else None
+    files = comparison.get("files") or []
+    entry = {
+        "base_sha": comparison["base_commit"]["sha"],
+        "head_sha": head_sha,
+        "status": status,
+        "commits": comparison.get("total_commits", len(commits)),
+        "files": [diff_entry(f) for f in files],
+        "files_truncated": len(files) >= COMPARE_FILES_LIMIT,
+    }
+    if head_sha:
+        remember_diff(repo.full_name, entry["base_sha"], head_sha, entry)
+    return entry
+
+def rollback_plan(repo, commit_sha: str, paths: Optional[List[str]] = None) -> dict:
+    """
+    What reverting `commit_sha` restores: every path it changed (or just `paths`) set back to its
+    version in the commit's first parent, with renames restored under the old name. The service's
+    own bookkeeping files are skipped unless named in `paths`. Reads the commit's diff (usually
+    cached by a preview) and lists the parent tree once.
+    """
+    diff = commit_diff(repo, commit_sha)
+    if not diff["base_sha"]:
+        raise HTTPException(status_code=400, detail=f"Commit {commit_sha} has no parent to roll back to")
+    if diff["files_truncated"] and not paths:
+        raise HTTPException(status_code=400, detail=f"Commit {commit_sha} changes too many files to list; pass 'paths' to roll back in parts")
+    restore, delete, outside = rollback_targets(diff["files"], paths, skip=ROLLBACK_SKIPPED_PATHS)
+    targets = restore + delete + outside
+
+    parent_tree = repo.get_git_tree(diff["base_sha"], recursive=True)  # a commit sha resolves to its tree
+    before = {e.path: (e.sha, e.mode) for e in parent_tree.tree if e.type == "blob"}
+    if TASK_FILE_PATH in targets and TASK_FILE_PATH in before and TASK_SNAPSHOT_PATH in targets:
+        targets.remove(TASK_SNAPSHOT_PATH)  # commit_files writes a fresh snapshot of the restored task.yaml
+    return {
+        "commit_sha": diff["head_sha"],
+        "parent_sha": diff["base_sha"],
+        "restore": {path: before[path] for path in targets if path in before},
+        "delete": [path for path in targets if path not in before],
+    }
+
 @app.post("/git/rollback_commit")
 def rollback_commit(
     repo_name: str = Body(...),
@@ -2582,78 +3857,175 @@ def rollback_commit(
     reason: str = Body(default="Manual rollback"),
     branch: str = Body(...)
 ):
+    """
+    Revert a commit's files (or just `paths`) to their versions before it, as one commit that also
+    appends one entry to the rollback log and one to the changelog. Files are restored by blob
+    sha; nothing is downloaded except task.yaml, whose parsed snapshot is refreshed alongside it.
+    """
     try:
         repo = get_repo(repo_name)
-        commit = repo.get_commit(sha=commit_sha, ref=branch)
-        files_to_revert = paths or [f.filename for f in commit.files]
-        reverted_files = []
-
-        for path in files_to_revert:
-            history = repo.get_commits(path=path, ref=branch)
-            target_version = None
-            for c in history:
-                if c.sha == commit_sha:
-                    continue  # skip this commit
-                target_version = c
-                break
-
-            if not target_version:
-                continue
-
-            contents = repo.get_contents(path, ref=target_version.sha, branch=branch)
-            commit_and_log(
-                repo,
-                file_path=path,
-                content=contents.decoded_content.decode(),
-                commit_message=f"Rollback {path} to commit {target_version.sha}",
-                task_id="rollback_commit",
-                committed_by="RollbackBot",
-                branch=branch
-            )
-            reverted_files.append(path)
+        plan = rollback_plan(repo, commit_sha, paths)
+        restore, delete = dict(plan["restore"]), plan["delete"]
+        reverted_files = list(restore) + delete
+        if not reverted_files:
+            return {"message": "Nothing to roll back.", "reverted_files": []}
 
-        # Log the rollback
-        rollback_log_path = "project/.logs/reverted_commits.yaml"
-        try:
-            log_file = repo.get_contents(rollback_log_path, ref=branch)
-            rollback_log = yaml.safe_load(log_file.decoded_content) or []
-        except:
-            rollback_log = []
+        base_sha = branch_head_sha(repo, branch)
+        timestamp = datetime.utcnow().isoformat()
+        files: Dict[str, Optional[Union[str, bytes]]] = {path: None for path in delete}
+        if TASK_FILE_PATH in restore:
+            sha, _ = restore.pop(TASK_FILE_PATH)
+            files[TASK_FILE_PATH] = base64.b64decode(repo.get_git_blob(sha).content).decode("utf-8")
 
-        rollback_log.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "commit_sha": commit_sha,
-            "paths": reverted_files,
-            "reason": reason
-        })
+        # Log the rollback, unless the log itself is one of the files being rolled back
+        if ROLLBACK_LOG_PATH not in reverted_files:
+            try:
+                rollback_log = yaml_load(repo.get_contents(ROLLBACK_LOG_PATH, ref=base_sha).decoded_content) or []
+            except Exception:
+                rollback_log = []
+            rollback_log.append({
+                "timestamp": timestamp,
+                "commit_sha": plan["commit_sha"],
+                "restored_from": plan["parent_sha"],
+                "paths": reverted_files,
+                "reason": reason
+            })
+            files[ROLLBACK_LOG_PATH] = yaml_dump(rollback_log, sort_keys=False)
 
-        log_content = yaml.dump(rollback_log, sort_keys=False)
-        commit_and_log(
+        new_sha = commit_files(
             repo,
-            file_path=rollback_log_path,
-            content=log_content,
-            commit_message=f"Log rollback of {commit_sha}",
+            files,
+            f"Rollback {plan['commit_sha'][:7]}: restore {len(reverted_files)} files from {plan['parent_sha'][:7]}",
             task_id="rollback_commit",
             committed_by="RollbackBot",
-            branch=branch
+            branch=branch,
+            blobs=restore,
+            base_sha=base_sha,
+            changelog_entries=[{
+                "timestamp": timestamp,
+                "path": ROLLBACK_LOG_PATH,
+                "paths": reverted_files,
+                "task_id": "rollback_commit",
+                "committed_by": "RollbackBot",
+                "message": f"Rollback {len(reverted_files)} files to {plan['parent_sha'][:7]} (reverting {plan['commit_sha'][:7]}): {reason}"
+            }]
         )
 
         return {
             "message": f"Rollback complete for {len(reverted_files)} files.",
-            "reverted_files": reverted_files
+            "reverted_files": reverted_files,
+            "commit_sha": new_sha
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Rollback failed: {str(e)}"})
 
+def estimate_rollback(repo, diff: dict, paths: Optional[List[str]] = None, branch: Optional[str] = None) -> dict:
+    """What /git/rollback_commit would write for this commit diff; with `branch`, one compare finds targets changed again since."""
+    restore, delete, outside = rollback_targets(diff["files"], paths, skip=ROLLBACK_SKIPPED_PATHS)
+    if TASK_FILE_PATH in restore:
+        restore, delete, outside = ([p for p in group if p != TASK_SNAPSHOT_PATH] for group in (restore, delete, outside))
+    targets = restore + delete + outside
+    also_writes = [ROLLBACK_LOG_PATH, CHANGELOG_PATH] + ([TASK_SNAPSHOT_PATH] if TASK_FILE_PATH in restore else [])
+    estimate = {
+        "files": len(targets),
+        "restore": restore,
+        "delete": delete,
+        "not_in_commit": outside,
+        "also_writes": [path for path in also_writes if path not in targets] if targets else [],
+        "commits": 1 if targets else 0,
+    }
+    if branch:
+        since = repo.compare(diff["head_sha"], branch).raw_data
+        changed = {f["filename"] for f in since.get("files") or []}
+        changed |= {f["previous_filename"] for f in since.get("files") or [] if f.get("previous_filename")}
+        estimate["branch_contains_commit"] = since.get("status") in ("ahead", "identical")
+        estimate["changed_since"] = [path for path in targets if path in changed]
+    return estimate
+
+@app.post("/git/diff")
+def diff_commits(payload: dict = Body(...)):
+    """
+    Read-only diff to review before a rollback: one `commit_sha` against its parent, or `base`...`head`
+    (any refs), limited to files under `prefix` (default `project/`) with line-level patches unless
+    `include_patch` is false. For a commit it also estimates what /git/rollback_commit would touch
+    (scoped by `paths`) and, given `branch`, which of those files changed again after the commit.
+    """
+    repo_name = payload.get("repo_name")
+    commit_sha = payload.get("commit_sha")
+    base, head = payload.get("base"), payload.get("head")
+    if not repo_name or not (commit_sha or (base and head)):
+        raise HTTPException(status_code=400, detail="'repo_name' and either 'commit_sha' or both 'base' and 'head' are required")
+    prefix = payload.get("prefix", "project/")
+
+    try:
+        repo = get_repo(repo_name)
+        diff = commit_diff(repo, commit_sha) if commit_sha else range_diff(repo, base, head)
+        result = {
+            "repo_name": repo_name,
+            "mode": "commit" if commit_sha else "range",
+            "base_sha": diff["base_sha"],
+            "head_sha": diff["head_sha"],
+            "status": diff.get("status"),
+            "commits": diff["commits"],
+            "prefix": prefix,
+            **summarize_diff(diff["files"], prefix, include_patch=payload.get("include_patch", True)),
+            "files_truncated": diff["files_truncated"],
+        }
+        if commit_sha:
+            result["rollback"] = estimate_rollback(repo, diff, payload.get("paths"), payload.get("branch"))
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"detail": f"Diff failed: {str(e)}"})
+
+
+
+# ---- Jobs ----
+
+async def stream_job_events(job: Job):
+    """Server-sent events: the job state whenever it changes, a keepalive comment while idle, ending with a `done` event."""
+    version, last_sent = None, time.time()
+    while True:
+        if job.version != version:
+            version = job.version
+            state = job.to_dict()
+            finished = state["status"] in FINAL_STATES
+            yield f"event: {'done' if finished else 'progress'}\ndata: {json.dumps(state, default=str)}\n\n"
+            if finished:
+                return
+            last_sent = time.time()
+        elif time.time() - last_sent >= JOB_STREAM_KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.time()
+        await asyncio.sleep(JOB_STREAM_POLL_SECONDS)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, stream: bool = Query(False)):
+    """Status and progress of a background job; `stream=true` follows it as server-sent events until it finishes."""
+    job = JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if stream:
+        return StreamingResponse(stream_job_events(job), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+    return job.to_dict()
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    cancelled = job.cancel()
+    return {"job_id": job.id, "cancel_requested": cancelled, "status": job.status}
 
 
 # ---- Project Initialization ----
 
-from fastapi import BackgroundTasks
-
 @app.post("/sandbox/init")
-async def init_sandbox(payload: InitSandboxPayload, background_tasks: BackgroundTasks):
+async def init_sandbox(payload: InitSandboxPayload):
     mode = payload.mode
     repo_name = payload.repo_name
 
@@ -2666,7 +4038,6 @@ async def init_sandbox(payload: InitSandboxPayload, background_tasks: Background
             raise HTTPException(status_code=400, detail="For project mode, 'branch', 'project_name', and 'project_description' are required.")
 
         return await handle_init_project(
-            background_tasks=background_tasks,
             repo_name=repo_name,
             branch=payload.branch,
             project_name=payload.project_name,
@@ -2676,14 +4047,21 @@ async def init_sandbox(payload: InitSandboxPayload, background_tasks: Background
     raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
 
 
-async def handle_init_project(background_tasks: BackgroundTasks, repo_name: str, branch: str, project_name: str, project_description: str):
-    """Initialize a new project in the specified GitHub repo."""
+async def handle_init_project(repo_name: str, branch: str, project_name: str, project_description: str):
+    """Initialize a new project in the specified GitHub repo as a background job."""
     try:
         print(f"🚀 Project init requested for {project_name} into repo {repo_name}")
 
-        background_tasks.add_task(run_project_initialization, project_name, repo_name, project_description, branch)
+        job = JOBS.submit(
+            "init_project", run_project_initialization, project_name, repo_name, project_description, branch,
+            params={"repo_name": repo_name, "branch": branch, "project_name": project_name}
+        )
 
-        return {"message": "Project initialization started. Check GitHub repo in 1-2 minutes."}
+        return {
+            "message": "Project initialization started. Follow its progress at status_url.",
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}"
+        }
 
     except Exception as e:
         print(f"❌ Exception during init_project: {type(e).__name__}: {e}")
@@ -2693,58 +4071,127 @@ async def handle_init_project(background_tasks: BackgroundTasks, repo_name: str,
         )
 
 
+def create_sandbox_branch(repo, base_sha: str) -> str:
+    """Create a uniquely named sandbox branch at `base_sha`: one create_git_ref, retried with a new name on the rare collision."""
+    last_error = None
+    for _ in range(5):
+        candidate = sandbox_branch_name()
+        try:
+            repo.create_git_ref(ref=f"refs/heads/{candidate}", sha=base_sha)
+            return candidate
+        except GithubException as e:
+            if e.status != 422:  # 422: reference already exists
+                raise
+            last_error = e
+    raise HTTPException(status_code=500, detail=f"Unable to create unique sandbox branch. Last error: {str(last_error)}")
+
+def sandbox_marker_commit(repo, base_sha: str, message: str) -> str:
+    """
+    An empty commit on `base_sha` for sandboxes to start from. Its date counts as activity of the
+    sandbox itself, so sandbox GC in any process treats a sandbox as in use from then on, however
+    old the base commit is.
+    """
+    base = repo.get_git_commit(base_sha)
+    return repo.create_git_commit(message, base.tree, [base]).sha
+
+def refill_sandbox_pool(repo_name: str, job: Optional[Job] = None) -> dict:
+    """
+    Top the repo's sandbox pool back up to SANDBOX_POOL_SIZE branches, all started from one
+    "Pool sandbox" marker commit on the current base branch head.
+    """
+    pool = get_branch_pool(repo_name, SANDBOX_POOL_SIZE)
+    try:
+        repo = get_repo(repo_name)
+        needed = pool.deficit()
+        if job:
+            job.update(stage="create", branches_total=needed, branches_created=0)
+        if not needed:
+            return {"created": 0, "pool_size": len(pool)}
+        base_sha = repo.get_git_ref(f"heads/{SANDBOX_BASE_BRANCH}").object.sha
+        marker_sha = sandbox_marker_commit(repo, base_sha, "Pool sandbox")
+
+        def create(_):
+            if job:
+                job.check_cancelled()
+            pool.add(create_sandbox_branch(repo, marker_sha), marker_sha, base_sha)
+            if job:
+                job.advance("branches_created")
+
+        with ThreadPoolExecutor(max_workers=min(GITHUB_FETCH_WORKERS, needed)) as pool_workers:
+            list(pool_workers.map(create, range(needed)))
+        return {"created": needed, "pool_size": len(pool)}
+    finally:
+        pool.finish_refill()
+
+def schedule_sandbox_pool_refill(repo_name: str) -> Optional[Job]:
+    """Start a background refill when the pool is short and none is already running."""
+    if SANDBOX_POOL_SIZE <= 0 or not get_branch_pool(repo_name, SANDBOX_POOL_SIZE).start_refill():
+        return None
+    return JOBS.submit("sandbox_pool_refill", refill_sandbox_pool, repo_name, params={"repo_name": repo_name})
+
+@app.on_event("startup")
+def warm_sandbox_pools():
+    for repo_name in SANDBOX_POOL_REPOS:
+        schedule_sandbox_pool_refill(repo_name)
+
+
 async def handle_init_branch(repo_name: str, reuse_token: Optional[str] = None, force_new: Optional[bool] = False):
-    """Initialize a new branch in the specified GitHub repo."""
+    """
+    Initialize a new branch in the specified GitHub repo. New sandboxes are claimed from a pool of
+    pre-created branches, skipping any deleted since they were pooled, and the pool is refilled in
+    the background; an empty pool falls back to creating one directly. A pooled branch is handed
+    out as is unless the base head has moved or its pool marker is older than
+    SANDBOX_POOL_MAX_AGE_HOURS; then it is moved onto a fresh "Claim sandbox" commit first.
+    """
 
     repo = get_repo(repo_name)
-    base_branch = "main"
+    base_branch = SANDBOX_BASE_BRANCH
 
     # Decode reuse_token if present
     branch = None
     if reuse_token and not force_new:
         try:
             decoded = base64.urlsafe_b64decode(reuse_token.encode()).decode()
-            if decoded.startswith("sandbox-"):
+            if decoded.startswith(SANDBOX_PREFIX):
                 # check if branch exists
                 repo.get_branch(decoded)
                 branch = decoded
         except Exception:
             pass  # Invalid token or branch doesn't exist
 
-    # If no valid reuse, generate a new one
+    # If no valid reuse, claim one from the pool
+    created = not branch
     if not branch:
-        adjectives = ["emerald", "cosmic", "velvet", "silent", "curious", "ancient", "golden", "crimson", "silver", "mystic"]
-        animals = ["hawk", "otter", "wave", "eagle", "fox", "lynx", "falcon", "whale", "tiger", "puma"]
-
-        creation_error = None  # capture error in case all fail
-
-        for _ in range(5):  # try up to 5 unique names
-            candidate = f"sandbox-{random.choice(adjectives)}-{random.choice(animals)}"
+        base_sha = repo.get_git_ref(f"heads/{base_branch}").object.sha
+        pool = get_branch_pool(repo_name, SANDBOX_POOL_SIZE)
+        claim_sha = None
+        while not branch:
+            pooled = pool.claim()
+            if not pooled:
+                CACHE_LOOKUPS.inc(cache="sandbox_pool", result="miss")
+                branch = create_sandbox_branch(repo, sandbox_marker_commit(repo, base_sha, "Claim sandbox"))
+                break
             try:
-                # Check if branch already exists
-                repo.get_branch(candidate)
-            except Exception:
-                try:
-                    # Try creating new branch from base
-                    source = repo.get_branch(base_branch).commit.sha
-                    repo.create_git_ref(ref=f"refs/heads/{candidate}", sha=source)
-                    branch = candidate
-                    break
-                except Exception as e:
-                    creation_error = e
-
-        if not branch:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Unable to create unique sandbox branch. Last error: {str(creation_error)}"
-            )
-    
+                ref = repo.get_git_ref(f"heads/{pooled['name']}")  # 404 if deleted since it was pooled (e.g. GC elsewhere)
+                if pooled["base_sha"] != base_sha or time.time() - pooled["created_at"] > SANDBOX_POOL_MAX_AGE_HOURS * 3600:
+                    # Unclaimed pool branches carry no commits of their own, so moving them is safe
+                    claim_sha = claim_sha or sandbox_marker_commit(repo, base_sha, "Claim sandbox")
+                    ref.edit(claim_sha, force=True)
+            except GithubException as e:
+                if e.status not in (404, 422):
+                    raise
+                CACHE_LOOKUPS.inc(cache="sandbox_pool", result="stale")
+                continue
+            CACHE_LOOKUPS.inc(cache="sandbox_pool", result="hit")
+            branch = pooled["name"]
+        schedule_sandbox_pool_refill(repo_name)
+
     reuse_token = base64.urlsafe_b64encode(branch.encode()).decode()
     return {
         "branch": branch,
         "reuse_token": reuse_token,
         "repo_name": repo_name,
-        "created": not reuse_token,
+        "created": created,
         "message": (
     f"✅ Your personal sandbox is `{branch}` in the GitHub repo `{repo_name}`.\n\n"
     f"🔐 To return to this workspace later, save this token:\n\n"
@@ -2842,6 +4289,11 @@ async def manage_issues(payload: dict = Body(...)):
     if not action or not repo_name or not branch:
         raise HTTPException(status_code=400, detail="'action', 'repo_name', and 'branch' are required")
 
+    if action in ("log", "update_status") and not payload.get("scope"):
+        raise HTTPException(status_code=400, detail=f"'scope' is required for action '{action}'")
+    if action == "log" and payload.get("dedupe", "attach") not in ISSUE_DEDUPE_MODES:
+        raise HTTPException(status_code=400, detail=f"'dedupe' must be one of {list(ISSUE_DEDUPE_MODES)}")
+
     if action == "log":
         return await handle_log_issue(
             repo_name=repo_name,
@@ -2853,7 +4305,8 @@ async def manage_issues(payload: dict = Body(...)):
             suggested_fix=payload.get("suggested_fix"),
             tags=payload.get("tags"),
             status=payload.get("status", "open"),
-            branch=payload.get("branch")
+            branch=payload.get("branch"),
+            dedupe=payload.get("dedupe", "attach")
         )
 
     elif action == "fetch":
@@ -2865,7 +4318,9 @@ async def manage_issues(payload: dict = Body(...)):
             task_id=payload.get("task_id"),
             tag=payload.get("tag"),
             status=payload.get("status"),
-            branch=payload.get("branch")
+            branch=payload.get("branch"),
+            offset=max(int(payload.get("offset", 0) or 0), 0),
+            limit=min(max(int(payload.get("limit", 100) or 100), 1), MAX_LIST_LIMIT)
         )
 
     elif action == "update_status":
@@ -2880,6 +4335,76 @@ async def manage_issues(payload: dict = Body(...)):
 
     raise HTTPException(status_code=400, detail=f"Unsupported action: {action}")
 
+def load_issue_scope(repo, scope: str, branch: str, ref: Optional[str] = None) -> tuple:
+    """
+    (index, tail, legacy) for one scope of `branch`, read at `ref` (default: the branch itself).
+    The index is folded from the scope's index segments and cached by their blob shas, so an
+    unchanged scope costs one listing and no parsing;
+    `tail` is the last segment, which the next row is appended to. A scope still stored as a
+    single `{scope}.yaml` has no index: its entries come back as `legacy`, a dict of the migratable
+    `entries` and whether they are `complete` (None if neither exists).
+    """
+    ref = ref or branch
+    segments = list_log_segments(repo, ref, issue_index_dir(scope))
+    if segments:
+        index = get_issue_index(
+            f"{repo.full_name}@{branch}:{scope}",
+            ",".join(f.sha for _, f in segments),
+            lambda: fold_rows(read_log_segment(repo, ref, f) for _, f in segments)
+        )
+        number, last = segments[-1]
+        return index, {"number": number, "entries": read_log_segment(repo, ref, last)}, None
+    tail = {"number": 0, "entries": []}
+    try:
+        file = repo.get_contents(legacy_issues_path(scope), ref=ref)
+    except GithubException as e:
+        if e.status != 404:
+            raise
+        return None, tail, None
+    try:
+        entries, complete = legacy_entries(scope, yaml_load(file.decoded_content))
+    except yaml.YAMLError:
+        # Early entries were dumped unsafely (e.g. a python/name tag); salvage them, but keep the file
+        try:
+            entries, complete = legacy_entries(scope, yaml_load_untagged(file.decoded_content))[0], False
+        except yaml.YAMLError as e:
+            logger.warning(f"Unreadable {legacy_issues_path(scope)} on {branch}; its issues are not listed and the file is kept: {e}")
+            entries, complete = [], False
+    return None, tail, {"entries": entries, "complete": complete}
+
+def migrate_legacy_issues(scope: str, legacy: dict, files: Dict[str, Optional[str]]) -> List[dict]:
+    """
+    Queue one record file per legacy entry into `files`, and the removal of the old scope file
+    only if every entry in it was migrated; returns the migrated entries' index rows.
+    """
+    for entry in legacy["entries"]:
+        files[issue_record_path(scope, entry["issue_id"])] = yaml_dump(entry, sort_keys=False)
+    if legacy["complete"]:
+        files[legacy_issues_path(scope)] = None
+    else:
+        logger.warning(f"Keeping {legacy_issues_path(scope)}: some of it could not be migrated to record files")
+    return [index_row(entry) for entry in legacy["entries"]]
+
+def stage_issue_rows(scope: str, tail: dict, rows: List[dict], files: Dict[str, Optional[str]]):
+    """Append index rows to the scope's last index segment (and new ones as it fills) in a pending commit_files() batch."""
+    for write in plan_writes(issue_index_dir(scope), tail["number"], tail["entries"], rows):
+        files[write["path"]] = encode_entries(write["entries"])
+
+def retry_on_conflict(repo, branch: str, write: Callable[[str], Any]) -> Any:
+    """
+    Run `write(base_sha)` against the branch head, where `write` reads at `base_sha` and commits
+    with it. Writers in this process queue on the branch lock; when commit_files still reports 409
+    (another process changed a file `write` rewrites), re-read at the new head and try again,
+    up to COMMIT_RETRIES times.
+    """
+    with branch_write_lock(repo, branch):
+        for attempt in range(COMMIT_RETRIES + 1):
+            try:
+                return write(branch_head_sha(repo, branch))
+            except HTTPException as e:
+                if e.status_code != 409 or attempt == COMMIT_RETRIES:
+                    raise
+
 async def handle_log_issue(
         repo_name: str, 
         scope: str, 
@@ -2890,37 +4415,87 @@ async def handle_log_issue(
         suggested_fix: Optional[str], 
         tags: Optional[List[str]], 
         status: str,
-        branch: str = "unknown"):
-    """Log a new bug or enhancement entry."""
+        branch: str = "unknown",
+        dedupe: str = "attach"):
+    """
+    Log a new bug or enhancement entry as its own record file, appending its row to the scope index
+    in the same commit. A scope still in the single-file layout is migrated by the same commit.
+
+    Reports are checked against the scope's LSH index first. With `dedupe: attach`, one at least
+    ISSUE_DUPLICATE_THRESHOLD similar to an issue that is not closed is attached to that issue's
+    `reports` instead of becoming a new issue; otherwise (and with `dedupe: flag`) matches above
+    ISSUE_POSSIBLE_DUPLICATE_THRESHOLD are recorded on the new issue as `possible_duplicates`.
+    """
     try:
         repo = get_repo(repo_name)
-        path = f".logs/issues/{scope}.yaml"
+        signature = issue_signature(title, detail, tags) if dedupe != "off" else None
+
+        def log(base_sha: str) -> dict:
+            index, tail, legacy = load_issue_scope(repo, scope, branch, base_sha)
+            files: Dict[str, Optional[str]] = {}
+            rows = migrate_legacy_issues(scope, legacy, files) if legacy is not None else []
+            if index is None:
+                index = IssueIndex({row["issue_id"]: row for row in rows})
+
+            timestamp = datetime.utcnow().isoformat()
+            matches = index.similar(signature, ISSUE_POSSIBLE_DUPLICATE_THRESHOLD)
+            duplicate = next(
+                ((issue_id, score) for issue_id, score in matches
+                 if score >= ISSUE_DUPLICATE_THRESHOLD and index.rows[issue_id].get("status") != "closed"),
+                None
+            ) if dedupe == "attach" else None
+            if duplicate:
+                issue_id, score = duplicate
+                existing = next((e for e in legacy["entries"] if e["issue_id"] == issue_id), None) if legacy else None
+                if existing is None:
+                    existing = yaml_load(repo.get_contents(issue_record_path(scope, issue_id), ref=base_sha).decoded_content)
+                existing.setdefault("reports", []).append({
+                    "timestamp": timestamp,
+                    "task_id": task_id,
+                    "title": title,
+                    "detail": detail,
+                    "suggested_fix": suggested_fix,
+                    "tags": tags,
+                    "similarity": round(score, 2)
+                })
+                if tags:
+                    existing["tags"] = list(dict.fromkeys((existing.get("tags") or []) + tags))
+                files[issue_record_path(scope, issue_id)] = yaml_dump(existing, sort_keys=False)
+                stage_issue_rows(scope, tail, rows + [index_row(existing)], files)
+
+                commit_files(repo, files, f"Attach duplicate report to {type_} {issue_id} in {scope} scope", task_id=task_id, committed_by="GPTPod", branch=branch, base_sha=base_sha)
+                return {
+                    "message": "Duplicate of an existing issue or enhancement; report attached",
+                    "entry": existing,
+                    "duplicate_of": issue_id,
+                    "similarity": round(score, 2)
+                }
 
-        try:
-            file = repo.get_contents(path, ref=branch)
-            data = yaml.safe_load(file.decoded_content) or []
-        except:
-            data = []
+            entry = {
+                "type": type_,
+                "scope": scope,
+                "issue_id": str(uuid.uuid4()),
+                "task_id": task_id,
+                "title": title,
+                "detail": detail,
+                "suggested_fix": suggested_fix,
+                "tags": tags,
+                "status": status,
+                "timestamp": timestamp
+            }
+            if matches:
+                entry["possible_duplicates"] = [{"issue_id": issue_id, "similarity": round(score, 2)} for issue_id, score in matches[:5]]
 
-        entry = {
-            "type": type_,
-            "scope": scope,
-            "issue_id": str(uuid.uuid4()),
-            "task_id": task_id,
-            "title": title,
-            "detail": detail,
-            "suggested_fix": suggested_fix,
-            "tags": tags,
-            "status": status,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+            files[issue_record_path(scope, entry["issue_id"])] = yaml_dump(entry, sort_keys=False)
+            stage_issue_rows(scope, tail, rows + [index_row(entry)], files)
 
-        data.append(entry)
-        content = yaml.dump(data, sort_keys=False)
+            commit_files(repo, files, f"Log {type_} in {scope} scope", task_id=task_id, committed_by="GPTPod", branch=branch, base_sha=base_sha)
+            return {"message": "Issue or enhancement logged", "entry": entry}
 
-        commit_and_log(repo, path, content, f"Log {type} in {scope} scope", committed_by="GPTPod", branch=branch)
-        return {"message": "Issue or enhancement logged", "entry": entry}
+        return retry_on_conflict(repo, branch, log)
 
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Internal Server Error: {type(e).__name__}: {e}"})
     
@@ -2933,110 +4508,276 @@ async def handle_fetch_issues(
         task_id: Optional[str], 
         tag: Optional[str], 
         status: Optional[str],
-        branch: str = "unknown"):
-    """Fetch issues or enhancements with optional filters."""
+        branch: str = "unknown",
+        offset: int = 0,
+        limit: int = 100):
+    """
+    Fetch issues or enhancements with optional filters, oldest first and paged with `offset`/`limit`.
+    Filters are answered from each scope's index; only the records on the requested page are read.
+    """
     try:
         repo = get_repo(repo_name)
+        ref = branch_head_sha(repo, branch)
         scopes = ["framework", "project"] if not scope else [scope]
-        data = []
+        matches, records = [], {}
         for s in scopes:
-            try:
-                file = repo.get_contents(f".logs/issues/{s}.yaml", ref=branch)
-                items = yaml.safe_load(file.decoded_content) or []
-                data.extend(items)
-            except:
-                continue
+            index, _, legacy = load_issue_scope(repo, s, branch, ref)
+            if index is None:
+                entries = legacy["entries"] if legacy else []
+                records.update({(s, entry["issue_id"]): entry for entry in entries})
+                index = IssueIndex({entry["issue_id"]: index_row(entry) for entry in entries})
+            matches.extend(
+                (index.rows[i].get("timestamp") or "", s, i)
+                for i in index.query(issue_id=issue_id, type_=type_, task_id=task_id, tag=tag, status=status)
+            )
+        if len(scopes) > 1:
+            matches.sort(key=lambda match: match[0])
 
-        filtered = [
-            d for d in data
-            if (not issue_id or d.get("issue_id") == issue_id)
-            and (not type_ or d.get("type") == type_)
-            and (not task_id or d.get("task_id") == task_id)
-            and (not tag or tag in (d.get("tags") or []))
-            and (not status or d.get("status") == status)
-        ]
+        page = [(s, i) for _, s, i in matches[offset:offset + limit]]
+
+        def read_record(key):
+            s, i = key
+            return key, yaml_load(repo.get_contents(issue_record_path(s, i), ref=ref).decoded_content)
 
-        return {"scope": scope or "both", "results": filtered}
+        unread = [key for key in page if key not in records]
+        if unread:
+            with ThreadPoolExecutor(max_workers=GITHUB_FETCH_WORKERS) as pool:
+                records.update(pool.map(bind_trace(read_record), unread))
+
+        return {
+            "scope": scope or "both",
+            "results": [records[key] for key in page],
+            "total": len(matches),
+            "offset": offset,
+            "limit": limit,
+            "next_offset": offset + limit if offset + limit < len(matches) else None
+        }
 
     except Exception as e:
         return JSONResponse(status_code=404, content={"detail": f"Could not fetch issues or enhancements: {type(e).__name__}: {e}"})
 
 async def handle_update_issue_status(repo_name: str, scope: str, issue_id: str, new_status: str, suggested_fix: str = None, branch: str = "unknown"):
-    """Update status of an issue or enhancement."""
+    """Update status of an issue or enhancement: rewrites its record file and appends its new index row in one commit."""
     try:
         repo = get_repo(repo_name)
-        path = f".logs/issues/{scope}.yaml"
-        file = repo.get_contents(path, ref=branch)
-        data = yaml.safe_load(file.decoded_content) or []
 
-        found = False
-        for entry in data:
-            if entry.get("issue_id") == issue_id:
-                entry["status"] = new_status
-                if suggested_fix is not None:
-                    entry["suggested_fix"] = suggested_fix
-                found = True
+        def update(base_sha: str):
+            index, tail, legacy = load_issue_scope(repo, scope, branch, base_sha)
+            files: Dict[str, Optional[str]] = {}
+            rows, entry = [], None
+            if index is not None:
+                if issue_id in index.rows:
+                    entry = yaml_load(repo.get_contents(issue_record_path(scope, issue_id), ref=base_sha).decoded_content)
+            else:
+                rows = migrate_legacy_issues(scope, legacy, files) if legacy is not None else []
+                entry = next((e for e in legacy["entries"] if e["issue_id"] == issue_id), None) if legacy else None
 
-        if not found:
-            return JSONResponse(status_code=404, content={"detail": f"Entry with issue_id '{issue_id}' not found."})
+            if entry is None:
+                return JSONResponse(status_code=404, content={"detail": f"Entry with issue_id '{issue_id}' not found."})
 
-        content = yaml.dump(data, sort_keys=False)
-        commit_and_log(repo, path, content, f"Update issue status to {new_status}: {issue_id}", committed_by="GPTPod", branch=branch)
+            entry["status"] = new_status
+            if suggested_fix is not None:
+                entry["suggested_fix"] = suggested_fix
+            files[issue_record_path(scope, issue_id)] = yaml_dump(entry, sort_keys=False)
+            stage_issue_rows(scope, tail, rows + [index_row(entry)], files)
 
-        return {"message": f"Status updated to {new_status} for: {issue_id}"}
+            commit_files(repo, files, f"Update issue status to {new_status}: {issue_id}", committed_by="GPTPod", branch=branch, base_sha=base_sha)
+            return {"message": f"Status updated to {new_status} for: {issue_id}"}
 
+        return retry_on_conflict(repo, branch, update)
+
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         return JSONResponse(status_code=500, content={"detail": f"Internal Server Error: {type(e).__name__}: {e}"})
 
+def scan_sandbox_usage(repo, repo_name: str, branches: List[tuple]) -> Iterator[dict]:
+    """
+    Usage for each (branch, head sha), yielded as each finishes. A branch whose head has not moved
+    is served from the cache; one that moved forward costs a single compare of old...new head, and
+    a new or rewritten branch a single compare against the base branch. Runs GITHUB_FETCH_WORKERS at a time.
+    """
+    cache = get_sandbox_usage_cache(repo.full_name)
+
+    def scan(item):
+        branch, head_sha = item
+        state = cache.get(branch)
+        CACHE_LOOKUPS.inc(cache="sandbox_usage", result="hit" if state and state["head_sha"] == head_sha else "miss")
+        try:
+            if state and state["head_sha"] != head_sha:
+                comparison = repo.compare(state["head_sha"], head_sha).raw_data
+                state = extend_usage(state, comparison, head_sha) if comparison.get("status") == "ahead" else None
+            if not state:
+                state = branch_usage(repo.compare(SANDBOX_BASE_BRANCH, head_sha).raw_data, head_sha)
+            cache.put(branch, state)
+            return usage_record(branch, repo_name, state)
+        except Exception as e:
+            return {"branch": branch, "repo_name": repo_name, "head_sha": head_sha, "error": f"Could not scan branch: {str(e)}"}
+
+    with ThreadPoolExecutor(max_workers=GITHUB_FETCH_WORKERS) as pool:
+        futures = [pool.submit(bind_trace(scan), item) for item in branches]
+        for future in as_completed(futures):
+            yield future.result()
+
+def list_sandbox_branches(repo, repo_name: str) -> List[tuple]:
+    """(branch, head sha) of every claimed sandbox, by name: one listing of sandbox refs instead of every branch."""
+    pooled = get_branch_pool(repo_name, SANDBOX_POOL_SIZE).names()
+    refs = sorted(
+        (ref.ref[len("refs/heads/"):], ref.object.sha)
+        for ref in repo.get_git_matching_refs(f"heads/{SANDBOX_PREFIX}")
+    )
+    sandbox_branches = [(name, sha) for name, sha in refs if name not in pooled]
+    get_sandbox_usage_cache(repo.full_name).retain(name for name, _ in sandbox_branches)
+    return sandbox_branches
+
 @app.post("/admin/sandbox_usage")
-def get_sandbox_usage(repo_name: str = Body(...)):
-    import re
+def get_sandbox_usage(payload: dict = Body(...)):
+    """
+    Usage of sandbox branches, ordered by name and paged with `offset`/`limit`. `format: ndjson`
+    streams one branch per line as soon as it is scanned. Unclaimed pool branches are not listed.
+    """
+    repo_name = payload.get("repo_name")
+    if not repo_name:
+        raise HTTPException(status_code=400, detail="'repo_name' is required")
+    offset = max(int(payload.get("offset", 0) or 0), 0)
+    limit = min(max(int(payload.get("limit", 100) or 100), 1), MAX_LIST_LIMIT)
+    format = payload.get("format", "json")
+
     repo = get_repo(repo_name)
     try:
-        # Get all branches
-        branches = repo.get_branches()
-        sandbox_branches = [b.name for b in branches if b.name.startswith("sandbox-")]
-
-        # Try to read changelog.yaml from each sandbox branch
-        usage = []
-        for branch in sandbox_branches:
-            try:
-                changelog_file = repo.get_contents("project/outputs/changelog.yaml", ref=branch)
-                changelog = yaml.safe_load(changelog_file.decoded_content) or []
-
-                files = set()
-                last_commit = None
-                trace_count = 0
-                for entry in changelog:
-                    path = entry.get("path")
-                    timestamp = entry.get("timestamp")
-                    if path:
-                        files.add(path)
-                        if path.endswith("reasoning_trace.md"):
-                            trace_count += 1
-                    if timestamp and (not last_commit or timestamp > last_commit):
-                        last_commit = timestamp
-
-                usage.append({
-                    "branch": branch,
-                    "repo_name": repo_name,
-                    "created": changelog[0].get("timestamp") if changelog else None,
-                    "last_commit": last_commit,
-                    "files_committed": len(files),
-                    "reasoning_traces": trace_count
-                })
+        # One listing of sandbox refs (with head shas) instead of every branch
+        sandbox_branches = list_sandbox_branches(repo, repo_name)
+        page = sandbox_branches[offset:offset + limit]
 
-            except Exception as e:
-                usage.append({
-                    "branch": branch,
-                    "repo_name": repo_name,
-                    "error": f"Could not read changelog: {str(e)}"
-                })
+        if format == "ndjson":
+            return StreamingResponse(stream_ndjson(scan_sandbox_usage(repo, repo_name, page)), media_type="application/x-ndjson")
 
+        usage = sorted(scan_sandbox_usage(repo, repo_name, page), key=lambda u: u["branch"])
         return {
             "active_sandboxes": len(sandbox_branches),
+            "offset": offset,
+            "limit": limit,
+            "next_offset": offset + limit if offset + limit < len(sandbox_branches) else None,
             "branches": usage
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch sandbox usage: {str(e)}")
+
+# ---- Sandbox GC ----
+
+def changelog_summary(repo, branch: str) -> dict:
+    """What the service logged on a branch, condensed for the archive."""
+    try:
+        changelog = yaml_load(repo.get_contents(CHANGELOG_PATH, ref=branch).decoded_content) or []
+    except GithubException as e:
+        if e.status == 404:
+            return {"entries": 0}
+        raise
+    timestamps = sorted(str(entry.get("timestamp")) for entry in changelog if entry.get("timestamp"))
+    return {
+        "entries": len(changelog),
+        "files": len({entry.get("path") for entry in changelog if entry.get("path")}),
+        "tasks": sorted({str(entry.get("task_id")) for entry in changelog if entry.get("task_id")}),
+        "committed_by": sorted({str(entry.get("committed_by")) for entry in changelog if entry.get("committed_by")}),
+        "first": timestamps[0] if timestamps else None,
+        "last": timestamps[-1] if timestamps else None,
+    }
+
+def plan_sandbox_gc(repo, repo_name: str, policy: dict) -> dict:
+    """Scan every sandbox (cached by head sha) and rank eviction candidates under `policy`."""
+    records = list(scan_sandbox_usage(repo, repo_name, list_sandbox_branches(repo, repo_name)))
+    plan = plan_gc(records, datetime.now(timezone.utc), policy["max_idle_days"], policy["max_sandboxes"], policy["min_idle_hours"])
+    return {
+        "policy": policy,
+        "scanned": len(records),
+        "evict": plan["evict"],
+        "kept": len(plan["keep"]),
+        "errors": [r for r in records if r.get("error")]
+    }
+
+def run_sandbox_gc(repo_name: str, policy: dict, job: Optional[Job] = None) -> dict:
+    """
+    Evict idle sandboxes: archive each one's usage and changelog summary in a single commit on the
+    base branch, then delete the branches. A branch whose head moved since it was scanned is skipped.
+    """
+    repo = get_repo(repo_name)
+    if job:
+        job.update(stage="scan")
+    report = plan_sandbox_gc(repo, repo_name, policy)
+    evict = report["evict"]
+    if job:
+        job.update(stage="archive", branches_total=len(evict), branches_deleted=0)
+    if not evict:
+        return {**report, "deleted": [], "skipped": []}
+
+    def summarize(record):
+        if job:
+            job.check_cancelled()
+        try:
+            return {**record, "changelog": changelog_summary(repo, record["branch"])}
+        except Exception as e:
+            return {**record, "changelog": {"error": str(e)}}
+
+    with ThreadPoolExecutor(max_workers=GITHUB_FETCH_WORKERS) as pool:
+        archived = list(pool.map(bind_trace(summarize), evict))
+
+    archived_at = datetime.utcnow()
+    archive_path = f"{SANDBOX_ARCHIVE_DIR}/{archived_at.strftime('%Y%m%dT%H%M%SZ')}.yaml"
+    archive = {"archived_at": archived_at.isoformat(), "repo_name": repo_name, "policy": policy, "branches": archived}
+    commit_files(
+        repo, {archive_path: yaml_dump(archive, sort_keys=False)}, f"Archive {len(archived)} sandbox branches before GC",
+        committed_by="sandbox_gc", branch=SANDBOX_BASE_BRANCH, log_changelog=False
+    )
+    if job:
+        job.check_cancelled()
+        job.update(stage="delete")
+
+    def delete(record):
+        ref = repo.get_git_ref(f"heads/{record['branch']}")
+        if ref.object.sha != record["head_sha"]:
+            return record["branch"], False
+        ref.delete()
+        if job:
+            job.advance("branches_deleted")
+        return record["branch"], True
+
+    with ThreadPoolExecutor(max_workers=GITHUB_FETCH_WORKERS) as pool:
+        outcomes = list(pool.map(bind_trace(delete), evict))
+
+    return {
+        **report,
+        "archive_path": archive_path,
+        "deleted": [branch for branch, deleted in outcomes if deleted],
+        "skipped": [branch for branch, deleted in outcomes if not deleted]
+    }
+
+@app.post("/admin/sandbox_gc")
+def sandbox_gc(payload: dict = Body(...)):
+    """
+    Garbage-collect sandbox branches. `dry_run` (the default) returns the eviction report straight
+    away; otherwise a `sandbox_gc` job archives and deletes the evicted branches.
+    """
+    repo_name = payload.get("repo_name")
+    if not repo_name:
+        raise HTTPException(status_code=400, detail="'repo_name' is required")
+    max_sandboxes = payload.get("max_sandboxes", SANDBOX_GC_MAX_SANDBOXES)
+    policy = {
+        "max_idle_days": float(payload.get("max_idle_days", SANDBOX_GC_IDLE_DAYS)),
+        "max_sandboxes": int(max_sandboxes) if max_sandboxes is not None else None,
+        "min_idle_hours": float(payload.get("min_idle_hours", SANDBOX_GC_MIN_IDLE_HOURS))
+    }
+
+    if payload.get("dry_run", True):
+        try:
+            return {"dry_run": True, **plan_sandbox_gc(get_repo(repo_name), repo_name, policy)}
+        except Exception as e:
+            return JSONResponse(status_code=500, content={"detail": f"Sandbox GC plan failed: {type(e).__name__}: {e}"})
+
+    job = JOBS.submit("sandbox_gc", run_sandbox_gc, repo_name, policy, params={"repo_name": repo_name, **policy})
+    return {
+        "message": "Sandbox GC started. Follow its progress at status_url.",
+        "dry_run": False,
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}"
+    }
@@ -0,0 +1,80 @@
+# utils/branch_pool.py
+
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Set
+
+SANDBOX_PREFIX = "sandbox-"
+ADJECTIVES = ["emerald", "cosmic", "velvet", "silent", "curious", "ancient", "golden", "crimson", "silver", "mystic"]
+ANIMALS = ["hawk", "otter", "wave", "eagle", "fox", "lynx", "falcon", "whale", "tiger", "puma"]
+
+
+def sandbox_branch_name() -> str:
+    """A readable sandbox name with a random suffix, e.g. `sandbox-golden-otter-3f9a1c` (16M suffixes per word pair)."""
+    return f"{SANDBOX_PREFIX}{random.choice(ADJECTIVES)}-{random.choice(ANIMALS)}-{secrets.token_hex(3)}"
+
+
+class BranchPool:
+    """
+    Sandbox branches created ahead of demand for one repo, each recorded with the commit it
+    points at and the base commit that was forked from. `claim` is O(1); refills are single-flight,
+    so a burst of claims starts at most one refill at a time.
+    """
+
+    def __init__(self, target: int):
+        self.target = target
+        self._branches: deque = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+
+    def claim(self) -> Optional[dict]:
+        with self._lock:
+            if not self._branches:
+                return None
+            return self._branches.popleft()
+
+    def add(self, name: str, sha: str, base_sha: str):
+        with self._lock:
+            self._branches.append({"name": name, "sha": sha, "base_sha": base_sha, "created_at": time.time()})
+
+    def deficit(self) -> int:
+        with self._lock:
+            return max(self.target - len(self._branches), 0)
+
+    def names(self) -> Set[str]:
+        """Branches waiting in the pool (unclaimed, so never used)."""
+        with self._lock:
+            return {entry["name"] for entry in self._branches}
+
+    def start_refill(self) -> bool:
+        """True if the caller should refill now: the pool is short and no refill is running."""
+        with self._lock:
+            if self._refilling or len(self._branches) >= self.target:
+                return False
+            self._refilling = True
+            return True
+
+    def finish_refill(self):
+        with self._lock:
+            self._refilling = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._branches)
+
+
+# ---- Per repo registry ----
+
+_POOLS: Dict[str, BranchPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_branch_pool(repo_key: str, target: int) -> BranchPool:
+    with _POOLS_LOCK:
+        pool = _POOLS.get(repo_key)
+        if pool is None:
+            pool = _POOLS[repo_key] = BranchPool(target)
+        return pool
@@ -0,0 +1,97 @@
+# utils/commit_diff.py
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+COMPARE_FILES_LIMIT = 300  # GitHub lists at most this many files for a compare
+COMMIT_FILES_LIMIT = 3000  # ... and for a single commit, across pages
+
+_FULL_SHA = re.compile(r"[0-9a-f]{40}")
+
+
+def is_full_sha(ref: Optional[str]) -> bool:
+    """Only full shas name immutable content; branches and short shas can move or be ambiguous."""
+    return bool(ref) and bool(_FULL_SHA.fullmatch(ref))
+
+
+def diff_entry(raw: dict) -> dict:
+    """The fields of a GitHub diff file entry the service needs, including its line-level `patch`."""
+    return {
+        "path": raw["filename"],
+        "status": raw.get("status"),
+        "previous_path": raw.get("previous_filename"),
+        "blob_sha": raw.get("sha"),
+        "additions": raw.get("additions", 0),
+        "deletions": raw.get("deletions", 0),
+        "changes": raw.get("changes", 0),
+        "patch": raw.get("patch"),
+    }
+
+
+def summarize_diff(files: List[dict], prefix: str, include_patch: bool = True) -> dict:
+    """Files under `prefix` (old or new path), with totals; files without a patch are binary or too large."""
+    scoped = [
+        f for f in files
+        if f["path"].startswith(prefix) or (f["previous_path"] or "").startswith(prefix)
+    ]
+    return {
+        "files": [
+            {**f, "patch": f["patch"] if include_patch else None, "has_patch": f["patch"] is not None}
+            for f in scoped
+        ],
+        "totals": {
+            "files": len(scoped),
+            "additions": sum(f["additions"] for f in scoped),
+            "deletions": sum(f["deletions"] for f in scoped),
+        },
+        "files_outside_prefix": len(files) - len(scoped),
+    }
+
+
+def rollback_targets(files: List[dict], paths: Optional[List[str]] = None,
+                     skip: Iterable[str] = ()) -> Tuple[List[str], List[str], List[str]]:
+    """
+    What reverting a commit with these diff entries does to each path: `restore` (back to the
+    parent version), `delete` (the commit added it) and `outside` (requested paths the commit did
+    not change, which a rollback resets to the parent version too, or deletes if the parent lacks them).
+    Paths in `skip` are left alone unless named in `paths`.
+    """
+    action: Dict[str, str] = {}
+    for f in files:
+        action[f["path"]] = "delete" if f["status"] == "added" else "restore"
+        if f["status"] == "renamed" and f["previous_path"]:
+            action[f["path"]] = "delete"
+            action[f["previous_path"]] = "restore"
+    skip = set(skip)
+    targets = list(dict.fromkeys(paths or [p for p in action if p not in skip]))
+    return (
+        [p for p in targets if action.get(p) == "restore"],
+        [p for p in targets if action.get(p) == "delete"],
+        [p for p in targets if p not in action],
+    )
+
+
+# ---- Sha-pair cache ----
+# Diffs between two commits never change, so entries only leave by LRU eviction.
+
+_DIFFS: "OrderedDict[Tuple[str, str, str], dict]" = OrderedDict()
+_DIFFS_LOCK = threading.Lock()
+_DIFFS_SIZE = 128
+
+
+def cached_diff(repo_key: str, base: str, head: str) -> Optional[dict]:
+    with _DIFFS_LOCK:
+        entry = _DIFFS.get((repo_key, base, head))
+        if entry is not None:
+            _DIFFS.move_to_end((repo_key, base, head))
+        return entry
+
+
+def remember_diff(repo_key: str, base: str, head: str, entry: dict):
+    with _DIFFS_LOCK:
+        _DIFFS[(repo_key, base, head)] = entry
+        _DIFFS.move_to_end((repo_key, base, head))
+        while len(_DIFFS) > _DIFFS_SIZE:
+            _DIFFS.popitem(last=False)
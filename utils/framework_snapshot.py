@@ -0,0 +1,52 @@
+# utils/framework_snapshot.py
+
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class FrameworkSnapshot:
+    """
+    One version of the framework folder: the head commit it was read at, the folder's tree sha,
+    and every file as (blob sha, mode) keyed by its path inside the folder. Blob contents are
+    held by sha, so a refresh after the framework changes only fetches the blobs that changed.
+    """
+
+    def __init__(self, head_sha: str, tree_sha: Optional[str], files: Dict[str, Tuple[str, str]], contents: Dict[str, bytes]):
+        self.head_sha = head_sha
+        self.tree_sha = tree_sha
+        self.files = files
+        self.contents = contents
+        self.checked_at = time.time()
+
+    @property
+    def version(self) -> str:
+        return self.tree_sha or self.head_sha
+
+    def missing_blobs(self) -> Iterable[str]:
+        return {sha for sha, _ in self.files.values() if sha not in self.contents}
+
+    def content(self, sha: str) -> bytes:
+        return self.contents[sha]
+
+    def successor(self, head_sha: str, tree_sha: Optional[str], files: Dict[str, Tuple[str, str]]) -> "FrameworkSnapshot":
+        """The snapshot for a newer head, carrying over contents of blobs both versions share."""
+        shas = {sha for sha, _ in files.values()}
+        return FrameworkSnapshot(head_sha, tree_sha, files, {sha: data for sha, data in self.contents.items() if sha in shas})
+
+
+# ---- Per source repo/folder registry ----
+
+_SNAPSHOTS: Dict[str, FrameworkSnapshot] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def get_framework_snapshot(key: str) -> Optional[FrameworkSnapshot]:
+    with _SNAPSHOTS_LOCK:
+        return _SNAPSHOTS.get(key)
+
+
+def set_framework_snapshot(key: str, snapshot: FrameworkSnapshot) -> FrameworkSnapshot:
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS[key] = snapshot
+    return snapshot
@@ -0,0 +1,314 @@
+# utils/instrumentation.py
+
+import json
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+
+from utils.tracing import record_call
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: Tuple, value) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, key: Tuple, value) -> List[str]:
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = 'le="' + _number(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests handled, by route, method, action and status.",
+    ("route", "method", "action", "status")))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time to fully send a response, by route, method and action.",
+    ("route", "method", "action")))
+GITHUB_CALLS = REGISTRY.register(Counter(
+    "github_api_calls_total", "GitHub REST calls, by operation and status.", ("operation", "status")))
+GITHUB_LATENCY = REGISTRY.register(Histogram(
+    "github_api_call_duration_seconds", "GitHub REST call latency, by operation.", ("operation",)))
+GITHUB_RATE_REMAINING = REGISTRY.register(Gauge(
+    "github_rate_limit_remaining", "Requests left in the current GitHub rate-limit window, from the last response.", ("resource",)))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "cache_lookups_total", "In-process and on-disk cache lookups, by cache and result.", ("cache", "result")))
+OPENAI_LATENCY = REGISTRY.register(Histogram(
+    "openai_request_duration_seconds", "OpenAI chat completion latency, by model.", ("model",)))
+OPENAI_TOKENS = REGISTRY.register(Counter(
+    "openai_tokens_total", "OpenAI tokens used, by model and kind (prompt or completion).", ("model", "kind")))
+COMMITS = REGISTRY.register(Counter(
+    "github_commits_total", "Commits written by the service, by branch.", ("branch",)))
+
+
+# ---- GitHub ----
+
+_REPO_PATH = re.compile(r"^/repos/[^/]+/[^/]+/?")
+_HEAD_REF = re.compile(r"/git/refs/heads/(.+)$")
+
+
+def github_operation(verb: str, url: str) -> str:
+    """A low-cardinality label for a REST call: the verb and the resource under the repo, e.g. `PUT contents`, `GET git/blobs`."""
+    path = url.split("?", 1)[0]
+    if path.startswith("http"):
+        path = "/" + path.split("/", 3)[-1]
+    match = _REPO_PATH.match(path)
+    if not match:
+        return f"{verb} {path.strip('/').split('/', 1)[0] or '/'}"
+    segments = path[match.end():].split("/")
+    resource = "/".join(segments[:2]) if segments[0] == "git" else segments[0]
+    return f"{verb} {resource or 'repo'}"
+
+
+def committed_branch(verb: str, url: str, input) -> Optional[str]:
+    """Branch a successful REST call committed to: contents writes name it in the body, Git Data commits land with a ref update."""
+    path = url.split("?", 1)[0]
+    if verb in ("PUT", "DELETE") and "/contents/" in path:
+        try:
+            return json.loads(input or "{}").get("branch") or "default"
+        except (TypeError, ValueError):
+            return "default"
+    if verb == "PATCH":
+        match = _HEAD_REF.search(path)
+        if match:
+            return match.group(1)
+    return None
+
+
+# PyGithub may share one connection object between threads, so the request in flight is tracked
+# per thread: request() and the getresponse() that follows it always run on the same thread.
+_in_flight = threading.local()
+
+
+class _Timed:
+    def request(self, verb, url, input, headers, stream=False):
+        _in_flight.call = {
+            "started": time.perf_counter(),
+            "started_ns": time.time_ns(),
+            "verb": verb,
+            "path": url.split("?", 1)[0],
+            "bytes_sent": len(input) if isinstance(input, (str, bytes)) else 0,
+            "operation": github_operation(verb, url),
+            "branch": committed_branch(verb, url, input) if verb in ("PUT", "DELETE", "PATCH") else None,
+        }
+        return super().request(verb, url, input, headers, stream)
+
+    def getresponse(self):
+        call = _in_flight.call
+        status, received = "error", 0
+        try:
+            response = super().getresponse()
+            status = str(response.status)
+            raw = getattr(response, "response", None)
+            received = int(response.headers.get("content-length") or 0) or len(getattr(raw, "content", b"") or b"")
+            if call["branch"] and response.status < 300:
+                COMMITS.inc(branch=call["branch"])
+            headers = getattr(response, "headers", None) or {}
+            remaining = headers.get("x-ratelimit-remaining")
+            if remaining is not None:
+                GITHUB_RATE_REMAINING.set(float(remaining), resource=headers.get("x-ratelimit-resource") or "core")
+            return response
+        finally:
+            GITHUB_LATENCY.observe(time.perf_counter() - call["started"], operation=call["operation"])
+            GITHUB_CALLS.inc(operation=call["operation"], status=status)
+            record_call("github", call["operation"], call["started_ns"], time.time_ns(), {
+                "http.request.method": call["verb"],
+                "url.path": call["path"],
+                "http.response.status_code": status,
+            }, bytes_sent=call["bytes_sent"], bytes_received=received, error=not status.startswith(("2", "3")))
+
+
+class TimedHTTPSConnection(_Timed, HTTPSRequestsConnectionClass):
+    pass
+
+
+class TimedHTTPConnection(_Timed, HTTPRequestsConnectionClass):
+    pass
+
+
+def install_github_instrumentation():
+    """Time every PyGithub request. Call before the first Github client is created; keeps already-timed classes (e.g. a fake backend)."""
+    if issubclass(Requester._Requester__httpsConnectionClass, _Timed):
+        return
+    Requester.injectConnectionClasses(TimedHTTPConnection, TimedHTTPSConnection)
+
+
+# ---- OpenAI ----
+
+def instrument_openai(client):
+    """Wrap `client.chat.completions.create` to record latency and token usage."""
+    completions = client.chat.completions
+    create = completions.create
+
+    def timed_create(*args, **kwargs):
+        model = kwargs.get("model", "unknown")
+        started, started_ns = time.perf_counter(), time.time_ns()
+        bytes_sent = sum(len(str(m.get("content", ""))) for m in kwargs.get("messages", []) if isinstance(m, dict))
+        response, prompt_tokens, completion_tokens = None, 0, 0
+        try:
+            response = create(*args, **kwargs)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+                completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+                OPENAI_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+                OPENAI_TOKENS.inc(completion_tokens, model=model, kind="completion")
+            return response
+        finally:
+            OPENAI_LATENCY.observe(time.perf_counter() - started, model=model)
+            record_call("openai", f"chat.completions {model}", started_ns, time.time_ns(), {
+                "gen_ai.request.model": model,
+                "gen_ai.usage.input_tokens": prompt_tokens,
+                "gen_ai.usage.output_tokens": completion_tokens,
+            }, bytes_sent=bytes_sent, tokens=prompt_tokens + completion_tokens, error=response is None)
+
+    completions.create = timed_create
+    return client
+
+
+# ---- HTTP ----
+
+_ACTION = re.compile(rb'"(?:action|mode)"\s*:\s*"([a-z_]{1,40})"')
+_ACTION_SCAN_BYTES = 4096
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count and latency per route template, method and
+    `action`/`mode` (sniffed from the first bytes of the JSON body as the app reads it, so
+    the body is never buffered twice). Latency runs until the last response byte is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        head = bytearray()
+        status = ["500"]
+
+        async def sniffing_receive():
+            message = await receive()
+            if message["type"] == "http.request" and len(head) < _ACTION_SCAN_BYTES:
+                head.extend(message.get("body", b"")[:_ACTION_SCAN_BYTES - len(head)])
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, sniffing_receive, recording_send)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            match = _ACTION.search(bytes(head))
+            action = match.group(1).decode() if match else ""
+            HTTP_LATENCY.observe(time.perf_counter() - started, route=route, method=scope["method"], action=action)
+            HTTP_REQUESTS.inc(route=route, method=scope["method"], action=action, status=status[0])
+
+
+def render_metrics(registry: Optional[Registry] = None) -> str:
+    return (registry or REGISTRY).render()
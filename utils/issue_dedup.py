@@ -0,0 +1,91 @@
+# utils/issue_dedup.py
+
+import hashlib
+import random
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+NUM_PERM = 60
+LSH_BANDS, LSH_ROWS = 20, 3  # candidates above ~0.37 Jaccard: p = 1 - (1 - J**3) ** 20
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20250101)  # fixed so signatures stored in index files stay comparable across processes
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "in", "into", "is", "it",
+    "its", "of", "on", "or", "that", "the", "this", "to", "was", "when", "with",
+}
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so `fails`, `failed` and `failing` count as the same word."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return [_stem(w) for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if w not in STOPWORDS]
+
+
+def issue_shingles(title: Optional[str], detail: Optional[str], tags: Optional[Iterable[str]]) -> Set[str]:
+    """Word unigrams and bigrams of the title and detail, plus each tag, as one feature set."""
+    shingles: Set[str] = set()
+    for words in (_words(title), _words(detail)):
+        shingles.update(words)
+        shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    shingles.update(f"tag:{tag.lower()}" for tag in tags or [] if isinstance(tag, str))
+    return shingles
+
+
+def minhash_signature(shingles: Set[str]) -> Optional[str]:
+    """
+    A NUM_PERM-value MinHash of `shingles`, keeping the low 16 bits of each minimum and encoded
+    as hex so it fits in an index row. None for an empty set, which has nothing to compare.
+    """
+    if not shingles:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return "".join(f"{min((a * h + b) % _PRIME for h in hashes) & 0xFFFF:04x}" for a, b in _PERMUTATIONS)
+
+
+def issue_signature(title: Optional[str], detail: Optional[str], tags: Optional[Iterable[str]]) -> Optional[str]:
+    return minhash_signature(issue_shingles(title, detail, tags))
+
+
+def similarity(a: str, b: str) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(a[i:i + 4] == b[i:i + 4] for i in range(0, NUM_PERM * 4, 4)) / NUM_PERM
+
+
+def _bands(signature: str) -> List[Tuple[int, str]]:
+    width = LSH_ROWS * 4
+    return [(band, signature[band * width:(band + 1) * width]) for band in range(LSH_BANDS)]
+
+
+class MinHashLSH:
+    """
+    Banded LSH over MinHash signatures: issues sharing any band bucket are candidates, so a lookup
+    compares against a handful of likely matches instead of every issue in the scope.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[int, str], Set[str]] = {}
+        self._signatures: Dict[str, str] = {}
+
+    def add(self, key: str, signature: str):
+        self._signatures[key] = signature
+        for band in _bands(signature):
+            self._buckets.setdefault(band, set()).add(key)
+
+    def query(self, signature: str, min_similarity: float) -> List[Tuple[str, float]]:
+        """(key, similarity) of stored signatures at or above `min_similarity`, most similar first."""
+        candidates = set()
+        for band in _bands(signature):
+            candidates |= self._buckets.get(band, set())
+        scored = [(key, similarity(signature, self._signatures[key])) for key in candidates]
+        return sorted((s for s in scored if s[1] >= min_similarity), key=lambda s: -s[1])
+
+    def __len__(self) -> int:
+        return len(self._signatures)
@@ -0,0 +1,136 @@
+# utils/issue_index.py
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.issue_dedup import MinHashLSH, issue_signature
+
+ISSUES_DIR = ".logs/issues"
+INDEX_FIELDS = ("type", "task_id", "tags", "status", "title", "timestamp")
+
+
+def legacy_issues_path(scope: str) -> str:
+    """The single file a scope's issues lived in before they were split into one file per issue."""
+    return f"{ISSUES_DIR}/{scope}.yaml"
+
+
+def issue_index_dir(scope: str) -> str:
+    """Segments of a scope's append-only index: one row per logged or changed issue, newest last."""
+    return f"{ISSUES_DIR}/{scope}/index"
+
+
+def issue_record_path(scope: str, issue_id: str) -> str:
+    return f"{ISSUES_DIR}/{scope}/{issue_id}.yaml"
+
+
+def legacy_entries(scope: str, data) -> Tuple[List[dict], bool]:
+    """
+    The entries of a parsed `{scope}.yaml` that can be migrated, and whether that is all of them.
+    Entries logged without an `issue_id` get one derived from their position and content, so it is
+    the same on every read until a migration writes it. Anything but a mapping cannot be migrated.
+    """
+    if not isinstance(data, list):
+        return [], data is None
+    entries = []
+    for position, entry in enumerate(data):
+        if not isinstance(entry, dict):
+            continue
+        if not entry.get("issue_id"):
+            content = json.dumps(entry, sort_keys=True, default=str)
+            entry = {**entry, "issue_id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{scope}#{position}:{content}"))}
+        entries.append(entry)
+    return entries, len(entries) == len(data)
+
+
+def index_row(entry: dict) -> dict:
+    """
+    The part of an issue the index keeps: everything fetch filters or sorts on, the title, and a
+    MinHash signature of title, detail and tags for duplicate detection.
+    """
+    row = {"issue_id": entry.get("issue_id"), **{field: entry.get(field) for field in INDEX_FIELDS}}
+    row["signature"] = issue_signature(entry.get("title"), entry.get("detail"), entry.get("tags"))
+    return row
+
+
+class IssueIndex:
+    """
+    Secondary indexes over one scope's index rows (`issue_id` -> row): issue ids by status, tag,
+    task and type, so a filtered fetch intersects small sets instead of scanning every issue, and
+    an LSH index over the rows' signatures for finding near-duplicates of a new report.
+    `ids` keeps log order (oldest first) for stable pagination.
+    """
+
+    def __init__(self, rows: Dict[str, dict], version: Optional[str] = None):
+        self.version = version
+        self.rows = rows
+        self.ids: List[str] = sorted(rows, key=lambda issue_id: rows[issue_id].get("timestamp") or "")
+        self.by_status: Dict[str, Set[str]] = {}
+        self.by_tag: Dict[str, Set[str]] = {}
+        self.by_task: Dict[str, Set[str]] = {}
+        self.by_type: Dict[str, Set[str]] = {}
+        self.lsh = MinHashLSH()
+        for issue_id, row in rows.items():
+            if row.get("signature"):
+                self.lsh.add(issue_id, row["signature"])
+            self.by_status.setdefault(row.get("status"), set()).add(issue_id)
+            self.by_task.setdefault(row.get("task_id"), set()).add(issue_id)
+            self.by_type.setdefault(row.get("type"), set()).add(issue_id)
+            for tag in row.get("tags") or []:
+                self.by_tag.setdefault(tag, set()).add(issue_id)
+
+    def query(self, issue_id: Optional[str] = None, type_: Optional[str] = None, task_id: Optional[str] = None,
+              tag: Optional[str] = None, status: Optional[str] = None) -> List[str]:
+        """Ids matching every given filter, in log order."""
+        if issue_id:
+            return [issue_id] if issue_id in self.rows else []
+        sets = [
+            index.get(value, set())
+            for index, value in ((self.by_type, type_), (self.by_task, task_id), (self.by_tag, tag), (self.by_status, status))
+            if value
+        ]
+        if not sets:
+            return list(self.ids)
+        matches = set.intersection(*sorted(sets, key=len))
+        return [i for i in self.ids if i in matches]
+
+    def similar(self, signature: Optional[str], min_similarity: float) -> List[Tuple[str, float]]:
+        """(issue_id, estimated similarity) of indexed issues resembling `signature`, most similar first."""
+        return self.lsh.query(signature, min_similarity) if signature else []
+
+
+# ---- Version-keyed cache ----
+
+_INDEX_CACHE: "OrderedDict[str, IssueIndex]" = OrderedDict()
+_INDEX_CACHE_LOCK = threading.Lock()
+_INDEX_CACHE_SIZE = 32
+
+
+def fold_rows(segments: Iterable[List[dict]]) -> Dict[str, dict]:
+    """`issue_id` -> row from index segments in order; a later row for an issue supersedes earlier ones."""
+    rows: Dict[str, dict] = {}
+    for entries in segments:
+        for row in entries:
+            if row.get("issue_id"):
+                rows[row["issue_id"]] = row
+    return rows
+
+
+def get_issue_index(cache_key: str, version: str, load_rows: Callable[[], Dict[str, dict]]) -> IssueIndex:
+    """Return the index for `cache_key` at `version` (the index segments' blob shas), parsing via `load_rows()` only on a miss."""
+    with _INDEX_CACHE_LOCK:
+        cached = _INDEX_CACHE.get(cache_key)
+        if cached is not None and cached.version == version:
+            _INDEX_CACHE.move_to_end(cache_key)
+            return cached
+
+    index = IssueIndex(load_rows(), version=version)
+
+    with _INDEX_CACHE_LOCK:
+        _INDEX_CACHE[cache_key] = index
+        _INDEX_CACHE.move_to_end(cache_key)
+        while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return index
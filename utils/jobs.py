@@ -0,0 +1,149 @@
+# utils/jobs.py
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINAL_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by `check_cancelled` once cancellation has been requested."""
+
+
+class Job:
+    """
+    State of one background job. The job function reports through `update`/`advance`, and calls
+    `check_cancelled` between units of work; `version` moves on every change so watchers can
+    tell when there is something new to report.
+    """
+
+    def __init__(self, kind: str, params: Optional[dict] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = dict(params or {})
+        self.status = QUEUED
+        self.stage: Optional[str] = None
+        self.progress: Dict[str, int] = {}
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.version = 0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def _set(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+
+    def update(self, stage: Optional[str] = None, **progress: int):
+        """Set the current stage and/or progress counters (e.g. `files_total=150`)."""
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            self.progress.update(progress)
+            self.version += 1
+
+    def advance(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.progress[counter] = self.progress.get(counter, 0) + amount
+            self.version += 1
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel(self) -> bool:
+        """Request cancellation; a queued job never starts, a running one stops at its next check. False if already finished."""
+        if self.finished:
+            return False
+        self._cancel.set()
+        self._set()
+        return True
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": dict(self.progress),
+                "cancel_requested": self._cancel.is_set() and not self.finished,
+                "params": self.params,
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobManager:
+    """
+    Runs jobs on its own bounded thread pool, so heavy work (project bootstrap, memory indexing)
+    queues behind other jobs instead of occupying request workers. The `keep` most recent
+    finished jobs stay queryable; older ones are forgotten.
+    """
+
+    def __init__(self, max_workers: int = 2, keep: int = 200):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._keep = keep
+
+    def submit(self, kind: str, fn: Callable, *args, params: Optional[dict] = None, **kwargs) -> Job:
+        """Queue `fn(*args, job=job, **kwargs)`; its return value becomes the job result."""
+        job = Job(kind, params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            return [job for job in self._jobs.values() if kind is None or job.kind == kind]
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self._keep, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        if job.cancel_requested:
+            job._set(status=CANCELLED, finished_at=time.time())
+            return
+        job._set(status=RUNNING, started_at=time.time())
+        try:
+            result = fn(*args, job=job, **kwargs)
+        except JobCancelled:
+            job._set(status=CANCELLED, finished_at=time.time())
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind}) failed")
+            job._set(status=FAILED, error=f"{type(e).__name__}: {e}", finished_at=time.time())
+        else:
+            job._set(status=SUCCEEDED, result=result, finished_at=time.time())
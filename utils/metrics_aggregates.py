@@ -0,0 +1,104 @@
+# utils/metrics_aggregates.py
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+def _timestamp(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def task_contribution(task: dict) -> Tuple[bool, Optional[float]]:
+    """(done, cycle time in days) — what one task adds to the delivery counters."""
+    done = bool(task.get("done", False))
+    if not done:
+        return False, None
+    created, updated = _timestamp(task.get("created_at")), _timestamp(task.get("updated_at"))
+    if created is None or updated is None:
+        return True, None
+    try:
+        return True, (updated - created).total_seconds() / (3600 * 24)
+    except TypeError:
+        return True, None  # naive vs aware timestamps
+
+
+class TaskAggregates:
+    """
+    Running delivery counters for one task.yaml: task count, completed count, and the sum and
+    count of cycle times. Each task's last contribution is remembered so a re-applied task only
+    moves the counters by its difference, and `summary()` is O(1).
+    """
+
+    def __init__(self, version: Optional[str] = None):
+        self.version = version
+        self.checked_at = time.time()
+        self.lock = threading.Lock()
+        self._contributions: Dict[str, Tuple[bool, Optional[float]]] = {}
+        self.completed = 0
+        self.cycle_time_sum = 0.0
+        self.cycle_time_count = 0
+
+    def _add(self, contribution: Tuple[bool, Optional[float]], sign: int):
+        done, cycle_time = contribution
+        self.completed += sign * int(done)
+        if cycle_time is not None:
+            self.cycle_time_sum += sign * cycle_time
+            self.cycle_time_count += sign
+
+    def apply_task(self, task_id: str, task: Optional[dict]):
+        """Fold one task's current state into the counters; `None` removes it."""
+        with self.lock:
+            previous = self._contributions.pop(task_id, None)
+            if previous is not None:
+                self._add(previous, -1)
+            if task is not None:
+                contribution = task_contribution(task)
+                self._contributions[task_id] = contribution
+                self._add(contribution, 1)
+
+    def apply_tasks(self, tasks: Dict[str, dict], version: Optional[str]):
+        """Bring the counters in line with a whole task map, touching only tasks whose contribution changed."""
+        for task_id in [tid for tid in self._contributions if tid not in tasks]:
+            self.apply_task(task_id, None)
+        for task_id, task in tasks.items():
+            if self._contributions.get(task_id) != task_contribution(task):
+                self.apply_task(task_id, task)
+        with self.lock:
+            self.version = version
+            self.checked_at = time.time()
+
+    def summary(self) -> dict:
+        with self.lock:
+            total = len(self._contributions)
+            return {
+                "total_tasks": total,
+                "completed_tasks": self.completed,
+                "completion_rate_percent": (self.completed / total * 100) if total else 0,
+                "average_cycle_time_days": (self.cycle_time_sum / self.cycle_time_count) if self.cycle_time_count else None,
+            }
+
+
+# ---- Per repo/branch registry ----
+
+_AGGREGATES: Dict[str, TaskAggregates] = {}
+_AGGREGATES_LOCK = threading.Lock()
+
+
+def get_task_aggregates(cache_key: str) -> Optional[TaskAggregates]:
+    with _AGGREGATES_LOCK:
+        return _AGGREGATES.get(cache_key)
+
+
+def set_task_aggregates(cache_key: str, aggregates: TaskAggregates) -> TaskAggregates:
+    with _AGGREGATES_LOCK:
+        _AGGREGATES[cache_key] = aggregates
+    return aggregates
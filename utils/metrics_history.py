@@ -0,0 +1,208 @@
+# utils/metrics_history.py
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+KEYFRAME_INTERVAL = 32        # a full snapshot every N points; the rest store only changed fields
+MIN_UNCHANGED_INTERVAL = 60   # an unchanged snapshot is recorded at most once a minute
+COMPACT_EVERY = 24 * 3600
+# (age in seconds, bucket in seconds): older points are thinned to the last one per bucket
+RETENTION = ((7 * 24 * 3600, 3600), (90 * 24 * 3600, 24 * 3600))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics_points (
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    ts REAL NOT NULL,
+    keyframe INTEGER NOT NULL,
+    delta_json TEXT NOT NULL,
+    PRIMARY KEY (repo, branch, ts)
+);
+CREATE TABLE IF NOT EXISTS metrics_series (
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    last_json TEXT NOT NULL,
+    last_ts REAL NOT NULL,
+    since_keyframe INTEGER NOT NULL,
+    compacted_at REAL NOT NULL,
+    PRIMARY KEY (repo, branch)
+);
+"""
+
+
+def _delta(previous: Dict[str, float], values: Dict[str, float]) -> dict:
+    delta = {k: v for k, v in values.items() if previous.get(k) != v}
+    removed = [k for k in previous if k not in values]
+    if removed:
+        delta["__removed__"] = removed
+    return delta
+
+
+def _apply(previous: Dict[str, float], delta: dict) -> Dict[str, float]:
+    values = dict(previous)
+    for key in delta.get("__removed__", []):
+        values.pop(key, None)
+    values.update({k: v for k, v in delta.items() if k != "__removed__"})
+    return values
+
+
+def bucket_last(points: List[dict], step: float) -> List[dict]:
+    """Keep the last point of each `step`-second bucket."""
+    kept: Dict[int, dict] = {}
+    for point in points:
+        kept[int(point["ts"] // step)] = point
+    return [kept[b] for b in sorted(kept)]
+
+
+class MetricsHistory:
+    """
+    Time series of metric snapshots per repo/branch in SQLite. Points are delta-encoded against
+    the previous point with a keyframe every KEYFRAME_INTERVAL, and thinned per RETENTION as they
+    age, so a quarter of history is a few thousand small rows read with one range scan.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    # ---- Writes ----
+
+    def record(self, repo: str, branch: str, values: Dict[str, float], ts: Optional[float] = None) -> bool:
+        """Append a snapshot; returns False when it was skipped as an unchanged repeat."""
+        ts = time.time() if ts is None else ts
+        with self._lock, self._conn:
+            state = self._conn.execute(
+                "SELECT last_json, last_ts, since_keyframe, compacted_at FROM metrics_series WHERE repo = ? AND branch = ?",
+                (repo, branch),
+            ).fetchone()
+            previous = json.loads(state["last_json"]) if state else {}
+            if state and (ts <= state["last_ts"] or (previous == values and ts - state["last_ts"] < MIN_UNCHANGED_INTERVAL)):
+                return False
+
+            keyframe = not state or state["since_keyframe"] + 1 >= KEYFRAME_INTERVAL
+            self._conn.execute(
+                "INSERT INTO metrics_points (repo, branch, ts, keyframe, delta_json) VALUES (?, ?, ?, ?, ?)",
+                (repo, branch, ts, int(keyframe), json.dumps(values if keyframe else _delta(previous, values))),
+            )
+            compacted_at = state["compacted_at"] if state else ts
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metrics_series (repo, branch, last_json, last_ts, since_keyframe, compacted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (repo, branch, json.dumps(values), ts, 0 if keyframe else state["since_keyframe"] + 1, compacted_at),
+            )
+            if ts - compacted_at >= COMPACT_EVERY:
+                self._compact(repo, branch, ts)
+        return True
+
+    def _compact(self, repo: str, branch: str, now: float):
+        """Thin aged points per RETENTION and re-encode what remains. Caller holds the lock."""
+        horizon = now - RETENTION[0][0]
+        points = list(self._decode(repo, branch, 0, horizon))
+        boundary = self._conn.execute(
+            "SELECT ts FROM metrics_points WHERE repo = ? AND branch = ? AND ts > ? ORDER BY ts LIMIT 1",
+            (repo, branch, horizon),
+        ).fetchone()
+        if points:
+            kept = []
+            for i, (age, step) in enumerate(RETENTION):
+                upper = now - age
+                lower = now - RETENTION[i + 1][0] if i + 1 < len(RETENTION) else float("-inf")
+                kept.extend(bucket_last([p for p in points if lower < p["ts"] <= upper], step))
+            kept.sort(key=lambda p: p["ts"])
+            self._conn.execute(
+                "DELETE FROM metrics_points WHERE repo = ? AND branch = ? AND ts <= ?", (repo, branch, horizon)
+            )
+            self._write_encoded(repo, branch, kept)
+        if boundary is not None:
+            # The first recent point becomes a keyframe so it no longer depends on thinned rows.
+            first = next(self._decode(repo, branch, boundary["ts"], boundary["ts"]), None)
+            if first is not None:
+                self._conn.execute(
+                    "UPDATE metrics_points SET keyframe = 1, delta_json = ? WHERE repo = ? AND branch = ? AND ts = ?",
+                    (json.dumps(first["values"]), repo, branch, first["ts"]),
+                )
+        self._conn.execute(
+            "UPDATE metrics_series SET compacted_at = ? WHERE repo = ? AND branch = ?", (now, repo, branch)
+        )
+
+    def _write_encoded(self, repo: str, branch: str, points: List[dict]):
+        rows, previous = [], {}
+        for i, point in enumerate(points):
+            keyframe = i % KEYFRAME_INTERVAL == 0
+            rows.append((repo, branch, point["ts"], int(keyframe),
+                         json.dumps(point["values"] if keyframe else _delta(previous, point["values"]))))
+            previous = point["values"]
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO metrics_points (repo, branch, ts, keyframe, delta_json) VALUES (?, ?, ?, ?, ?)", rows
+        )
+
+    # ---- Reads ----
+
+    def _decode(self, repo: str, branch: str, start: float, end: float) -> Iterator[dict]:
+        """Rebuild full snapshots in [start, end], replaying deltas from the last keyframe at or before `start`."""
+        keyframe = self._conn.execute(
+            "SELECT ts FROM metrics_points WHERE repo = ? AND branch = ? AND keyframe = 1 AND ts <= ? "
+            "ORDER BY ts DESC LIMIT 1",
+            (repo, branch, start),
+        ).fetchone()
+        cursor = self._conn.execute(
+            "SELECT ts, keyframe, delta_json FROM metrics_points WHERE repo = ? AND branch = ? AND ts >= ? AND ts <= ? "
+            "ORDER BY ts",
+            (repo, branch, keyframe["ts"] if keyframe else start, end),
+        )
+        values: Dict[str, float] = {}
+        for row in cursor:
+            delta = json.loads(row["delta_json"])
+            values = dict(delta) if row["keyframe"] else _apply(values, delta)
+            if row["ts"] >= start:
+                yield {"ts": row["ts"], "values": values}
+
+    def series(self, repo: str, branch: str, start: float, end: float, step: Optional[float] = None) -> List[dict]:
+        """Snapshots in [start, end], optionally reduced to the last one per `step` seconds."""
+        with self._lock:
+            points = list(self._decode(repo, branch, start, end))
+        return bucket_last(points, step) if step else points
+
+
+def velocity(points: List[dict], field: str = "completed_tasks") -> List[dict]:
+    """Tasks completed between consecutive points (negative when tasks were reopened)."""
+    series = []
+    for previous, point in zip(points, points[1:]):
+        done, before = point["values"].get(field), previous["values"].get(field)
+        if done is not None and before is not None:
+            series.append({"ts": point["ts"], "completed": done - before})
+    return series
+
+
+def burndown(points: List[dict]) -> List[dict]:
+    """Remaining (not completed) tasks at each point."""
+    return [
+        {
+            "ts": p["ts"],
+            "total": p["values"].get("total_tasks"),
+            "remaining": p["values"]["total_tasks"] - p["values"].get("completed_tasks", 0),
+        }
+        for p in points
+        if p["values"].get("total_tasks") is not None
+    ]
+
+
+_HISTORIES: Dict[str, MetricsHistory] = {}
+_HISTORIES_LOCK = threading.Lock()
+
+
+def get_metrics_history(path: str) -> MetricsHistory:
+    with _HISTORIES_LOCK:
+        history = _HISTORIES.get(path)
+        if history is None:
+            history = _HISTORIES[path] = MetricsHistory(path)
+        return history
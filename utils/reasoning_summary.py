@@ -0,0 +1,113 @@
+# utils/reasoning_summary.py
+
+import hashlib
+from typing import Callable, Iterable, List
+
+# Bump when the prompts below change so cached summaries are regenerated.
+SUMMARY_VERSION = "1"
+MAX_DIRECT_THOUGHTS = 100   # up to this many lines go to the model in one prompt, as before
+VERBATIM_TASK_THOUGHTS = 5  # smaller traces feed the reduce step as-is, without a map call
+REDUCE_BATCH = 40           # per-task summaries combined per reduce prompt
+
+PROJECT_PROMPT = """
+You are summarizing the collective reasoning across multiple AI tasks.
+
+Here are the collected reasoning thoughts:
+
+{thoughts}
+
+Please summarize:
+- Main reasoning themes across tasks
+- Key insights discovered
+- Common patterns of memory reuse (recall)
+- Novel ideas that emerged
+- General quality of the AI reasoning
+
+Keep your summary under 250 words.
+"""
+
+TASK_PROMPT = """
+You are summarizing the reasoning an AI pod recorded while working on task {task_id}.
+
+Here are its thoughts, alternatives considered and improvement opportunities:
+
+{thoughts}
+
+In under 80 words, capture the main reasoning, key insights, any reuse of prior memory,
+and any novel ideas.
+"""
+
+COMBINE_PROMPT = """
+You are summarizing the collective reasoning across multiple AI tasks.
+
+Here are per-task reasoning summaries:
+
+{thoughts}
+
+Please summarize:
+- Main reasoning themes across tasks
+- Key insights discovered
+- Common patterns of memory reuse (recall)
+- Novel ideas that emerged
+- General quality of the AI reasoning
+
+Keep your summary under 250 words.
+"""
+
+
+def trace_thoughts(trace: dict) -> List[str]:
+    """Thoughts, alternatives and improvement opportunities of one trace, as text lines."""
+    lines = []
+    try:
+        for t in trace.get("thoughts", []) or []:
+            lines.append(t.get("thought", "") if isinstance(t, dict) else str(t))
+        lines.extend(str(a) for a in trace.get("alternatives", []) or [])
+        lines.extend(str(i) for i in trace.get("improvement_opportunities", []) or [])
+    except Exception:
+        return []
+    return [line for line in lines if line]
+
+
+def fingerprint(blob_shas: Iterable[tuple]) -> str:
+    """Stable digest of (path, blob_sha) pairs: it changes exactly when some trace's content does."""
+    digest = hashlib.sha256(SUMMARY_VERSION.encode())
+    for path, sha in sorted(blob_shas):
+        digest.update(f"{path}\0{sha}\n".encode())
+    return digest.hexdigest()
+
+
+def summarize_project(records: Iterable[dict], complete: Callable[[str], str], warehouse) -> str:
+    """
+    Summarize every trace in `records` (dicts with task_id, blob_sha, trace). Small projects get
+    the single prompt on the first MAX_DIRECT_THOUGHTS lines; larger ones are map-reduced: each
+    trace is summarized once per blob sha (cached in `warehouse`), then the per-task summaries
+    are combined REDUCE_BATCH at a time until one remains.
+    """
+    per_task = [(r["task_id"], r["blob_sha"], trace_thoughts(r["trace"])) for r in records]
+    per_task = [item for item in per_task if item[2]]
+    total = sum(len(lines) for _, _, lines in per_task)
+    if not total:
+        return "No reasoning available as no thoughts found."
+
+    if total <= MAX_DIRECT_THOUGHTS:
+        lines = [line for _, _, task_lines in per_task for line in task_lines]
+        return complete(PROJECT_PROMPT.format(thoughts="\n".join(lines)))
+
+    summaries = []
+    for task_id, blob_sha, lines in per_task:
+        if len(lines) <= VERBATIM_TASK_THOUGHTS:
+            summaries.append(f"{task_id}: " + " / ".join(lines))
+            continue
+        key = f"{SUMMARY_VERSION}:{blob_sha}"
+        summary = warehouse.cached_summary("task", key)
+        if summary is None:
+            summary = complete(TASK_PROMPT.format(task_id=task_id, thoughts="\n".join(lines[:MAX_DIRECT_THOUGHTS])))
+            warehouse.remember_summary("task", key, summary)
+        summaries.append(f"{task_id}: {summary}")
+
+    while len(summaries) > REDUCE_BATCH:
+        summaries = [
+            complete(COMBINE_PROMPT.format(thoughts="\n\n".join(summaries[start:start + REDUCE_BATCH])))
+            for start in range(0, len(summaries), REDUCE_BATCH)
+        ]
+    return complete(COMBINE_PROMPT.format(thoughts="\n\n".join(summaries)))
@@ -0,0 +1,143 @@
+# utils/sandbox_usage.py
+
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from utils.trace_warehouse import trace_task_id
+
+COMPARE_FILES_LIMIT = 300  # GitHub's compare API lists at most this many files
+
+
+def _is_trace(path: str) -> bool:
+    return bool(trace_task_id(path)) or path.endswith("reasoning_trace.md")
+
+
+def _commit_date(entry: dict) -> Optional[str]:
+    commit = entry.get("commit") or {}
+    return ((commit.get("committer") or commit.get("author")) or {}).get("date")
+
+
+def branch_usage(comparison: dict, head_sha: str) -> dict:
+    """Usage state of a sandbox from a `base...branch` compare: what the branch has done since it forked."""
+    commits = comparison.get("commits") or []
+    files = comparison.get("files") or []
+    dates = [d for d in (_commit_date(c) for c in commits) if d]
+    return {
+        "head_sha": head_sha,
+        "base_date": _commit_date(comparison.get("merge_base_commit") or {}),
+        "created": min(dates) if dates else None,
+        "last_commit": max(dates) if dates else None,
+        "commits": comparison.get("total_commits", len(commits)),
+        "files": sorted({f["filename"] for f in files if f.get("status") != "removed"}),
+        "files_truncated": len(files) >= COMPARE_FILES_LIMIT,
+    }
+
+
+def extend_usage(state: dict, comparison: dict, head_sha: str) -> dict:
+    """Fold an `old_head...new_head` compare (the branch moved forward) into an existing state."""
+    update = branch_usage(comparison, head_sha)
+    removed = {f["filename"] for f in comparison.get("files") or [] if f.get("status") == "removed"}
+    dates = [d for d in (state["last_commit"], update["last_commit"]) if d]
+    return {
+        "head_sha": head_sha,
+        "base_date": state.get("base_date"),
+        "created": state["created"] or update["created"],
+        "last_commit": max(dates) if dates else None,
+        "commits": state["commits"] + update["commits"],
+        "files": sorted((set(state["files"]) - removed) | set(update["files"])),
+        "files_truncated": state["files_truncated"] or update["files_truncated"],
+    }
+
+
+def usage_record(branch: str, repo_name: str, state: dict) -> dict:
+    return {
+        "branch": branch,
+        "repo_name": repo_name,
+        "head_sha": state["head_sha"],
+        "created": state["created"],
+        "last_commit": state["last_commit"],
+        "last_activity": state["last_commit"] or state.get("base_date"),
+        "commits": state["commits"],
+        "files_committed": len(state["files"]),
+        "reasoning_traces": sum(1 for path in state["files"] if _is_trace(path)),
+        "files_truncated": state["files_truncated"],
+    }
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def plan_gc(records: List[dict], now: datetime, max_idle_days: float, max_sandboxes: Optional[int],
+            min_idle_hours: float) -> dict:
+    """
+    Split scanned sandboxes into `evict` and `keep`. Branches idle longer than `max_idle_days`
+    are evicted; then, while more than `max_sandboxes` remain, the least recently active (smaller
+    first on ties) are evicted too, but never one active within `min_idle_hours`. Branches whose
+    last activity is unknown, or that failed to scan, are always kept.
+    """
+    ranked, keep = [], []
+    for record in records:
+        activity = _parse_date(record.get("last_activity"))
+        if record.get("error") or activity is None:
+            keep.append({**record, "reason": "unknown_activity"})
+            continue
+        idle_days = (now - activity).total_seconds() / 86400
+        size = record.get("commits", 0) + record.get("files_committed", 0)
+        ranked.append((activity, size, {**record, "idle_days": round(idle_days, 2), "size": size}))
+    ranked.sort(key=lambda r: (r[0], r[1]))
+
+    evict = [{**r, "reason": "idle"} for _, _, r in ranked if r["idle_days"] > max_idle_days]
+    remaining = [r for _, _, r in ranked if r["idle_days"] <= max_idle_days]
+    if max_sandboxes is not None:
+        excess = len(remaining) + len(keep) - max_sandboxes
+        for record in list(remaining):
+            if excess <= 0:
+                break
+            if record["idle_days"] * 24 >= min_idle_hours:
+                evict.append({**record, "reason": "over_capacity"})
+                remaining.remove(record)
+                excess -= 1
+    return {"evict": evict, "keep": remaining + keep}
+
+
+class SandboxUsageCache:
+    """Per-branch usage states for one repo, each valid for the branch head sha it was computed at."""
+
+    def __init__(self):
+        self._states: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, branch: str) -> Optional[dict]:
+        with self._lock:
+            return self._states.get(branch)
+
+    def put(self, branch: str, state: dict):
+        with self._lock:
+            self._states[branch] = state
+
+    def retain(self, branches: Iterable[str]):
+        """Forget branches that no longer exist."""
+        keep = set(branches)
+        with self._lock:
+            for branch in [b for b in self._states if b not in keep]:
+                del self._states[branch]
+
+
+# ---- Per repo registry ----
+
+_CACHES: Dict[str, SandboxUsageCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_sandbox_usage_cache(repo_key: str) -> SandboxUsageCache:
+    with _CACHES_LOCK:
+        cache = _CACHES.get(repo_key)
+        if cache is None:
+            cache = _CACHES[repo_key] = SandboxUsageCache()
+        return cache
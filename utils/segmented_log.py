@@ -0,0 +1,121 @@
+# utils/segmented_log.py
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+SEGMENT_SIZE = 100
+_SEGMENT_NAME = re.compile(r"^(\d{6})\.jsonl$")
+
+
+def segment_name(number: int) -> str:
+    return f"{number:06d}.jsonl"
+
+
+def segment_number(name: str) -> Optional[int]:
+    match = _SEGMENT_NAME.match(name)
+    return int(match.group(1)) if match else None
+
+
+def encode_entries(entries: List[dict]) -> str:
+    """One compact JSON object per line, newline-terminated so segments can be concatenated."""
+    return "".join(json.dumps(entry, ensure_ascii=False, default=str, separators=(",", ":")) + "\n" for entry in entries)
+
+
+def decode_entries(text: str) -> List[dict]:
+    entries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue  # a torn write loses one line, not the segment
+    return entries
+
+
+def plan_append(last_number: int, last_count: int, new_count: int, segment_size: int = SEGMENT_SIZE) -> List[Tuple[int, int, int]]:
+    """
+    Split `new_count` appended entries across segments.
+    Returns (segment_number, entries_already_in_segment, entries_to_add) per touched segment;
+    `last_number` is 0 when the log has no segments yet.
+    """
+    plan = []
+    number, count = (last_number, last_count) if last_number else (1, 0)
+    remaining = new_count
+    while remaining > 0:
+        if count >= segment_size:
+            number, count = number + 1, 0
+        take = min(segment_size - count, remaining)
+        plan.append((number, count, take))
+        count += take
+        remaining -= take
+    return plan
+
+
+def plan_writes(directory: str, last_number: int, last_entries: List[dict], entries: List[dict]) -> List[dict]:
+    """
+    Full contents of every segment an append touches: the current last segment topped up
+    to SEGMENT_SIZE, then as many new segments as needed.
+    """
+    writes, taken = [], 0
+    for number, existing, take in plan_append(last_number, len(last_entries), len(entries)):
+        previous = list(last_entries) if existing else []
+        writes.append({
+            "number": number,
+            "path": f"{directory}/{segment_name(number)}",
+            "entries": previous + entries[taken:taken + take],
+            "exists": bool(existing),
+        })
+        taken += take
+    return writes
+
+
+# ---- Segment cache ----
+# Keyed by blob sha, so an entry never goes stale: a changed segment has a new sha.
+
+_SEGMENTS: "OrderedDict[str, List[dict]]" = OrderedDict()
+_SEGMENTS_LOCK = threading.Lock()
+_SEGMENTS_SIZE = 512
+
+
+def cached_segment(sha: str) -> Optional[List[dict]]:
+    with _SEGMENTS_LOCK:
+        entries = _SEGMENTS.get(sha)
+        if entries is not None:
+            _SEGMENTS.move_to_end(sha)
+        return entries
+
+
+def remember_segment(sha: str, entries: List[dict]):
+    with _SEGMENTS_LOCK:
+        _SEGMENTS[sha] = entries
+        _SEGMENTS.move_to_end(sha)
+        while len(_SEGMENTS) > _SEGMENTS_SIZE:
+            _SEGMENTS.popitem(last=False)
+
+
+# ---- Last-segment pointers ----
+# Lets an append go straight to update_file; a stale pointer fails the sha check and is re-listed.
+
+_TAILS: Dict[str, dict] = {}
+_TAILS_LOCK = threading.Lock()
+
+
+def get_tail(log_key: str) -> Optional[dict]:
+    with _TAILS_LOCK:
+        tail = _TAILS.get(log_key)
+        return dict(tail) if tail else None
+
+
+def set_tail(log_key: str, number: int, sha: str):
+    with _TAILS_LOCK:
+        _TAILS[log_key] = {"number": number, "sha": sha}
+
+
+def forget_tail(log_key: str):
+    with _TAILS_LOCK:
+        _TAILS.pop(log_key, None)
@@ -0,0 +1,308 @@
+# utils/task_index.py
+
+import heapq
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+EDGE_TYPES = ("depends_on", "handoff")
+
+
+def _as_list(value) -> List[str]:
+    """Normalize a depends_on value (None, str or list) into a list of task IDs."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value if v]
+
+
+class TaskIndex:
+    """
+    Adjacency index over task.yaml built once per file version.
+
+    `upstream[task]` holds the edges a task points back to (its dependencies and the
+    task it was handed off from); `downstream[task]` holds the reverse edges, so
+    "who depends on X" is O(degree) instead of a scan over every task.
+    """
+
+    def __init__(self, tasks: Dict[str, dict], version: Optional[str] = None):
+        self.tasks = tasks or {}
+        self.version = version
+        self.upstream: Dict[str, Dict[str, List[str]]] = {}
+        self.downstream: Dict[str, Dict[str, List[str]]] = {}
+        self.edges: List[dict] = []
+
+        self._secondary: Dict[str, Dict[str, List[str]]] = {}
+        self._sorted: Dict[tuple, List[str]] = {}
+
+        for task_id, task in self.tasks.items():
+            for dep in _as_list(task.get("depends_on")):
+                self._add_edge(dep, task_id, "depends_on")
+            handoff_from = task.get("handoff_from")
+            if handoff_from:
+                self._add_edge(str(handoff_from), task_id, "handoff")
+
+    def _add_edge(self, source: str, target: str, edge_type: str):
+        self.edges.append({"source": source, "target": target, "type": edge_type})
+        self.upstream.setdefault(target, {}).setdefault(edge_type, []).append(source)
+        self.downstream.setdefault(source, {}).setdefault(edge_type, []).append(target)
+
+    @staticmethod
+    def _neighbours(adjacency: Dict[str, Dict[str, List[str]]], task_id: str, edge_types: Iterable[str]) -> List[str]:
+        seen = []
+        by_type = adjacency.get(task_id, {})
+        for edge_type in edge_types:
+            for other in by_type.get(edge_type, []):
+                if other not in seen:
+                    seen.append(other)
+        return seen
+
+    # ---- Direct and transitive lookups ----
+
+    def direct_upstream(self, task_id: str, edge_types: Iterable[str] = EDGE_TYPES) -> List[str]:
+        return self._neighbours(self.upstream, task_id, edge_types)
+
+    def direct_downstream(self, task_id: str, edge_types: Iterable[str] = EDGE_TYPES) -> List[str]:
+        return self._neighbours(self.downstream, task_id, edge_types)
+
+    def _walk(self, adjacency, task_id: str, edge_types: Iterable[str]) -> List[dict]:
+        edge_types = tuple(edge_types)
+        depth = {task_id: 0}
+        queue = deque([task_id])
+        result = []
+        while queue:
+            current = queue.popleft()
+            for other in self._neighbours(adjacency, current, edge_types):
+                if other in depth:
+                    continue
+                depth[other] = depth[current] + 1
+                result.append({"task_id": other, "depth": depth[other], "known": other in self.tasks})
+                queue.append(other)
+        return result
+
+    def transitive_upstream(self, task_id: str, edge_types: Iterable[str] = EDGE_TYPES) -> List[dict]:
+        """All tasks `task_id` (indirectly) depends on, with their distance."""
+        return self._walk(self.upstream, task_id, edge_types)
+
+    def transitive_downstream(self, task_id: str, edge_types: Iterable[str] = EDGE_TYPES) -> List[dict]:
+        """All tasks that (indirectly) depend on `task_id`, with their distance."""
+        return self._walk(self.downstream, task_id, edge_types)
+
+    def missing_references(self) -> List[dict]:
+        """Edges whose source task is not defined in task.yaml."""
+        return [e for e in self.edges if e["source"] not in self.tasks]
+
+    # ---- Secondary indexes for list queries ----
+
+    def _by(self, field: str) -> Dict[str, List[str]]:
+        """Task IDs grouped by the value of `field`, built on first use and kept for this version."""
+        grouped = self._secondary.get(field)
+        if grouped is None:
+            grouped = {}
+            for task_id, task in self.tasks.items():
+                grouped.setdefault(str(task.get(field)), []).append(task_id)
+            self._secondary[field] = grouped
+        return grouped
+
+    def _sorted_ids(self, sort_by: Optional[str], descending: bool) -> List[str]:
+        key = (sort_by, descending)
+        ordered = self._sorted.get(key)
+        if ordered is None:
+            if not sort_by or sort_by == "task_id":
+                ordered = sorted(self.tasks) if sort_by else list(self.tasks)
+                if descending:
+                    ordered.reverse()
+            else:
+                def sort_key(tid):
+                    value = self.tasks[tid].get(sort_by)
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        return (0, value, "", tid)
+                    return (1, 0, str(value), tid)
+                present = [t for t in self.tasks if self.tasks[t].get(sort_by) is not None]
+                missing = [t for t in self.tasks if self.tasks[t].get(sort_by) is None]
+                ordered = sorted(present, key=sort_key, reverse=descending) + missing
+            self._sorted[key] = ordered
+        return ordered
+
+    def select(
+        self,
+        filters: Optional[Dict[str, Iterable[str]]] = None,
+        updated_since: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> List[str]:
+        """
+        Task IDs matching every filter, in sorted order (file order by default).
+        `filters` maps a field to the accepted values; `updated_since` compares ISO timestamps
+        against `updated_at`, falling back to `created_at`. Tasks without `sort_by` sort last.
+        """
+        matched: Optional[Set[str]] = None
+        for field, values in sorted((filters or {}).items(), key=lambda kv: len(kv[1])):
+            grouped = self._by(field)
+            ids = {tid for value in values for tid in grouped.get(str(value), [])}
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                return []
+
+        if updated_since:
+            candidates = matched if matched is not None else self.tasks
+            matched = {
+                tid for tid in candidates
+                if str(self.tasks[tid].get("updated_at") or self.tasks[tid].get("created_at") or "") >= updated_since
+            }
+
+        ordered = self._sorted_ids(sort_by, descending)
+        if matched is None:
+            return list(ordered)
+        return [tid for tid in ordered if tid in matched]
+
+    # ---- Whole-graph queries ----
+
+    def cycles(self, edge_types: Iterable[str] = EDGE_TYPES) -> List[List[str]]:
+        """Return strongly connected components that form cycles (Tarjan, iterative)."""
+        edge_types = tuple(edge_types)
+        index_of: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        components: List[List[str]] = []
+        counter = 0
+
+        for root in self.tasks:
+            if root in index_of:
+                continue
+            work = [(root, iter(self.direct_downstream(root, edge_types)))]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in self.tasks:
+                        continue
+                    if child not in index_of:
+                        index_of[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.direct_downstream(child, edge_types))))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.direct_downstream(node, edge_types):
+                        components.append(sorted(component))
+        return components
+
+    def topological_order(self, edge_types: Iterable[str] = EDGE_TYPES) -> dict:
+        """Kahn's algorithm over known tasks. Tasks caught in cycles are reported separately."""
+        edge_types = tuple(edge_types)
+        in_degree = {tid: 0 for tid in self.tasks}
+        for tid in self.tasks:
+            for dep in self.direct_upstream(tid, edge_types):
+                if dep in self.tasks:
+                    in_degree[tid] += 1
+
+        heap = [tid for tid, degree in in_degree.items() if degree == 0]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            tid = heapq.heappop(heap)
+            order.append(tid)
+            for child in self.direct_downstream(tid, edge_types):
+                if child not in in_degree:
+                    continue
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    heapq.heappush(heap, child)
+
+        ordered = set(order)
+        blocked = sorted(tid for tid in self.tasks if tid not in ordered)
+        return {"order": order, "blocked_by_cycles": blocked}
+
+    def critical_path(
+        self,
+        edge_types: Iterable[str] = EDGE_TYPES,
+        weight_field: Optional[str] = None,
+        remaining_only: bool = False,
+    ) -> dict:
+        """
+        Longest weighted chain through the dependency DAG.
+        Each task weighs `task[weight_field]` when numeric, otherwise 1; done tasks weigh 0 when `remaining_only`.
+        """
+        edge_types = tuple(edge_types)
+
+        def weight(tid: str) -> float:
+            task = self.tasks.get(tid, {})
+            if remaining_only and task.get("done"):
+                return 0
+            value = task.get(weight_field) if weight_field else None
+            return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 1
+
+        order = self.topological_order(edge_types)["order"]
+        best: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for tid in order:
+            candidates = [dep for dep in self.direct_upstream(tid, edge_types) if dep in best]
+            parent = max(candidates, key=lambda d: best[d], default=None)
+            best[tid] = weight(tid) + (best[parent] if parent else 0)
+            previous[tid] = parent
+
+        if not best:
+            return {"path": [], "length": 0}
+
+        end = max(best, key=lambda t: best[t])
+        path = []
+        node = end
+        while node:
+            path.append(node)
+            node = previous[node]
+        path.reverse()
+        return {"path": path, "length": best[end]}
+
+
+# ---- Version-keyed cache ----
+
+_INDEX_CACHE: "OrderedDict[str, TaskIndex]" = OrderedDict()
+_INDEX_CACHE_LOCK = threading.Lock()
+_INDEX_CACHE_SIZE = 32
+
+
+def get_task_index(cache_key: str, version: str, load_tasks: Callable[[], Dict[str, dict]]) -> TaskIndex:
+    """Return the index for `cache_key` at `version`, building it via `load_tasks()` only on a miss."""
+    with _INDEX_CACHE_LOCK:
+        cached = _INDEX_CACHE.get(cache_key)
+        if cached is not None and cached.version == version:
+            _INDEX_CACHE.move_to_end(cache_key)
+            return cached
+
+    index = TaskIndex(load_tasks(), version=version)
+
+    with _INDEX_CACHE_LOCK:
+        _INDEX_CACHE[cache_key] = index
+        _INDEX_CACHE.move_to_end(cache_key)
+        while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return index
+
+
+def invalidate_task_index(cache_key: str):
+    with _INDEX_CACHE_LOCK:
+        _INDEX_CACHE.pop(cache_key, None)
@@ -0,0 +1,237 @@
+# utils/task_scheduler.py
+
+import heapq
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.task_index import TaskIndex, _as_list
+
+CANDIDATE_STATUSES = ("planned", "backlog")
+DONE_STATUSES = ("completed", "done")
+DEFAULT_PRIORITY = 100
+ANY_POD = "*"
+
+
+def is_done(task: dict) -> bool:
+    return bool(task.get("done")) or task.get("status") in DONE_STATUSES
+
+
+class ReadyQueue:
+    """
+    Priority queues of ready tasks — planned/backlog tasks whose `depends_on` are all done —
+    kept per pod plus one across all pods, with short-lived claims (leases) so two pods
+    never pick up the same task.
+
+    Heaps use lazy deletion: an entry is live only while its stamp matches `_stamp[task_id]`,
+    so removals are O(1) and `next`/`claim` are O(log n) amortized.
+    """
+
+    def __init__(self, index: TaskIndex, version: Optional[str] = None):
+        self.version = version or index.version
+        self.built_at = time.time()
+        self.checked_at = self.built_at
+        self.lock = threading.RLock()
+        self._index = index
+        self._tasks: Dict[str, dict] = {
+            tid: {
+                "status": t.get("status"),
+                "done": is_done(t),
+                "pod_owner": t.get("pod_owner") or "unassigned",
+                "description": t.get("description", ""),
+                "priority": self._priority(t),
+            }
+            for tid, t in index.tasks.items()
+        }
+        self._heaps: Dict[str, List[Tuple]] = {}
+        self._stamp: Dict[str, int] = {}
+        self._counter = 0
+        self.leases: Dict[str, dict] = {}
+
+        for tid in self._tasks:
+            self._refresh(tid)
+
+    @staticmethod
+    def _priority(task: dict) -> Tuple:
+        priority = task.get("priority", DEFAULT_PRIORITY)
+        if not isinstance(priority, (int, float)) or isinstance(priority, bool):
+            priority = DEFAULT_PRIORITY
+        return (priority, str(task.get("created_at") or ""))
+
+    # ---- Readiness bookkeeping ----
+
+    def _deps(self, task_id: str) -> List[str]:
+        return _as_list(self._index.tasks.get(task_id, {}).get("depends_on"))
+
+    def _is_ready(self, task_id: str) -> bool:
+        task = self._tasks.get(task_id)
+        if not task or task["done"] or task["status"] not in CANDIDATE_STATUSES:
+            return False
+        return all(self._tasks.get(dep, {}).get("done") for dep in self._deps(task_id))
+
+    def _refresh(self, task_id: str):
+        """Re-evaluate one task: push a fresh heap entry if ready, otherwise invalidate old ones."""
+        self._counter += 1
+        if not self._is_ready(task_id):
+            self._stamp.pop(task_id, None)
+            return
+        self._stamp[task_id] = self._counter
+        task = self._tasks[task_id]
+        entry = (task["priority"], task_id, self._counter)
+        heapq.heappush(self._heaps.setdefault(task["pod_owner"], []), entry)
+        heapq.heappush(self._heaps.setdefault(ANY_POD, []), entry)
+
+    def _live(self, entry) -> bool:
+        return self._stamp.get(entry[1]) == entry[2]
+
+    def _lease_holder(self, task_id: str, now: float) -> Optional[str]:
+        lease = self.leases.get(task_id)
+        if not lease:
+            return None
+        if lease["expires_at"] <= now:
+            self.leases.pop(task_id, None)
+            return None
+        return lease["pod_owner"]
+
+    def _top(self, pod_owner: Optional[str], limit: int, skip_leased_by_others: Optional[str] = None) -> List[str]:
+        heap = self._heaps.get(pod_owner or ANY_POD, [])
+        now = time.time()
+        taken, result = [], []
+        while heap and len(result) < limit:
+            entry = heapq.heappop(heap)
+            if not self._live(entry):
+                continue
+            taken.append(entry)
+            holder = self._lease_holder(entry[1], now)
+            if skip_leased_by_others is not None and holder and holder != skip_leased_by_others:
+                continue
+            result.append(entry[1])
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return result
+
+    # ---- Queries ----
+
+    def peek(self, pod_owner: Optional[str], limit: int = 10) -> List[dict]:
+        with self.lock:
+            now = time.time()
+            return [
+                {
+                    "task_id": tid,
+                    "description": self._tasks[tid]["description"],
+                    "status": self._tasks[tid]["status"],
+                    "pod_owner": self._tasks[tid]["pod_owner"],
+                    "claimed_by": self._lease_holder(tid, now)
+                }
+                for tid in self._top(pod_owner, limit)
+            ]
+
+    def ready_count(self, pod_owner: Optional[str] = None) -> int:
+        with self.lock:
+            return sum(
+                1 for tid in self._stamp
+                if not pod_owner or self._tasks[tid]["pod_owner"] == pod_owner
+            )
+
+    def claim(self, pod_owner: str, ttl_seconds: int, task_id: Optional[str] = None) -> Optional[dict]:
+        """Atomically lease the best ready task (or a specific one) to `pod_owner`."""
+        with self.lock:
+            now = time.time()
+            if task_id:
+                if task_id not in self._stamp:
+                    return None
+                holder = self._lease_holder(task_id, now)
+                if holder and holder != pod_owner:
+                    return None
+            else:
+                candidates = self._top(pod_owner, 1, skip_leased_by_others=pod_owner)
+                if not candidates:
+                    return None
+                task_id = candidates[0]
+            lease = {"task_id": task_id, "pod_owner": pod_owner, "claimed_at": now, "expires_at": now + ttl_seconds}
+            self.leases[task_id] = lease
+            return dict(lease)
+
+    def release(self, task_id: str, pod_owner: Optional[str] = None) -> bool:
+        with self.lock:
+            lease = self.leases.get(task_id)
+            if not lease or (pod_owner and lease["pod_owner"] != pod_owner):
+                return False
+            self.leases.pop(task_id, None)
+            return True
+
+    def claimed_by_other(self, task_id: str, pod_owner: Optional[str]) -> Optional[str]:
+        with self.lock:
+            holder = self._lease_holder(task_id, time.time())
+            return holder if holder and holder != pod_owner else None
+
+    # ---- Incremental updates ----
+
+    def _set(self, task_id: str, **fields):
+        if task_id not in self._tasks:
+            return
+        self._tasks[task_id].update(fields)
+        self._refresh(task_id)
+
+    def _refresh_downstream(self, task_id: str):
+        for child in self._index.direct_downstream(task_id, ("depends_on",)):
+            if child in self._tasks:
+                self._refresh(child)
+
+    def mark_started(self, task_id: str):
+        with self.lock:
+            self.leases.pop(task_id, None)
+            self._set(task_id, status="in_progress")
+
+    def mark_completed(self, task_id: str):
+        with self.lock:
+            self.leases.pop(task_id, None)
+            self._set(task_id, status="completed", done=True)
+            self._refresh_downstream(task_id)
+
+    def mark_reopened(self, task_id: str):
+        with self.lock:
+            self._set(task_id, status="in_progress", done=False)
+            self._refresh_downstream(task_id)
+
+    def mark_planned(self, task_ids: Iterable[str]):
+        with self.lock:
+            for tid in task_ids:
+                self._set(tid, status="planned")
+
+    def adopt_leases(self, other: "ReadyQueue"):
+        """Carry unexpired leases over from a queue this one replaces."""
+        now = time.time()
+        with self.lock:
+            for tid, lease in other.leases.items():
+                if lease["expires_at"] > now and tid in self._stamp:
+                    self.leases[tid] = lease
+
+
+# ---- Per repo/branch registry ----
+
+_QUEUES: Dict[str, ReadyQueue] = {}
+_QUEUES_LOCK = threading.Lock()
+
+
+def get_ready_queue(cache_key: str) -> Optional[ReadyQueue]:
+    with _QUEUES_LOCK:
+        return _QUEUES.get(cache_key)
+
+
+def set_ready_queue(cache_key: str, queue: ReadyQueue) -> ReadyQueue:
+    with _QUEUES_LOCK:
+        previous = _QUEUES.get(cache_key)
+        if previous is not None:
+            queue.adopt_leases(previous)
+        _QUEUES[cache_key] = queue
+    return queue
+
+
+def invalidate_ready_queue(cache_key: str):
+    """Force the next lookup to rebuild from task.yaml (leases survive the rebuild)."""
+    with _QUEUES_LOCK:
+        queue = _QUEUES.get(cache_key)
+        if queue is not None:
+            queue.checked_at = 0
+            queue.version = None
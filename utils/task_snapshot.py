@@ -0,0 +1,80 @@
+# utils/task_snapshot.py
+
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+SNAPSHOT_FORMAT = 1
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj: dict):
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def dump_snapshot(task_data: dict, source_sha: str) -> str:
+    """
+    Serialize parsed task.yaml as compact JSON stamped with the blob sha it was derived from.
+    YAML timestamps are tagged so they load back as the same datetime/date objects.
+    """
+    return json.dumps(
+        {"format": SNAPSHOT_FORMAT, "source_sha": source_sha, "task_data": task_data},
+        default=_encode,
+        separators=(",", ":"),
+    )
+
+
+def load_snapshot(raw: str, source_sha: str) -> Optional[dict]:
+    """Return the task data in `raw`, or None if it was derived from a different task.yaml version."""
+    try:
+        snapshot = json.loads(raw, object_hook=_decode if "__date" in raw else None)
+    except ValueError:
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        return None
+    if snapshot.get("source_sha") != source_sha:
+        return None
+    return snapshot.get("task_data") or {}
+
+
+# ---- In-process snapshot cache ----
+# Holds the serialized snapshot rather than the parsed dict: handlers mutate what they load,
+# and json.loads of the cached string is cheaper than a deepcopy.
+
+_SNAPSHOTS: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+_SNAPSHOTS_LOCK = threading.Lock()
+_SNAPSHOTS_SIZE = 32
+
+
+def cached_task_data(cache_key: str, source_sha: Optional[str]) -> Optional[dict]:
+    if not source_sha:
+        return None
+    with _SNAPSHOTS_LOCK:
+        cached = _SNAPSHOTS.get(cache_key)
+        if cached is None or cached[0] != source_sha:
+            return None
+        _SNAPSHOTS.move_to_end(cache_key)
+        raw = cached[1]
+    return load_snapshot(raw, source_sha)
+
+
+def remember_snapshot(cache_key: str, source_sha: str, raw: str):
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS[cache_key] = (source_sha, raw)
+        _SNAPSHOTS.move_to_end(cache_key)
+        while len(_SNAPSHOTS) > _SNAPSHOTS_SIZE:
+            _SNAPSHOTS.popitem(last=False)
@@ -0,0 +1,360 @@
+# utils/trace_warehouse.py
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional
+
+TRACE_PATH_PATTERN = re.compile(r"^project/outputs/(.+)/reasoning_trace\.yaml$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reasoning_traces (
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    path TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    blob_sha TEXT NOT NULL,
+    thought_quality REAL,
+    recall_used INTEGER,
+    novel_insight INTEGER,
+    total_thoughts INTEGER NOT NULL DEFAULT 0,
+    improvement_opportunities TEXT,
+    trace_json TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (repo, branch, path)
+);
+CREATE INDEX IF NOT EXISTS reasoning_traces_task ON reasoning_traces (repo, branch, task_id);
+CREATE TABLE IF NOT EXISTS trace_sync (
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    head_sha TEXT,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (repo, branch)
+);
+CREATE TABLE IF NOT EXISTS trace_totals (
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    traces INTEGER NOT NULL,
+    quality_sum REAL NOT NULL,
+    quality_count INTEGER NOT NULL,
+    recalls INTEGER NOT NULL,
+    novelties INTEGER NOT NULL,
+    PRIMARY KEY (repo, branch)
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE TABLE IF NOT EXISTS metrics_reports (
+    repo TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    path TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (repo, branch)
+);
+"""
+
+_TOTALS_FROM_TRACES = (
+    "SELECT COUNT(*), COALESCE(SUM(thought_quality), 0), COUNT(thought_quality), "
+    "COALESCE(SUM(recall_used), 0), COALESCE(SUM(novel_insight), 0) "
+    "FROM reasoning_traces WHERE repo = ? AND branch = ?"
+)
+
+
+def trace_task_id(path: str) -> Optional[str]:
+    """
+    Task ID for a reasoning_trace.yaml path: everything between `project/outputs/` and the file name,
+    since task IDs may contain slashes (`discovery/problem-statement.md-c7afac`). None if not a trace.
+    """
+    match = TRACE_PATH_PATTERN.match(path)
+    return match.group(1) if match else None
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _flag(value) -> Optional[int]:
+    return None if value is None else int(bool(value))
+
+
+def trace_columns(trace: dict) -> dict:
+    """The typed scoring columns stored alongside the raw trace."""
+    scoring = trace.get("scoring") or {}
+    if not isinstance(scoring, dict):
+        scoring = {}
+    thoughts = trace.get("thoughts") or []
+    improvements = trace.get("improvement_opportunities") or []
+    return {
+        "thought_quality": _number(scoring.get("thought_quality")),
+        "recall_used": _flag(scoring.get("recall_used")),
+        "novel_insight": _flag(scoring.get("novel_insight")),
+        "total_thoughts": len(thoughts) if isinstance(thoughts, list) else 0,
+        "improvement_opportunities": "; ".join(str(i) for i in improvements) if isinstance(improvements, list) else str(improvements),
+    }
+
+
+# Declared export schema: every exported record has exactly these keys, in this order.
+EXPORT_FIELDS = (
+    "task_id",
+    "thought_quality",
+    "recall_used",
+    "novel_insight",
+    "total_thoughts",
+    "summary",
+    "thoughts",
+    "alternatives",
+    "improvement_opportunities",
+)
+SUMMARY_FIELDS = ("task_id", "thought_quality", "recall_used", "novel_insight", "total_thoughts", "improvement_opportunities")
+
+
+def export_record(trace: dict) -> dict:
+    """Project a stored trace onto EXPORT_FIELDS; keys outside the schema are dropped."""
+    columns = trace_columns(trace)
+    return {
+        "task_id": trace.get("task_id"),
+        "thought_quality": columns["thought_quality"],
+        "recall_used": None if columns["recall_used"] is None else bool(columns["recall_used"]),
+        "novel_insight": None if columns["novel_insight"] is None else bool(columns["novel_insight"]),
+        "total_thoughts": columns["total_thoughts"],
+        "summary": trace.get("summary"),
+        "thoughts": trace.get("thoughts") or [],
+        "alternatives": trace.get("alternatives") or [],
+        "improvement_opportunities": trace.get("improvement_opportunities") or [],
+    }
+
+
+class TraceWarehouse:
+    """
+    SQLite copy of every reasoning_trace.yaml per repo/branch, keyed by path and blob sha so a
+    sync only re-reads traces whose content changed. Scoring fields live in typed columns;
+    the full trace is kept as JSON for exports. `trace_totals` holds running counters per
+    repo/branch, moved by each write's difference, so scoring totals are a single-row read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    # ---- Sync bookkeeping ----
+
+    def sync_state(self, repo: str, branch: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT head_sha, checked_at FROM trace_sync WHERE repo = ? AND branch = ?", (repo, branch)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def mark_checked(self, repo: str, branch: str, head_sha: Optional[str]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO trace_sync (repo, branch, head_sha, checked_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (repo, branch) DO UPDATE SET head_sha = excluded.head_sha, checked_at = excluded.checked_at",
+                (repo, branch, head_sha, time.time()),
+            )
+
+    def blob_shas(self, repo: str, branch: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, blob_sha FROM reasoning_traces WHERE repo = ? AND branch = ?", (repo, branch)
+            ).fetchall()
+        return {row["path"]: row["blob_sha"] for row in rows}
+
+    # ---- Writes ----
+
+    def upsert(self, repo: str, branch: str, path: str, blob_sha: str, trace: dict):
+        self.apply(repo, branch, {path: (blob_sha, trace)}, [])
+
+    def apply(self, repo: str, branch: str, upserts: Dict[str, tuple], deletes: Iterable[str]):
+        """Upsert `{path: (blob_sha, trace)}` and drop `deletes` in one transaction, moving the running totals by the difference."""
+        now = time.time()
+        deletes = list(deletes)
+        rows = []
+        for path, (blob_sha, trace) in upserts.items():
+            trace = trace if isinstance(trace, dict) else {}
+            columns = trace_columns(trace)
+            rows.append((
+                repo, branch, path, trace_task_id(path) or path, blob_sha,
+                columns["thought_quality"], columns["recall_used"], columns["novel_insight"],
+                columns["total_thoughts"], columns["improvement_opportunities"],
+                json.dumps(trace, default=str), now,
+            ))
+        with self._lock, self._conn:
+            self._ensure_totals(repo, branch)
+            delta = [0, 0.0, 0, 0, 0]
+            self._add_rows(delta, self._rows_for(repo, branch, list(upserts) + deletes), -1)
+            self._add_rows(delta, [(1, row[5], row[6], row[7]) for row in rows], 1)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO reasoning_traces (repo, branch, path, task_id, blob_sha, thought_quality, "
+                "recall_used, novel_insight, total_thoughts, improvement_opportunities, trace_json, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.executemany(
+                "DELETE FROM reasoning_traces WHERE repo = ? AND branch = ? AND path = ?",
+                [(repo, branch, path) for path in deletes],
+            )
+            self._conn.execute(
+                "UPDATE trace_totals SET traces = traces + ?, quality_sum = quality_sum + ?, quality_count = quality_count + ?, "
+                "recalls = recalls + ?, novelties = novelties + ? WHERE repo = ? AND branch = ?",
+                (*delta, repo, branch),
+            )
+
+    def _rows_for(self, repo: str, branch: str, paths) -> list:
+        found = []
+        paths = list(paths)
+        for start in range(0, len(paths), 500):
+            chunk = paths[start:start + 500]
+            found.extend(self._conn.execute(
+                "SELECT 1, thought_quality, recall_used, novel_insight FROM reasoning_traces "
+                f"WHERE repo = ? AND branch = ? AND path IN ({','.join('?' * len(chunk))})",
+                (repo, branch, *chunk),
+            ).fetchall())
+        return found
+
+    @staticmethod
+    def _add_rows(delta: list, rows, sign: int):
+        for count, quality, recall, novelty in rows:
+            delta[0] += sign * count
+            if quality is not None:
+                delta[1] += sign * quality
+                delta[2] += sign
+            delta[3] += sign * (recall or 0)
+            delta[4] += sign * (novelty or 0)
+
+    def _ensure_totals(self, repo: str, branch: str, rebuild: bool = False):
+        """Seed (or with `rebuild`, recompute) the totals row from the stored traces. Caller holds the lock."""
+        exists = self._conn.execute(
+            "SELECT 1 FROM trace_totals WHERE repo = ? AND branch = ?", (repo, branch)
+        ).fetchone()
+        if exists and not rebuild:
+            return
+        totals = self._conn.execute(_TOTALS_FROM_TRACES, (repo, branch)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO trace_totals (repo, branch, traces, quality_sum, quality_count, recalls, novelties) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (repo, branch, *totals),
+        )
+
+    def rebuild_totals(self, repo: str, branch: str):
+        """Repair: recompute the running totals from every stored trace."""
+        with self._lock, self._conn:
+            self._ensure_totals(repo, branch, rebuild=True)
+
+    # ---- Queries ----
+
+    def summary_rows(self, repo: str, branch: str) -> Dict[str, dict]:
+        """Scoring columns keyed by trace path."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id, path, thought_quality, recall_used, novel_insight, total_thoughts, improvement_opportunities "
+                "FROM reasoning_traces WHERE repo = ? AND branch = ?",
+                (repo, branch),
+            ).fetchall()
+        summary = {}
+        for row in rows:
+            summary[row["path"]] = {
+                "task_id": row["task_id"],
+                "thought_quality": row["thought_quality"],
+                "recall_used": None if row["recall_used"] is None else bool(row["recall_used"]),
+                "novel_insight": None if row["novel_insight"] is None else bool(row["novel_insight"]),
+                "total_thoughts": row["total_thoughts"],
+                "improvement_opportunities": row["improvement_opportunities"],
+            }
+        return summary
+
+    def scoring_totals(self, repo: str, branch: str) -> dict:
+        """Trace count, average thought quality and recall/novelty counts, read from the running totals."""
+        with self._lock, self._conn:
+            self._ensure_totals(repo, branch)
+            row = self._conn.execute(
+                "SELECT traces, quality_sum, quality_count, recalls, novelties FROM trace_totals WHERE repo = ? AND branch = ?",
+                (repo, branch),
+            ).fetchone()
+        return {
+            "traces": row["traces"],
+            "avg_quality": row["quality_sum"] / row["quality_count"] if row["quality_count"] else None,
+            "recalls": row["recalls"],
+            "novelties": row["novelties"],
+        }
+
+    def iter_trace_records(self, repo: str, branch: str) -> Iterator[dict]:
+        """`{path, blob_sha, task_id, trace}` in path order, read in pages so large projects are not held in memory."""
+        last_path = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT path, blob_sha, task_id, trace_json FROM reasoning_traces "
+                    "WHERE repo = ? AND branch = ? AND path > ? ORDER BY path LIMIT 200",
+                    (repo, branch, last_path),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield {
+                    "path": row["path"],
+                    "blob_sha": row["blob_sha"],
+                    "task_id": row["task_id"],
+                    "trace": json.loads(row["trace_json"]),
+                }
+            last_path = rows[-1]["path"]
+
+    def iter_traces(self, repo: str, branch: str) -> Iterator[dict]:
+        """Full traces in path order, each tagged with its task_id."""
+        for record in self.iter_trace_records(repo, branch):
+            yield {"task_id": record["task_id"], **record["trace"]}
+
+    # ---- Generated summaries and reports ----
+
+    def cached_summary(self, scope: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE scope = ? AND key = ?", (scope, key)).fetchone()
+        return row["summary"] if row else None
+
+    def remember_summary(self, scope: str, key: str, summary: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (scope, key, summary, created_at) VALUES (?, ?, ?, ?)",
+                (scope, key, summary, time.time()),
+            )
+
+    def last_report(self, repo: str, branch: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, path, created_at FROM metrics_reports WHERE repo = ? AND branch = ?", (repo, branch)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def record_report(self, repo: str, branch: str, digest: str, path: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metrics_reports (repo, branch, digest, path, created_at) VALUES (?, ?, ?, ?, ?)",
+                (repo, branch, digest, path, time.time()),
+            )
+
+
+_WAREHOUSES: Dict[str, TraceWarehouse] = {}
+_WAREHOUSES_LOCK = threading.Lock()
+
+
+def get_trace_warehouse(path: str) -> TraceWarehouse:
+    with _WAREHOUSES_LOCK:
+        warehouse = _WAREHOUSES.get(path)
+        if warehouse is None:
+            warehouse = _WAREHOUSES[path] = TraceWarehouse(path)
+        return warehouse
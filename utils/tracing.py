@@ -0,0 +1,257 @@
+# utils/tracing.py
+
+import functools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+SERVICE_NAME = "ai-delivery-framework"
+SPAN_KIND_INTERNAL, SPAN_KIND_SERVER, SPAN_KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+EXPORT_ROTATE_BYTES = 50 * 1024 * 1024
+
+# (trace, id of the innermost open span) for the request being handled
+_CURRENT: ContextVar[Optional[tuple]] = ContextVar("request_trace", default=None)
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class RequestTrace:
+    """Spans recorded while handling one request, plus running cost totals per outbound system."""
+
+    def __init__(self, name: str, attributes: Optional[dict] = None):
+        self.trace_id = secrets.token_hex(16)
+        self.root_id = secrets.token_hex(8)
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_OK
+        self.spans: List[dict] = []
+        self.costs: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, parent_id: str, start_ns: int, end_ns: int, kind: int,
+                 attributes: dict, error: bool = False, span_id: Optional[str] = None) -> str:
+        span_id = span_id or secrets.token_hex(8)
+        with self._lock:
+            self.spans.append({
+                "spanId": span_id, "parentSpanId": parent_id, "name": name, "kind": kind,
+                "start": start_ns, "end": end_ns, "attributes": attributes,
+                "status": STATUS_ERROR if error else STATUS_OK,
+            })
+        return span_id
+
+    def add_cost(self, system: str, duration_ms: float, bytes_sent: int = 0, bytes_received: int = 0, tokens: int = 0):
+        with self._lock:
+            cost = self.costs.setdefault(system, {"calls": 0, "ms": 0.0, "bytes": 0, "tokens": 0})
+            cost["calls"] += 1
+            cost["ms"] += duration_ms
+            cost["bytes"] += bytes_sent + bytes_received
+            cost["tokens"] += tokens
+
+    def cost_header(self) -> str:
+        """Compact totals, e.g. `github.calls=12, github.ms=840.2, github.bytes=52311, openai.calls=0`."""
+        parts = []
+        with self._lock:
+            for system in sorted(self.costs):
+                cost = self.costs[system]
+                parts.append(f"{system}.calls={cost['calls']}")
+                parts.append(f"{system}.ms={cost['ms']:.1f}")
+                parts.append(f"{system}.bytes={cost['bytes']}")
+                if cost["tokens"]:
+                    parts.append(f"{system}.tokens={cost['tokens']}")
+        return ", ".join(parts) or "github.calls=0"
+
+    def to_otlp(self) -> dict:
+        """This trace as an OTLP/JSON ExportTraceServiceRequest."""
+        def span(span_id, parent_id, name, kind, start, end, attributes, status):
+            body = {
+                "traceId": self.trace_id, "spanId": span_id, "name": name, "kind": kind,
+                "startTimeUnixNano": str(start), "endTimeUnixNano": str(end),
+                "attributes": [_attribute(k, v) for k, v in attributes.items() if v is not None],
+                "status": {"code": status},
+            }
+            if parent_id:
+                body["parentSpanId"] = parent_id
+            return body
+
+        with self._lock:
+            spans = [span(self.root_id, None, self.name, SPAN_KIND_SERVER, self.start_ns, self.end_ns or time.time_ns(),
+                          self.attributes, self.status)]
+            spans.extend(
+                span(s["spanId"], s["parentSpanId"], s["name"], s["kind"], s["start"], s["end"], s["attributes"], s["status"])
+                for s in self.spans
+            )
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "utils.tracing"}, "spans": spans}],
+        }]}
+
+
+def current_trace() -> Optional[RequestTrace]:
+    current = _CURRENT.get()
+    return current[0] if current else None
+
+
+def record_call(system: str, name: str, start_ns: int, end_ns: int, attributes: dict,
+                bytes_sent: int = 0, bytes_received: int = 0, tokens: int = 0, error: bool = False):
+    """Record one outbound call as a client span of the innermost open span. A no-op outside a request."""
+    current = _CURRENT.get()
+    if not current:
+        return
+    trace, parent_id = current
+    trace.add_span(name, parent_id, start_ns, end_ns, SPAN_KIND_CLIENT, {
+        **attributes,
+        "peer.service": system,
+        "http.request.body.size": bytes_sent,
+        "http.response.body.size": bytes_received,
+    }, error)
+    trace.add_cost(system, (end_ns - start_ns) / 1e6, bytes_sent, bytes_received, tokens)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Group the outbound calls made inside the block under an internal span named `name`."""
+    current = _CURRENT.get()
+    if not current:
+        yield
+        return
+    trace, parent_id = current
+    span_id = secrets.token_hex(8)
+    token = _CURRENT.set((trace, span_id))
+    start_ns, error = time.time_ns(), False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _CURRENT.reset(token)
+        trace.add_span(name, parent_id, start_ns, time.time_ns(), SPAN_KIND_INTERNAL, attributes, error, span_id=span_id)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of `span`, named after the function by default."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def bind_trace(fn):
+    """Carry the caller's trace into `fn` when it runs on a worker thread (executors do not copy context)."""
+    current = _CURRENT.get()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        token = _CURRENT.set(current)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _CURRENT.reset(token)
+    return run
+
+
+# ---- Export ----
+
+class JsonlSpanExporter:
+    """
+    Appends one OTLP/JSON ExportTraceServiceRequest per request to a local file from a
+    background thread, so writing never sits on the request path. Rotates at EXPORT_ROTATE_BYTES.
+    """
+
+    def __init__(self, path: str, max_queue: int = 1000):
+        self.path = path
+        self._queue: "queue.Queue[RequestTrace]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: RequestTrace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            pass  # drop rather than block a request
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                payload = trace.to_otlp()
+                if os.path.exists(self.path) and os.path.getsize(self.path) > EXPORT_ROTATE_BYTES:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a", encoding="utf-8") as out:
+                    out.write(json.dumps(payload, separators=(",", ":")) + "\n")
+            except OSError:
+                pass
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware that opens a RequestTrace per HTTP request, reports its outbound cost in
+    `X-Request-Cost` and `X-Trace-Id` response headers, and hands the finished trace to `exporter`.
+    Calls made after the response starts (streamed bodies) are exported but not in the header.
+    """
+
+    def __init__(self, app, exporter: Optional[JsonlSpanExporter] = None):
+        self.app = app
+        self.exporter = exporter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(f"{scope['method']} {scope['path']}", {
+            "http.request.method": scope["method"],
+            "url.path": scope["path"],
+        })
+        token = _CURRENT.set((trace, trace.root_id))
+
+        async def costed_send(message):
+            if message["type"] == "http.response.start":
+                trace.attributes["http.response.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    trace.status = STATUS_ERROR
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-trace-id", trace.trace_id.encode()),
+                    (b"x-request-cost", trace.cost_header().encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, costed_send)
+        except BaseException:
+            trace.status = STATUS_ERROR
+            raise
+        finally:
+            _CURRENT.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                trace.name = f"{scope['method']} {route}"
+                trace.attributes["http.route"] = route
+            trace.end_ns = time.time_ns()
+            if self.exporter is not None and trace.spans:
+                self.exporter.export(trace)
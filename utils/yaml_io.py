@@ -0,0 +1,40 @@
+# utils/yaml_io.py
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    LIBYAML = True
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper
+    LIBYAML = False
+
+
+def yaml_load(stream):
+    """`yaml.safe_load`, through libyaml's C parser when it is available."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def yaml_dump(data, stream=None, **kwargs):
+    """`yaml.safe_dump`, through libyaml's C emitter when it is available."""
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
+
+
+class _UntaggedLoader(SafeLoader):
+    """SafeLoader that reads nodes with unknown tags (e.g. `!!python/name:...` from an unsafe dump) as plain values."""
+
+
+def _construct_untagged(loader, node):
+    if isinstance(node, yaml.MappingNode):
+        return loader.construct_mapping(node)
+    if isinstance(node, yaml.SequenceNode):
+        return loader.construct_sequence(node)
+    return loader.construct_scalar(node)
+
+
+_UntaggedLoader.add_constructor(None, _construct_untagged)
+
+
+def yaml_load_untagged(stream):
+    """Like `yaml_load`, but tolerates tags safe loading rejects by dropping them; for salvaging old files."""
+    return yaml.load(stream, Loader=_UntaggedLoader)